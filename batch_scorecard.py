@@ -0,0 +1,273 @@
+"""
+Score a whole folder (or manifest) of OMs / e-mails from the command line.
+
+PDF parsing runs in a process pool, GPT calls run concurrently on an asyncio
+event loop as soon as each payload is ready (sharing the process-wide rate
+limiter), and every deal gets its own workbook.
+A summary manifest (JSON + CSV) is written next to the workbooks, and
+--portfolio adds one workbook comparing every scored deal side by side.
+
+Usage:
+    python batch_scorecard.py ./inbox --out-dir ./scorecards --template "Scorecard - Blank v1.xlsx"
+    python batch_scorecard.py deals.txt --parse-workers 8 --llm-workers 16
+    python batch_scorecard.py ./inbox --portfolio
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import csv
+import io
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from email import policy
+from email.parser import BytesParser
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+from build_scorecard import (
+    extract_fields_async,
+    get_template_from_s3,
+    load_payload,
+    normalize_fields,
+    scorecard_filename,
+    write_to_template,
+)
+from clients import get_async_openai_client
+from extractor import get_best_payload
+from search_index import index_source
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+    from portfolio_export import PortfolioWriter
+
+SOURCE_SUFFIXES = {".pdf", ".txt", ".eml"}
+MANIFEST_FIELDS = ["source", "status", "output", "tenant", "parse_seconds", "llm_seconds", "error"]
+
+
+def discover_sources(target: Path) -> list[Path]:
+    """
+    Expand the CLI input into a list of source files.
+
+    A directory is scanned (non-recursively) for .pdf/.txt/.eml files. Any other
+    file is read as a manifest: one path per line, or a CSV with a "path" column.
+    Relative manifest paths are resolved against the manifest's folder.
+    """
+    if target.is_dir():
+        return sorted(p for p in target.iterdir() if p.suffix.lower() in SOURCE_SUFFIXES)
+
+    text = target.read_text()
+    if target.suffix.lower() == ".csv":
+        entries = [row["path"] for row in csv.DictReader(io.StringIO(text)) if row.get("path")]
+    else:
+        entries = [ln.strip() for ln in text.splitlines() if ln.strip() and not ln.startswith("#")]
+
+    sources = []
+    for entry in entries:
+        path = Path(entry)
+        sources.append(path if path.is_absolute() else target.parent / path)
+    return sources
+
+
+def read_email_body(path: Path) -> str:
+    """Plain-text body of a saved .eml message."""
+    with open(path, "rb") as fh:
+        msg = BytesParser(policy=policy.default).parse(fh)
+    body = msg.get_body(preferencelist=("plain", "html"))
+    return body.get_content() if body is not None else ""
+
+
+def _parse_source(path_str: str, use_cache: bool, full_scan: bool = False) -> tuple[str, dict[int, str], float]:
+    """Process-pool worker: build the GPT payload for one source file (plus the page text read for it)."""
+    start = time.perf_counter()
+    path = Path(path_str)
+    if path.suffix.lower() == ".eml":
+        payload, pages = get_best_payload(read_email_body(path), with_pages=True)
+    else:
+        # Documents are already spread across processes; don't nest another pool
+        payload, _, pages = load_payload(path, use_cache=use_cache, pdf_workers=1, full_scan=full_scan,
+                                         with_pages=True)
+    return payload, pages, time.perf_counter() - start
+
+
+def _index_source(path_str: str, fields: dict, pages: dict[int, str]) -> str:
+    """Process-pool worker: add one scored source to the search index, reusing the pages parsed for it."""
+    path = Path(path_str)
+    # Already in a pool process: extract the rest of the pages here rather than in a nested pool
+    return index_source(path, fields, path.stem, pages, workers=1)
+
+
+_taken_lock = threading.Lock()
+
+def _unique_path(out_dir: Path, name: str, source: Path, taken: set) -> Path:
+    """Avoid two deals in the same run overwriting each other's workbook."""
+    out_path = out_dir / name
+    with _taken_lock:
+        if out_path in taken:
+            stem = Path(name).stem
+            out_path = out_dir / f"{stem} - {source.stem}.xlsx"
+        taken.add(out_path)
+    return out_path
+
+
+async def run_batch_async(
+    sources: list[Path],
+    *,
+    template_bytes: bytes,
+    out_dir: Path,
+    client: AsyncOpenAI,
+    parse_workers: Optional[int] = None,
+    llm_workers: int = 8,
+    use_cache: bool = True,
+    full_scan: bool = False,
+    portfolio: Optional[PortfolioWriter] = None,
+    index: bool = True,
+) -> list[dict]:
+    """
+    Score every source and write one workbook per deal into ``out_dir``.
+
+    Each deal is parsed in the process pool, then its GPT call is awaited on
+    the event loop (at most ``llm_workers`` in flight, all under the shared
+    rate limiter), then its workbook is written on a worker thread. If a
+    ``portfolio`` writer is given, each scored deal is also streamed into it
+    as soon as its workbook exists. With ``index`` set, every scored source is
+    then added to the search index (search_index.py) from the process pool.
+
+    Returns:
+        list[dict]: One manifest row per source, in input order.
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    loop = asyncio.get_running_loop()
+    llm_slots = asyncio.Semaphore(llm_workers)
+    taken_paths: set = set()
+    done_count = 0
+
+    async def score(src: Path, parse_pool: ProcessPoolExecutor) -> dict:
+        nonlocal done_count
+        row = {"source": str(src), "status": "ok", "output": "", "tenant": "",
+               "parse_seconds": None, "llm_seconds": None, "error": ""}
+        stage = "parse"
+        try:
+            payload, pages, seconds = await loop.run_in_executor(parse_pool, _parse_source, str(src), use_cache,
+                                                               full_scan)
+            row["parse_seconds"] = round(seconds, 3)
+
+            stage = "llm"
+            start = time.perf_counter()
+            async with llm_slots:
+                fields = await extract_fields_async(payload, client=client, use_cache=use_cache)
+            result = normalize_fields(fields)
+            row["llm_seconds"] = round(time.perf_counter() - start, 3)
+
+            stage = "write"
+            out_path = _unique_path(out_dir, scorecard_filename(result), src, taken_paths)
+            await asyncio.to_thread(write_to_template, result, io.BytesIO(template_bytes), out_path,
+                                    compiled=True)
+            row.update(output=str(out_path), tenant=result.get("Current Tenant") or "")
+            if portfolio is not None:
+                stage = "portfolio"
+                portfolio.add(result, out_path)
+            if index:
+                # The workbook is already written, so an indexing failure does not fail the deal
+                try:
+                    await loop.run_in_executor(parse_pool, _index_source, str(src), result, pages)
+                except Exception as e:
+                    print(f"⚠️ Could not add {src.name} to the search index: {e}")
+        except Exception as e:
+            row.update(status="error", error=f"{stage}: {e}")
+
+        done_count += 1
+        print(f"[{done_count}/{len(sources)}] {row['status']}: {src.name}")
+        return row
+
+    with ProcessPoolExecutor(max_workers=parse_workers) as parse_pool:
+        return list(await asyncio.gather(*(score(src, parse_pool) for src in sources)))
+
+
+def run_batch(sources: list[Path], **kwargs) -> list[dict]:
+    """Blocking wrapper around ``run_batch_async`` (same arguments)."""
+    return asyncio.run(run_batch_async(sources, **kwargs))
+
+
+def write_manifest(rows: list[dict], out_dir: Path) -> tuple[Path, Path]:
+    """Write the batch summary as manifest.json and manifest.csv in ``out_dir``."""
+    json_path = out_dir / "manifest.json"
+    csv_path = out_dir / "manifest.csv"
+    json_path.write_text(json.dumps(rows, indent=2))
+    with open(csv_path, "w", newline="") as fh:
+        writer = csv.DictWriter(fh, fieldnames=MANIFEST_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    return json_path, csv_path
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Build FCPT scorecards for a folder or manifest of OMs.")
+    parser.add_argument("input", type=Path, help="Folder of .pdf/.txt/.eml files, or a manifest (.txt or .csv)")
+    parser.add_argument("--out-dir", type=Path, default=Path("scorecards"), help="Where to write workbooks")
+    parser.add_argument("--template", type=Path, default=None,
+                        help="Local template .xlsx (defaults to the S3 template)")
+    parser.add_argument("--parse-workers", type=int, default=os.cpu_count(),
+                        help="Processes used for PDF parsing (default: CPU count)")
+    parser.add_argument("--llm-workers", type=int, default=8, help="Concurrent GPT requests (default: 8)")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore cached PDF text and GPT responses")
+    parser.add_argument("--full-scan", action="store_true",
+                        help="Read every PDF page instead of stopping once all fields are found")
+    parser.add_argument("--portfolio", action="store_true",
+                        help="Also write Portfolio.xlsx comparing every scored deal side by side")
+    parser.add_argument("--no-index", action="store_true",
+                        help="Do not add the scored documents to the local search index")
+    args = parser.parse_args(argv)
+
+    sources = discover_sources(args.input)
+    if not sources:
+        print(f"No sources found in {args.input}")
+        return 1
+
+    if args.template is not None:
+        template_bytes = args.template.read_bytes()
+    else:
+        bucket = os.getenv('S3_BUCKET_NAME')
+        key = os.getenv('TEMPLATE_S3_KEY', 'templates/Scorecard - Blank v1 streamlit.xlsx')
+        template_bytes = get_template_from_s3(bucket, key).getvalue()
+
+    client = get_async_openai_client()
+
+    portfolio = None
+    if args.portfolio:
+        from portfolio_export import PortfolioWriter
+        args.out_dir.mkdir(parents=True, exist_ok=True)
+        portfolio = PortfolioWriter(args.out_dir / "Portfolio.xlsx")
+
+    start = time.perf_counter()
+    try:
+        rows = run_batch(
+            sources,
+            template_bytes=template_bytes,
+            out_dir=args.out_dir,
+            client=client,
+            parse_workers=args.parse_workers,
+            llm_workers=args.llm_workers,
+            use_cache=not args.no_cache,
+            full_scan=args.full_scan,
+            portfolio=portfolio,
+            index=not args.no_index,
+        )
+    finally:
+        if portfolio is not None:
+            portfolio.close()
+    json_path, _ = write_manifest(rows, args.out_dir)
+
+    failed = sum(1 for r in rows if r["status"] != "ok")
+    print(f"Scored {len(rows) - failed}/{len(rows)} deals in {time.perf_counter() - start:.1f}s "
+          f"(manifest: {json_path})")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,546 @@
+"""
+Stage-level benchmarks for the scorecard pipeline.
+
+Synthetic OM PDFs (varying page counts and table densities) are generated in
+memory, GPT is replaced by a fake client with a configurable latency, and each
+stage of build_scorecard is timed on its own:
+
+    extract_plain_text, extract_tables, keyword_window, rank_payload,
+    fast_path (rule-based fields), interpret_payload_with_gpt (fake client),
+    llm_first_field[stream] (time until a streamed answer reports a field), post_processing
+    (parse_gpt_response + normalize_fields), scoring, write_to_template
+    (compiled and openpyxl)
+
+The fake client has no quota, so the run swaps in a limiter that never waits:
+otherwise the llm stages of larger cases would time the OPENAI_RPM / OPENAI_TPM
+throttle rather than the pipeline.
+
+Results are printed (or written with --output) as JSON. Pass --baseline with
+an earlier result file to flag stages whose median got slower.
+
+Usage:
+    python benchmark_scorecard.py --pages 5 20 60 --tables 0 2 --repeats 5 --output bench.json
+    python benchmark_scorecard.py --baseline bench.json --tolerance 0.25
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable, Optional
+
+import httpx
+import openai
+import openpyxl
+import pdfplumber
+
+from build_scorecard import (
+    DEFAULT_TABLE_SETTINGS,
+    KW,
+    PROMPT_TEMPLATE,
+    SCORECARD_LAYOUT,
+    interpret_payload_with_gpt,
+    normalize_fields,
+    parse_gpt_response,
+    scorecard_cells,
+    write_to_template,
+)
+from extractor import extract_plain_text, extract_tables, keyword_window
+from fast_extract import resolve_fields
+from llm_policy import get_latency_stats
+from payload_ranker import rank_payload
+from rate_limit import RateLimiter, estimate_tokens, set_rate_limiter
+
+# Stage timings below this many seconds are too noisy to call a regression
+NOISE_FLOOR_SECONDS = 0.002
+
+#################################################
+# Synthetic OMs                                 #
+#################################################
+
+_FILLER = ("lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor "
+           "incididunt ut labore et dolore magna aliqua enim ad minim veniam quis nostrud "
+           "exercitation ullamco laboris nisi aliquip ex ea commodo consequat").split()
+
+_PROPERTY_OVERVIEW = [
+    "PROPERTY OVERVIEW",
+    "Address: 4120 Edgewood Rd SW, Cedar Rapids, IA 52404",
+    "Lot Size: 0.83 Acres",
+    "Year Built: 2015",
+    "Building Size (GLA): 2,300 SF",
+    "Drive-Thru: Yes",
+]
+_RENT_ROLL = [
+    "RENT ROLL",
+    "Tenant: Taco Bell (Franchisee guaranty)",
+    "Lease Type: Absolute NNN",
+    "Lease Expiration: June 30, 2035",
+    "Annual Rent: $120,000",
+    "Rent Increases: 10% every 5 years",
+]
+_TENANT_PROFILE = [
+    "TENANT PROFILE",
+    "Taco Bell operates more than 7,500 restaurants nationwide.",
+]
+
+# Canned GPT answer for the synthetic OM above
+FAKE_RESPONSE = {
+    "Lease Structure": "NNN",
+    "Lease Term": {"expiration_date": "06/30/2035", "remaining_years": None},
+    "Absolute Rent": 120000,
+    "Rent Growth": "10% every 5 years",
+    "Acreage": 0.83,
+    "Restaurant/Auto/Medical?": "Yes",
+    "Single Tenant?": "Yes",
+    "Drive-Thru (QSR) / Carry-out (CDR)": "QSR",
+    "Box Size": "2,300 SF",
+    "Address": {"Line 1": "4120 Edgewood Rd SW", "City": "Cedar Rapids", "State": "IA", "Zip": "52404"},
+    "Year Built": 2015,
+    "Current Tenant": "Taco Bell",
+    "Number of National Locations": 7500,
+}
+
+# Characters per chunk of a fake streamed answer
+STREAM_CHUNK_CHARS = 16
+
+
+def _pdf_string(text: str) -> str:
+    return "(" + text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ")"
+
+
+def _text_ops(x: float, y: float, text: str, size: int = 10) -> str:
+    return f"BT /F1 {size} Tf {x:.1f} {y:.1f} Td {_pdf_string(text)} Tj ET\n"
+
+
+def _table_ops(top: float, rng: random.Random) -> tuple[str, float]:
+    """A ruled rent schedule (pdfplumber's "lines" strategy finds it); returns (ops, bottom y)."""
+    rows = [["Lease Years", "Annual Rent", "Monthly Rent", "Rent Increase"]]
+    rent = rng.randrange(80, 200) * 1000
+    for i in range(5):
+        rows.append([f"Years {i * 5 + 1} - {i * 5 + 5}", f"${rent:,} per year",
+                     f"${rent // 12:,} per month", "10% every 5 years" if i else "Initial base rent"])
+        rent = int(rent * 1.1)
+
+    x0, col_w, row_h = 50.0, 125.0, 18.0
+    ops = ["0.5 w\n"]
+    for r, row in enumerate(rows):
+        y = top - r * row_h
+        for c, cell in enumerate(row):
+            ops.append(_text_ops(x0 + c * col_w + 4, y - row_h + 5, cell, size=8))
+    bottom = top - len(rows) * row_h
+    for r in range(len(rows) + 1):
+        y = top - r * row_h
+        ops.append(f"{x0:.1f} {y:.1f} m {x0 + 4 * col_w:.1f} {y:.1f} l S\n")
+    for c in range(5):
+        x = x0 + c * col_w
+        ops.append(f"{x:.1f} {top:.1f} m {x:.1f} {bottom:.1f} l S\n")
+    return "".join(ops), bottom
+
+
+def synthetic_om_pdf(pages: int = 20, tables_per_page: int = 0, seed: int = 0) -> bytes:
+    """
+    Build a synthetic offering memorandum as PDF bytes.
+
+    Marketing filler pages carry no field evidence; the property overview sits
+    a third of the way in, the rent roll two thirds in and the tenant profile
+    on the last page, so the early page scan has to read most of the document.
+
+    Args:
+        pages: Page count
+        tables_per_page: Ruled rent-schedule tables drawn on each page (max 3)
+        seed: Seed for the filler text and table figures
+    """
+    rng = random.Random(seed)
+    sections = {pages // 3: _PROPERTY_OVERVIEW, (2 * pages) // 3: _RENT_ROLL, pages - 1: _TENANT_PROFILE}
+
+    streams = []
+    for page_no in range(pages):
+        ops = [_text_ops(50, 800, f"OFFERING MEMORANDUM - PAGE {page_no + 1}", size=12)]
+        y = 780.0
+        for line in sections.get(page_no, []):
+            ops.append(_text_ops(50, y, line))
+            y -= 14
+        for _ in range(8):
+            ops.append(_text_ops(50, y, " ".join(rng.choice(_FILLER) for _ in range(14))))
+            y -= 14
+        for _ in range(min(tables_per_page, 3)):
+            ops.append(_text_ops(50, y - 6, "RENT SCHEDULE", size=9))
+            table, bottom = _table_ops(y - 12, rng)
+            ops.append(table)
+            y = bottom - 20
+        streams.append("".join(ops).encode("latin-1"))
+
+    # Objects: 1 catalog, 2 page tree, 3 font, then (page, content) pairs
+    objects = {1: b"<< /Type /Catalog /Pages 2 0 R >>",
+               3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"}
+    kids = []
+    for i, stream in enumerate(streams):
+        page_id, content_id = 4 + 2 * i, 5 + 2 * i
+        kids.append(f"{page_id} 0 R")
+        objects[page_id] = (f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+                            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>").encode()
+        objects[content_id] = b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream"
+    objects[2] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>".encode()
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = {}
+    for obj_id in sorted(objects):
+        offsets[obj_id] = out.tell()
+        out.write(b"%d 0 obj\n" % obj_id + objects[obj_id] + b"\nendobj\n")
+    xref = out.tell()
+    size = max(objects) + 1
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % size)
+    for obj_id in range(1, size):
+        out.write(b"%010d 00000 n \n" % offsets[obj_id])
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, xref))
+    return out.getvalue()
+
+
+def blank_template() -> bytes:
+    """Minimal stand-in for the S3 scorecard template (merged comment ranges, a total formula)."""
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Scorecard"
+    for _, comment_range in SCORECARD_LAYOUT.values():
+        ws.merge_cells(comment_range)
+    ws["L90"] = "=SUM(L8:L81)"
+    out = io.BytesIO()
+    wb.save(out)
+    return out.getvalue()
+
+#################################################
+# Fake LLM client                               #
+#################################################
+
+class FakeOpenAI:
+    """
+    Stand-in for ``openai.OpenAI`` that answers every chat completion with
+    ``response`` after sleeping ``latency`` seconds.
+
+    Faults can be injected to exercise llm_policy.py: each call independently
+    fails with a 500 (``fault_rate``), times out (``timeout_rate``), answers
+    with text that is not JSON (``invalid_rate``) or takes ``slow_latency``
+    seconds instead (``slow_rate``). Draws come from a seeded RNG.
+
+    With ``stream=True`` the answer comes back in STREAM_CHUNK_CHARS pieces
+    spread evenly over the latency, followed by a usage-only chunk.
+    """
+
+    def __init__(self, latency: float = 0.0, response: Optional[dict] = None, *, fault_rate: float = 0.0,
+                 timeout_rate: float = 0.0, invalid_rate: float = 0.0, slow_rate: float = 0.0,
+                 slow_latency: float = 5.0, seed: int = 0):
+        self.latency = latency
+        self.content = json.dumps(response or FAKE_RESPONSE)
+        self.fault_rate = fault_rate
+        self.timeout_rate = timeout_rate
+        self.invalid_rate = invalid_rate
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _plan(self, timeout: Optional[float]) -> tuple[float, Optional[Exception], str]:
+        """(seconds to sleep, error to raise afterwards, content) for one call."""
+        with self._lock:
+            self.calls += 1
+            fault, slow, invalid = self._rng.random(), self._rng.random(), self._rng.random()
+        request = httpx.Request("POST", "https://fake.openai/v1/chat/completions")
+        latency = self.slow_latency if slow < self.slow_rate else self.latency
+        if fault < self.timeout_rate:
+            # Hangs until the caller's timeout
+            return latency if timeout is None else timeout, openai.APITimeoutError(request=request), ""
+        if timeout is not None and latency > timeout:
+            return timeout, openai.APITimeoutError(request=request), ""
+        if fault < self.timeout_rate + self.fault_rate:
+            response = httpx.Response(500, request=request)
+            return latency, openai.InternalServerError("injected 500", response=response, body=None), ""
+        return latency, None, "Sorry, I can't help with that." if invalid < self.invalid_rate else self.content
+
+    def _response(self, request: dict, content: str):
+        prompt_tokens = estimate_tokens(request["messages"][0]["content"])
+        completion_tokens = estimate_tokens(content)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                                  total_tokens=prompt_tokens + completion_tokens),
+        )
+
+    def _chunks(self, request: dict, content: str) -> list:
+        """Stream chunks of ``content``, the last one carrying only the usage."""
+        pieces = [content[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(content), STREAM_CHUNK_CHARS)]
+        chunks = [SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))], usage=None)
+                  for piece in pieces]
+        return chunks + [SimpleNamespace(choices=[], usage=self._response(request, content).usage)]
+
+    def _create(self, timeout: Optional[float] = None, **request):
+        latency, error, content = self._plan(timeout)
+        if request.get("stream") and error is None:
+            return FakeStream(self._chunks(request, content), latency)
+        if latency:
+            time.sleep(latency)
+        if error is not None:
+            raise error
+        return self._response(request, content)
+
+
+class FakeStream:
+    """``openai.Stream`` stand-in yielding ``chunks`` evenly over ``latency`` seconds."""
+
+    def __init__(self, chunks: list, latency: float):
+        self.chunks = chunks
+        self.delay = latency / max(1, len(chunks) - 1)
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            if chunk.choices and self.delay:
+                time.sleep(self.delay)
+            yield chunk
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            if chunk.choices and self.delay:
+                await asyncio.sleep(self.delay)
+            yield chunk
+
+    def close(self):
+        pass
+
+
+class FakeAsyncStream(FakeStream):
+    async def close(self):
+        pass
+
+
+class FakeAsyncOpenAI(FakeOpenAI):
+    """``openai.AsyncOpenAI`` counterpart of FakeOpenAI (same options)."""
+
+    async def _create(self, timeout: Optional[float] = None, **request):
+        latency, error, content = self._plan(timeout)
+        if request.get("stream") and error is None:
+            return FakeAsyncStream(self._chunks(request, content), latency)
+        if latency:
+            await asyncio.sleep(latency)
+        if error is not None:
+            raise error
+        return self._response(request, content)
+
+#################################################
+# Timing                                        #
+#################################################
+
+def time_stage(fn: Callable, repeats: int):
+    """Run ``fn`` ``repeats`` times; return (timing summary, last result)."""
+    runs = []
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        runs.append(time.perf_counter() - start)
+    return _summary(runs), result
+
+
+def _summary(runs: list[float]) -> dict:
+    return {
+        "median": statistics.median(runs),
+        "min": min(runs),
+        "max": max(runs),
+        "runs": [round(r, 6) for r in runs],
+    }
+
+
+def time_first_field(payload: str, client, repeats: int) -> dict:
+    """Timing summary of how long a streamed GPT answer takes to report its first field."""
+    runs = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        first = []
+        interpret_payload_with_gpt(payload, client=client, use_cache=False,
+                                   on_field=lambda name, value: first or first.append(time.perf_counter() - start))
+        runs.append(first[0] if first else time.perf_counter() - start)
+    return _summary(runs)
+
+
+def bench_case(pdf: bytes, template: bytes, *, repeats: int, llm_latency: float,
+               llm_faults: Optional[dict] = None) -> dict:
+    """Time every stage on one synthetic OM. Caches are bypassed throughout."""
+    client = FakeOpenAI(latency=llm_latency, **(llm_faults or {}))
+    stages = {}
+
+    stages["extract_plain_text"], text = time_stage(
+        lambda: extract_plain_text(pdf, use_cache=False, workers=1), repeats)
+    stages["extract_tables"], tables = time_stage(
+        lambda: extract_tables(pdf, DEFAULT_TABLE_SETTINGS, KW, adaptive=False), repeats)
+    stages["keyword_window"], _ = time_stage(lambda: keyword_window(text), repeats)
+    stages["rank_payload"], payload = time_stage(lambda: rank_payload(text), repeats)
+    stages["fast_path"], (resolved, _) = time_stage(lambda: resolve_fields(payload), repeats)
+    stages["interpret_payload_with_gpt"], _ = time_stage(
+        lambda: interpret_payload_with_gpt(payload, client=client, use_cache=False), repeats)
+    stages["llm_first_field[stream]"] = time_first_field(payload, client, repeats)
+    stages["post_processing"], result = time_stage(
+        lambda: normalize_fields(parse_gpt_response(client.content)), repeats)
+    stages["scoring"], _ = time_stage(lambda: scorecard_cells(result), repeats)
+    stages["write_to_template"], _ = time_stage(
+        lambda: write_to_template(result, template, io.BytesIO(), compiled=True), repeats)
+    stages["write_to_template[openpyxl]"], _ = time_stage(
+        lambda: write_to_template(result, template, io.BytesIO(), compiled=False), repeats)
+
+    return {
+        "pdf_bytes": len(pdf),
+        "text_chars": len(text),
+        "payload_chars": len(payload),
+        "prompt_tokens_est": estimate_tokens(PROMPT_TEMPLATE.format(payload=payload)),
+        "fast_path_resolved": len(resolved),
+        "tables_found": len(tables),
+        "stages": stages,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=Path(__file__).resolve().parent, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+@contextlib.contextmanager
+def unthrottled():
+    """Swap the process-wide rate limiter for one that never waits, restoring it afterwards."""
+    previous = set_rate_limiter(RateLimiter(rpm=1e12, tpm=1e15))
+    try:
+        yield
+    finally:
+        set_rate_limiter(previous)
+
+
+def run_benchmarks(page_counts: list[int], table_densities: list[int], *, repeats: int = 3,
+                   llm_latency: float = 0.0, template: Optional[bytes] = None, seed: int = 0,
+                   llm_faults: Optional[dict] = None) -> dict:
+    """
+    Benchmark every (page count, table density) combination.
+
+    ``llm_faults`` are FakeOpenAI fault-injection options (fault_rate, slow_rate...);
+    the latency percentiles of every fake GPT attempt are reported under "llm_latency".
+
+    Returns:
+        dict: {"meta": {...}, "cases": [{"pages", "tables_per_page", "stages": {stage: timing}}, ...]}
+    """
+    template = template or blank_template()
+    cases = []
+    for pages in page_counts:
+        for density in table_densities:
+            pdf = synthetic_om_pdf(pages, density, seed=seed)
+            # Stage functions print progress; keep stdout clean for the JSON
+            with contextlib.redirect_stdout(sys.stderr), unthrottled():
+                case = bench_case(pdf, template, repeats=repeats, llm_latency=llm_latency, llm_faults=llm_faults)
+            cases.append({"pages": pages, "tables_per_page": density, **case})
+            print(f"pages={pages} tables/page={density}: " + ", ".join(
+                f"{name} {t['median'] * 1000:.1f}ms" for name, t in case["stages"].items()), file=sys.stderr)
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "pdfplumber": pdfplumber.__version__,
+            "openpyxl": openpyxl.__version__,
+            "repeats": repeats,
+            "llm_latency": llm_latency,
+            "llm_faults": llm_faults or {},
+            "rate_limiter": "unlimited",
+            "seed": seed,
+        },
+        "cases": cases,
+        "llm_latency": get_latency_stats().summary(),
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float = 0.2) -> list[dict]:
+    """
+    Stages whose median is more than ``tolerance`` (fractional) slower than in ``baseline``.
+
+    Cases are matched on (pages, tables_per_page); stages missing from either side are skipped.
+    """
+    previous = {(c["pages"], c["tables_per_page"]): c["stages"] for c in baseline.get("cases", [])}
+    regressions = []
+    for case in current["cases"]:
+        old_stages = previous.get((case["pages"], case["tables_per_page"]), {})
+        for name, timing in case["stages"].items():
+            if name not in old_stages:
+                continue
+            old, new = old_stages[name]["median"], timing["median"]
+            if new - old > NOISE_FLOOR_SECONDS and new > old * (1 + tolerance):
+                regressions.append({"pages": case["pages"], "tables_per_page": case["tables_per_page"],
+                                    "stage": name, "baseline": old, "current": new,
+                                    "change": round(new / old - 1, 3) if old else None})
+    return regressions
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Time each stage of the scorecard pipeline on synthetic OMs.")
+    parser.add_argument("--pages", type=int, nargs="+", default=[5, 20, 60], help="Page counts to generate")
+    parser.add_argument("--tables", type=int, nargs="+", default=[0, 2],
+                        help="Rent-schedule tables per page (0-3)")
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per stage; the median is reported")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Seconds the fake GPT client sleeps")
+    parser.add_argument("--llm-fault-rate", type=float, default=0.0,
+                        help="Share of fake GPT calls that fail with a 500 (retried by llm_policy)")
+    parser.add_argument("--llm-slow-rate", type=float, default=0.0,
+                        help="Share of fake GPT calls that take --llm-slow-latency seconds instead")
+    parser.add_argument("--llm-slow-latency", type=float, default=2.0,
+                        help="Latency of a slow fake GPT call in seconds (default 2.0)")
+    parser.add_argument("--template", type=Path, default=None,
+                        help="Scorecard template .xlsx (default: a generated blank one)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=None, help="Write JSON here instead of stdout")
+    parser.add_argument("--baseline", type=Path, default=None,
+                        help="Earlier JSON result; exit 1 if any stage median regressed")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed slowdown vs. the baseline as a fraction (default 0.2)")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(
+        args.pages,
+        args.tables,
+        repeats=args.repeats,
+        llm_latency=args.llm_latency,
+        template=args.template.read_bytes() if args.template else None,
+        seed=args.seed,
+        llm_faults={"fault_rate": args.llm_fault_rate, "slow_rate": args.llm_slow_rate,
+                    "slow_latency": args.llm_slow_latency, "seed": args.seed},
+    )
+
+    status = 0
+    if args.baseline is not None:
+        regressions = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+        results["regressions"] = regressions
+        for r in regressions:
+            print(f"REGRESSION pages={r['pages']} tables/page={r['tables_per_page']} {r['stage']}: "
+                  f"{r['baseline'] * 1000:.1f}ms -> {r['current'] * 1000:.1f}ms", file=sys.stderr)
+        status = 1 if regressions else 0
+
+    text = json.dumps(results, indent=2)
+    if args.output is not None:
+        args.output.write_text(text)
+    else:
+        print(text)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
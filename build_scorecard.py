@@ -1,23 +1,50 @@
 ### Packages: 
 
-import pdfplumber
-import re
-from openai import OpenAI
+# pdfplumber, openai, boto3 and openpyxl are only imported on first use (see
+# extractor.py, clients.py and llm_policy.py), so scoring callers and e-mail
+# runs never load the PDF or AWS stack; check with import_budget.py
+from __future__ import annotations
+
+import asyncio
+import io
 import json
-import re
-from openpyxl import load_workbook
-from dotenv import load_dotenv
-from typing import Optional
-from pathlib import Path
-import textwrap
-from extractor import get_best_payload, extract_plain_text
 import os
-import tempfile
+import re
+import time
 from datetime import datetime, date, timedelta
-from extractor import get_best_payload, extract_plain_text
-import boto3
-from botocore.exceptions import ClientError
-import io
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+from dotenv import load_dotenv
+
+from extractor import get_best_payload
+from cache import CACHE_ROOT, DiskCache, sha256_text
+from rate_limit import estimate_tokens, get_rate_limiter
+from template_cache import get_template_bytes
+from template_writer import TemplateCompileError, get_compiled_template
+from score_rules import RENT_TABLES, SCORE_TABLES, UNKNOWN_RENT
+from tracing import annotate, span, tracing
+from fast_extract import resolve_fields
+from json_stream import JSONObjectStream
+from search_index import index_in_background
+from clients import get_openai_client
+from llm_policy import (
+    LLM_DEADLINE_SECONDS,
+    LLM_HEDGE,
+    LLM_MAX_RETRIES,
+    LLM_TIMEOUT_SECONDS,
+    backoff_seconds,
+    check_content,
+    get_latency_stats,
+    is_rate_limited,
+    is_retryable,
+    never_reached_model,
+    run_hedged,
+    run_hedged_async,
+)
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI, RateLimitError
 
 load_dotenv()
 #openai_key = os.environ["OPENAI_API_KEY"]  # Works locally 
@@ -120,96 +147,102 @@ def calculate_remaining_term(expiration_date_str: str) -> float:
         print(f"Error calculating lease term: {e}")
         return None
 
-def interpret_payload_with_gpt(payload: str, *, client: OpenAI):
+# What GPT is asked for each field: (question, extra instructions, example value).
+# The prompt is assembled from these so a request can cover only some fields.
+FIELD_PROMPTS = {
+    "Lease Structure": ("Lease Structure", [], "NNN"),
+    "Lease Term": (
+        "Lease Term (IMPORTANT: Extract the exact lease expiration date AND calculate remaining years)",
+        ['For Lease Term: You MUST extract the exact lease expiration date (e.g., "June 2029", "6/30/2029").',
+         'For Lease Term: The value should be a dictionary with two keys:\n'
+         '  * "expiration_date": The exact expiration date as found in the text\n'
+         '  * "remaining_years": Calculate the years between today and the expiration date'],
+        {"expiration_date": "June 2029", "remaining_years": 5.4}),
+    "Absolute Rent": ("Absolute Rent", [], 120000),
+    "Rent Growth": (
+        "Rent Growth",
+        ["For Rent Growth: List the percent growth. If it is only one bump over a multi year period, "
+         "calculate the average annual bump (ex. 10% over five years = 2%)",
+         "For Rent Growth: If the rent growth is not listed, calculate the in-place percentage growth "
+         "of the current rent rate."],
+        "3% annually"),
+    "Acreage": ("Acreage", [], 0.83),
+    "Restaurant/Auto/Medical?": (
+        "Is Current Tenant a Restaurant, Auto, or Medical Facility? (Yes or No)", [], "Yes"),
+    "Single Tenant?": (
+        "Is The Building Currently a Single Tenant Building? (Yes or No)",
+        ["For Single Tenant?: if the answer is No, also note whether the building is >50%, >33%, "
+         "or <33% restaurant."],
+        "Yes"),
+    "Drive-Thru (QSR) / Carry-out (CDR)": (
+        "Does the operator have a Drive-Thru (QSR) or Carry-out (CDR) available?",
+        ["For Drive-Thru (QSR) / Carry-out (CDR): if the tenant is a restaurant, determine if it "
+         'qualifies as QSR or CDR. If not a restaurant, return "NA".'],
+        "QSR"),
+    "Box Size": ("Box Size", [], "2,300 sqft"),
+    "Address": (
+        "Address (Split into dictionary with the following keys: 'Line 1', 'City', 'State', 'Zip')", [],
+        {"Line 1": "123 Main St", "City": "Cedar Rapids", "State": "IA", "Zip": "52404"}),
+    "Year Built": ("Year Built", [], 2015),
+    "Current Tenant": (
+        "Current Tenant (restaurant, auto shop, medical operator name)",
+        ["For Current Tenant: prefer the franchise name over the operator's legal entity name."],
+        "Taco Bell"),
+    "Number of National Locations": (
+        "Number of National Locations",
+        ["For Number of National Locations: estimate the national presence and provide the number of "
+         "U.S. locations of the specific type of restaurant, auto shop, or medical clinic."],
+        7500),
+}
+FIELD_ORDER = tuple(FIELD_PROMPTS)
+
+def prompt_template(fields=None) -> str:
     """
-    Uses the new OpenAI client interface to extract key fields from the provided best_tables.
-    
-    Args:
-        best_tables (list): A list of dictionaries containing extracted table data.
-        model (str): The model to use (default "gpt-4o").
-    
-    Returns:
-        dict: A dictionary mapping the following keys to their extracted values.
-              If a field is not found, its value will be null.
+    GPT prompt asking for ``fields`` (default: every field), with a ``{payload}`` placeholder.
     """
-    model ="gpt-4o"
-    required = REQUIRED_KEYS
-    
-    prompt = textwrap.dedent(f"""
-        You are an expert data extractor. 
-
-        Please extract and interpret the following key fields:
-
-        1. Lease Structure  
-        2. Lease Term (IMPORTANT: Extract the exact lease expiration date AND calculate remaining years)  
-        3. Absolute Rent  
-        4. Rent Growth  
-        5. Acreage  
-        6. Is Current Tenant a Restaurant, Auto, or Medical Facility? (Yes or No)  
-        7. Is The Building Currently a Single Tenant Building? (Yes or No)  
-        8. Does the operator have a Drive-Thru (QSR) or Carry-out (CDR) available?  
-        9. Box Size  
-        10. Address (Split into dictionary with the following keys: 'Line 1', 'City', 'State', 'Zip')  
-        11. Year Built  
-        12. Current Tenant (restaurant, auto shop, medical operator name)  
-        13. Number of National Locations  
-
-        Instructions:
-        - If a field is not found in the tables, set its value to null.  
-        - For Lease Term: You MUST extract the exact lease expiration date (e.g., "June 2029", "6/30/2029").
-        - For Lease Term: The value should be a dictionary with two keys:
-          * "expiration_date": The exact expiration date as found in the text
-          * "remaining_years": Calculate the years between today and the expiration date
-        - For field 4: List the percent growth. If it is only one bump over a multi year period, calculate the average annual bump (ex. 10% over five years = 2%)
-        - For field 4: If the rent growth is not listed, calculate the in-place percentage growth of the current rent rate. 
-        - For field 7: if the answer is No, also note whether the building is >50%, >33%, or <33% restaurant.  
-        - For field 8: if the tenant is a restaurant, determine if it qualifies as QSR or CDR. If not a restaurant, return "NA".  
-        - For field 12: prefer the franchise name over the operator's legal entity name.  
-        - For field 13: estimate the national presence and provide the number of U.S. locations of the specific type of restaurant, auto shop, or medical clinic.
-
-        Return only a JSON object that exactly matches the schema below. If a value is unknown, return null.
-
-        Schema (example format):
-
-        ```json
-        {{
-        "Lease Structure": "NNN",
-        "Lease Term": {{
-            "expiration_date": "June 2029",
-            "remaining_years": 5.4
-        }},
-        "Absolute Rent": 120000,
-        "Rent Growth": "3% annually",
-        "Acreage": 0.83,
-        "Restaurant/Auto/Medical?": "Yes",
-        "Single Tenant?": "Yes",
-        "Drive-Thru (QSR) / Carry-out (CDR)": "QSR",
-        "Box Size": "2,300 sqft",
-        "Address": {{
-            "Line 1": "123 Main St",
-            "City": "Cedar Rapids",
-            "State": "IA",
-            "Zip": "52404"
-        }},
-        "Year Built": 2015,
-        "Current Tenant": "Taco Bell",
-        "Number of National Locations": 7500
-        }} 
-        --DATA START--
-        {payload}
-        --DATA END--
-    """)
-
-    # Create the chat completion using the new client interface.
-    resp = client.chat.completions.create(
-        model=model,
-        messages=[{"role": "user", "content": prompt}],
-        response_format={"type":"json_object"},
-        temperature=0
+    fields = FIELD_ORDER if fields is None else [f for f in FIELD_ORDER if f in set(fields)]
+    questions = "\n".join(f"{i}. {FIELD_PROMPTS[f][0]}  " for i, f in enumerate(fields, start=1))
+    notes = "\n".join(f"- {note}" for f in fields for note in FIELD_PROMPTS[f][1])
+    schema = json.dumps({f: FIELD_PROMPTS[f][2] for f in fields}, indent=4)
+    schema = schema.replace("{", "{{").replace("}", "}}")
+    return (
+        "You are an expert data extractor.\n\n"
+        "Please extract and interpret the following key fields:\n\n"
+        f"{questions}\n\n"
+        "Instructions:\n"
+        "- If a field is not found in the tables, set its value to null.\n"
+        + (f"{notes}\n" if notes else "")
+        + "\nReturn only a JSON object that exactly matches the schema below. If a value is unknown, return null.\n\n"
+        "Schema (example format):\n\n"
+        f"```json\n{schema}\n```\n"
+        "--DATA START--\n{payload}\n--DATA END--\n"
     )
+
+# Bump PROMPT_VERSION whenever the prompt wording changes so cached responses are not reused.
+PROMPT_VERSION = "2"
+PROMPT_TEMPLATE = prompt_template()
+
+# Raw GPT responses keyed by (payload hash, prompt version, model, temperature)
+LLM_RESPONSE_CACHE = DiskCache(
+    CACHE_ROOT / "llm_responses",
+    max_bytes=int(os.getenv("LLM_CACHE_MAX_MB", "64")) * 1024 * 1024,
+    ttl_seconds=float(os.getenv("LLM_CACHE_TTL_HOURS", "720")) * 3600,
+)
+
+def llm_cache_key(payload: str, model: str, temperature: float, fields=None) -> str:
+    # The full schema keeps its original key so existing cache entries stay valid
+    subset = "" if fields is None else ",".join(f for f in FIELD_ORDER if f in set(fields))
+    return sha256_text(sha256_text(payload), PROMPT_VERSION, model, repr(temperature), subset)
+
+def postprocess_fields(data: dict) -> dict:
+    """
+    Scorecard field dict from raw extracted values (GPT's, the fast path's, or both merged).
+
+    Runs on cached responses too, so the lease term is always measured from today.
+    """
+    required = REQUIRED_KEYS
+    data = dict(data)
     try:
-        data = json.loads(resp.choices[0].message.content)
-        
         # Post-process the lease term if it exists
         if isinstance(data.get("Lease Term"), dict):
             expiration_date = data["Lease Term"].get("expiration_date")
@@ -217,12 +250,10 @@ def interpret_payload_with_gpt(payload: str, *, client: OpenAI):
                 # Calculate the remaining years using our helper function
                 remaining_years = calculate_remaining_term(expiration_date)
                 if remaining_years is not None:
-                    data["Lease Term"]["remaining_years"] = remaining_years
-                    # Also store the raw years for the scoring function
+                    # Store the raw years for the scoring function
                     data["Lease Term"] = str(remaining_years)
     except Exception as e:
-        print(f"Error processing GPT response: {e}")
-        data = {}
+        print(f"Error processing lease term: {e}")
 
     # guarantee all keys exist
     safe = {k: data.get(k) for k in required}
@@ -230,6 +261,329 @@ def interpret_payload_with_gpt(payload: str, *, client: OpenAI):
         safe["Address"] = {"Line 1":None,"City":None,"State":None,"Zip":None}
     return safe
 
+def parse_gpt_response(content: str) -> dict:
+    """
+    Turn the raw JSON text returned by GPT into the scorecard field dict.
+    """
+    try:
+        data = json.loads(content)
+    except Exception as e:
+        print(f"Error processing GPT response: {e}")
+        data = {}
+    return postprocess_fields(data if isinstance(data, dict) else {})
+
+# Completion tokens assumed for a request until its real usage is known
+COMPLETION_TOKEN_ESTIMATE = 400
+
+def _chat_request(payload: str, model: str, temperature: float, fields=None) -> dict:
+    template = PROMPT_TEMPLATE if fields is None else prompt_template(fields)
+    prompt = template.format(payload=payload)
+    return dict(
+        model=model,
+        messages=[{"role": "user", "content": prompt}],
+        response_format={"type":"json_object"},
+        temperature=temperature
+    )
+
+def _retry_after(err: RateLimitError) -> float:
+    """Seconds the API asked us to wait, defaulting to 1s when it did not say."""
+    try:
+        return float(err.response.headers.get("retry-after", 1))
+    except (AttributeError, TypeError, ValueError):
+        return 1.0
+
+def _usage_tokens(usage) -> Optional[int]:
+    return getattr(usage, "total_tokens", None)
+
+def _annotate_usage(usage, attempt: int, hedged: bool = False) -> None:
+    """Put the response's token usage on the current trace span."""
+    annotate(attempts=attempt + 1, hedged=hedged,
+             prompt_tokens=getattr(usage, "prompt_tokens", None),
+             completion_tokens=getattr(usage, "completion_tokens", None),
+             total_tokens=getattr(usage, "total_tokens", None))
+
+def _store_response(key: str, content: str) -> None:
+    # Only keep responses we can actually parse
+    try:
+        json.loads(content)
+    except (TypeError, ValueError):
+        return
+    LLM_RESPONSE_CACHE.set(key, content)
+
+def _attempt_timeout(deadline: float) -> float:
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise TimeoutError(f"GPT call gave up after its {LLM_DEADLINE_SECONDS:g}s deadline")
+    return min(LLM_TIMEOUT_SECONDS, remaining)
+
+# Extra create() arguments for a streamed answer; the last chunk carries the token usage
+STREAM_OPTIONS = {"stream": True, "stream_options": {"include_usage": True}}
+
+def _stream_chunk(chunk, parser: JSONObjectStream, on_field, deadline: float):
+    """Feed one streamed chunk to ``parser``, reporting the fields it completes; returns its usage (if any)."""
+    if time.monotonic() > deadline:
+        raise TimeoutError(f"GPT call gave up after its {LLM_DEADLINE_SECONDS:g}s deadline")
+    if chunk.choices and chunk.choices[0].delta.content:
+        for name, value in parser.feed(chunk.choices[0].delta.content):
+            on_field(name, value)
+    return getattr(chunk, "usage", None)
+
+def _attempt(client: OpenAI, request: dict, estimated: int, deadline: float, on_field=None):
+    """
+    One chat completion through the shared rate limiter, timed into the latency stats.
+
+    Returns (content, usage). With ``on_field`` the answer is streamed and
+    ``on_field(name, value)`` is called as each field's value completes.
+    """
+    limiter = get_rate_limiter()
+    limiter.acquire(estimated)
+    started = time.perf_counter()
+    sent = False
+    try:
+        timeout = _attempt_timeout(deadline)
+        sent = True
+        if on_field is None:
+            resp = client.chat.completions.create(**request, timeout=timeout)
+            content, usage = resp.choices[0].message.content, resp.usage
+        else:
+            stream = client.chat.completions.create(**request, **STREAM_OPTIONS, timeout=timeout)
+            parser, usage = JSONObjectStream(), None
+            try:
+                for chunk in stream:
+                    usage = _stream_chunk(chunk, parser, on_field, deadline) or usage
+            finally:
+                stream.close()
+            content = parser.text
+        check_content(content)
+    except BaseException as e:
+        # Timeouts and cut-off streams keep their estimate: the API has already counted those tokens
+        if not sent or never_reached_model(e):
+            limiter.settle(estimated, 0)
+        get_latency_stats().record(time.perf_counter() - started, type(e).__name__)
+        if is_rate_limited(e):
+            limiter.pause(_retry_after(e))
+        raise
+    limiter.settle(estimated, _usage_tokens(usage))
+    get_latency_stats().record(time.perf_counter() - started)
+    return content, usage
+
+async def _attempt_async(client: AsyncOpenAI, request: dict, estimated: int, deadline: float, on_field=None):
+    """Async counterpart of ``_attempt``."""
+    limiter = get_rate_limiter()
+    await limiter.acquire_async(estimated)
+    started = time.perf_counter()
+    sent = False
+    try:
+        timeout = _attempt_timeout(deadline)
+        sent = True
+        if on_field is None:
+            resp = await client.chat.completions.create(**request, timeout=timeout)
+            content, usage = resp.choices[0].message.content, resp.usage
+        else:
+            stream = await client.chat.completions.create(**request, **STREAM_OPTIONS, timeout=timeout)
+            parser, usage = JSONObjectStream(), None
+            try:
+                async for chunk in stream:
+                    usage = _stream_chunk(chunk, parser, on_field, deadline) or usage
+            finally:
+                await stream.close()
+            content = parser.text
+        check_content(content)
+    except BaseException as e:
+        # Timeouts and cut-off streams keep their estimate: the API has already counted those tokens
+        if not sent or never_reached_model(e):
+            limiter.settle(estimated, 0)
+        get_latency_stats().record(time.perf_counter() - started, type(e).__name__)
+        if is_rate_limited(e):
+            limiter.pause(_retry_after(e))
+        raise
+    limiter.settle(estimated, _usage_tokens(usage))
+    get_latency_stats().record(time.perf_counter() - started)
+    return content, usage
+
+def _retry_delay(err: Exception, attempt: int, deadline: float) -> float:
+    """Backoff before the next attempt, or re-raise ``err`` if it should not be retried."""
+    if not is_retryable(err) or attempt == LLM_MAX_RETRIES:
+        raise err
+    delay = backoff_seconds(attempt)
+    if time.monotonic() + delay >= deadline:
+        raise err
+    print(f"GPT attempt {attempt + 1} failed ({type(err).__name__}: {err}); retrying in {delay:.1f}s")
+    return delay
+
+def _complete(client: OpenAI, request: dict, on_field=None) -> str:
+    """
+    Chat completion with the deadline, retry and hedging policy of llm_policy.py.
+
+    Goes through the shared rate limiter; only a JSON-object answer counts as success.
+    With ``on_field`` the answer is streamed (see ``_attempt``). Streams are not
+    hedged, and a retried stream reports its fields again.
+    """
+    estimated = estimate_tokens(request["messages"][0]["content"]) + COMPLETION_TOKEN_ESTIMATE
+    deadline = time.monotonic() + LLM_DEADLINE_SECONDS
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        try:
+            if LLM_HEDGE and on_field is None:
+                (content, usage), hedged = run_hedged(lambda: _attempt(client, request, estimated, deadline),
+                                                      get_latency_stats().hedge_delay())
+            else:
+                (content, usage), hedged = _attempt(client, request, estimated, deadline, on_field), False
+        except Exception as e:
+            time.sleep(_retry_delay(e, attempt, deadline))
+            continue
+        _annotate_usage(usage, attempt, hedged)
+        return content
+
+async def _complete_async(client: AsyncOpenAI, request: dict, on_field=None) -> str:
+    """Async counterpart of ``_complete``."""
+    estimated = estimate_tokens(request["messages"][0]["content"]) + COMPLETION_TOKEN_ESTIMATE
+    deadline = time.monotonic() + LLM_DEADLINE_SECONDS
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        try:
+            if LLM_HEDGE and on_field is None:
+                (content, usage), hedged = await run_hedged_async(
+                    lambda: _attempt_async(client, request, estimated, deadline),
+                    get_latency_stats().hedge_delay())
+            else:
+                (content, usage), hedged = await _attempt_async(client, request, estimated, deadline,
+                                                                on_field), False
+        except Exception as e:
+            await asyncio.sleep(_retry_delay(e, attempt, deadline))
+            continue
+        _annotate_usage(usage, attempt, hedged)
+        return content
+
+def _field_reporter(on_field, fields=None):
+    """Wrap ``on_field`` so it only gets the requested fields, post-processed."""
+    wanted = REQUIRED_KEYS if fields is None else set(fields)
+    def report(name: str, value) -> None:
+        if name in wanted:
+            on_field(name, postprocess_fields({name: value})[name])
+    return report
+
+def _report_cached(content: str, on_field) -> None:
+    """Report every field of a complete (cached) answer at once."""
+    try:
+        data = json.loads(content)
+    except ValueError:
+        return
+    for name, value in (data.items() if isinstance(data, dict) else ()):
+        on_field(name, value)
+
+def interpret_payload_with_gpt(payload: str, *, client: OpenAI, model: str = "gpt-4o",
+                               temperature: float = 0, use_cache: bool = True, fields=None,
+                               on_field=None):
+    """
+    Uses the new OpenAI client interface to extract key fields from the provided payload.
+
+    Requests go through the process-wide rate limiter (see rate_limit.py).
+    
+    Args:
+        payload (str): Text extracted from the OM or e-mail.
+        client (OpenAI): Client used for the chat completion.
+        model (str): The model to use (default "gpt-4o").
+        temperature (float): Sampling temperature (default 0).
+        use_cache (bool): Replay a stored response for an identical request instead
+                          of calling the API. False bypasses the cache entirely.
+        fields (list): Only ask GPT for these fields (default: all of them).
+        on_field (callable): Stream the answer and call ``on_field(name, value)``
+                             with each (post-processed) field as soon as its value
+                             is complete. Cached answers report every field at once.
+    
+    Returns:
+        dict: A dictionary mapping the following keys to their extracted values.
+              If a field is not found, its value will be null.
+    """
+    key = llm_cache_key(payload, model, temperature, fields)
+    with span("llm_call", model=model) as attrs:
+        content = LLM_RESPONSE_CACHE.get(key) if use_cache else None
+        attrs["cached"] = content is not None
+
+        report = None if on_field is None else _field_reporter(on_field, fields)
+        attrs["streamed"] = report is not None and content is None
+        if content is None:
+            content = _complete(client, _chat_request(payload, model, temperature, fields), report)
+            if use_cache:
+                _store_response(key, content)
+        elif report is not None:
+            _report_cached(content, report)
+
+    with span("post_processing"):
+        return parse_gpt_response(content)
+
+async def interpret_payload_with_gpt_async(payload: str, *, client: AsyncOpenAI, model: str = "gpt-4o",
+                                           temperature: float = 0, use_cache: bool = True,
+                                           fields=None, on_field=None):
+    """
+    Async variant of ``interpret_payload_with_gpt`` built on ``AsyncOpenAI``.
+
+    Shares the response cache and the process-wide rate limiter with the sync path.
+    Point the client's ``base_url`` (or OPENAI_BASE_URL) at a local fake server to test it.
+    """
+    key = llm_cache_key(payload, model, temperature, fields)
+    with span("llm_call", model=model) as attrs:
+        content = LLM_RESPONSE_CACHE.get(key) if use_cache else None
+        attrs["cached"] = content is not None
+
+        report = None if on_field is None else _field_reporter(on_field, fields)
+        attrs["streamed"] = report is not None and content is None
+        if content is None:
+            content = await _complete_async(client, _chat_request(payload, model, temperature, fields), report)
+            if use_cache:
+                _store_response(key, content)
+        elif report is not None:
+            _report_cached(content, report)
+
+    with span("post_processing"):
+        return parse_gpt_response(content)
+
+def _fast_path(payload: str, min_confidence: Optional[float]) -> tuple[dict, list[str]]:
+    """(fields the rules resolved, post-processed; fields still needing GPT)."""
+    with span("fast_path") as attrs:
+        resolved, _ = resolve_fields(payload, min_confidence)
+        missing = [f for f in FIELD_ORDER if f not in resolved]
+        attrs.update(resolved=len(resolved), llm_skipped=not missing)
+        fast = postprocess_fields(resolved)
+    return {f: fast[f] for f in resolved}, missing
+
+def extract_fields(payload: str, *, client: OpenAI, model: str = "gpt-4o", temperature: float = 0,
+                   use_cache: bool = True, min_confidence: Optional[float] = None, on_field=None) -> dict:
+    """
+    Scorecard fields for ``payload``: rule-based first (fast_extract.py), GPT for the rest.
+
+    GPT only sees the fields the rules could not settle with at least
+    ``min_confidence`` (default FAST_PATH_MIN_CONFIDENCE) and is not called
+    at all when every field resolves. ``on_field(name, value)`` is called with
+    each field as it becomes known: the rule-based ones right away, GPT's
+    while its answer streams in.
+    """
+    resolved, missing = _fast_path(payload, min_confidence)
+    if on_field is not None:
+        for name, value in resolved.items():
+            on_field(name, value)
+    if not missing:
+        return postprocess_fields(resolved)
+    result = interpret_payload_with_gpt(payload, client=client, model=model, temperature=temperature,
+                                        use_cache=use_cache, fields=missing, on_field=on_field)
+    result.update(resolved)
+    return result
+
+async def extract_fields_async(payload: str, *, client: AsyncOpenAI, model: str = "gpt-4o",
+                               temperature: float = 0, use_cache: bool = True,
+                               min_confidence: Optional[float] = None, on_field=None) -> dict:
+    """Async variant of ``extract_fields``."""
+    resolved, missing = _fast_path(payload, min_confidence)
+    if on_field is not None:
+        for name, value in resolved.items():
+            on_field(name, value)
+    if not missing:
+        return postprocess_fields(resolved)
+    result = await interpret_payload_with_gpt_async(payload, client=client, model=model,
+                                                    temperature=temperature, use_cache=use_cache,
+                                                    fields=missing, on_field=on_field)
+    result.update(resolved)
+    return result
+
 def normalize_fields(fields):
     # Ensure every field exists, and numeric-looking strings
     # get turned into strings, so your downstream code can
@@ -281,6 +635,21 @@ def parse_numeric_value(value):
         return float(num_str) if '.' in num_str else int(num_str)
     return 0
 
+def score_band(field: str, value, **context) -> tuple:
+    """
+    (score, comment) for a banded field of score_rules.SCORE_TABLES, from one
+    parse of the raw value and one table lookup.
+    """
+    return SCORE_TABLES[field].lookup(parse_numeric_value(value), **context)
+
+def rent_building_type(drive_val) -> str:
+    """Building type whose rent ladder applies: "CDR" for carry-out, else "QSR"."""
+    return "CDR" if isinstance(drive_val, str) and "cdr" in drive_val.lower() else "QSR"
+
+def rent_band(rent, building_type: str) -> tuple:
+    """(score, comment) for Absolute Rent on the ladder for ``building_type``."""
+    return RENT_TABLES.get(building_type, UNKNOWN_RENT).lookup(parse_numeric_value(rent))
+
 def map_address(addr_dict: dict, tenant: str) -> str:
     """
     Returns the string for cell C3:
@@ -325,28 +694,8 @@ def map_portfolio_target():
     return 1
 
 def map_acreage(acreage_str):
-    """
-    Maps Acreage to the appropriate score based on bounds:
-      >2.25   => 7
-      1.75 - 2.25 => 6
-      1.25 - 1.75 => 5
-      0.75 - 1.25 => 4
-      0.5  - 0.75 => 2
-      <0.5   => 0
-    """
-    acreage = parse_numeric_value(acreage_str)
-    if acreage > 2.25:
-        return 7
-    elif 1.75 <= acreage <= 2.25:
-        return 6
-    elif 1.25 <= acreage < 1.75:
-        return 5
-    elif 0.75 <= acreage < 1.25:
-        return 4
-    elif 0.5 <= acreage < 0.75:
-        return 2
-    else:
-        return 0
+    """Maps Acreage to its score (bands in score_rules.SCORE_BANDS["Acreage"])."""
+    return score_band("Acreage", acreage_str)[0]
 
 def map_drive_thru_carryout(val):
     """
@@ -365,11 +714,7 @@ def map_box_size(box_size_str):
       0 if box size is less than 2000 sqft or greater than 9000 sqft,
       otherwise, return 2.
     """
-    sqft = parse_numeric_value(box_size_str)
-    if sqft < 2000 or sqft > 9000:
-        return 0
-    else:
-        return 2
+    return score_band("Box Size", box_size_str)[0]
 
 def map_national_locations(extracted_fields):
     """
@@ -386,16 +731,8 @@ def map_national_locations(extracted_fields):
 
     locations = parse_numeric_value(loc_str)
     print(f"Gathered number of locations: {locations}")
+    return SCORE_TABLES["Number of National Locations"].lookup(locations, tenant="")[0]
 
-    if locations > 600:
-        return 2.5
-    elif 300 < locations <= 600:
-        return 1.5
-    elif 100 < locations <= 300:
-        return 1
-    else:
-        return 0
-        
 def map_lease_structure(val):
     """   
     Maps Lease Structure using the table:
@@ -418,88 +755,22 @@ def map_lease_structure(val):
     return 0
 
 def map_lease_term(term_str):
-    """
-    Maps Lease Term in years to a score:
-      >15 years => 5
-      10-15     => 4
-      7.5-10    => 3
-      5-7.5     => 2
-      3-5       => 1
-      <3        => 0
-    """
-    years = parse_numeric_value(term_str)
-    if years > 15:
-        return 5
-    elif 10 <= years <= 15:
-        return 4
-    elif 7.5 <= years < 10:
-        return 3
-    elif 5 <= years < 7.5:
-        return 2
-    elif 3 <= years < 5:
-        return 1
-    else:
-        return 0
+    """Maps Lease Term in years to its score (bands in score_rules.SCORE_BANDS["Lease Term"])."""
+    return score_band("Lease Term", term_str)[0]
 
 def map_absolute_rent(rent_str, building_type):
     """
-    Maps Absolute Rent based on the building type.
-    For instance, if building_type == "CDR" (carry-out), use:
-      - < $170k -> 8
-      - $170k to $210k -> 7
-      - $210k to $250k -> 6
-      - $250k to $285k -> 5
-      - $285k to $330k -> 3
-      - > $330k -> 0
-    (You can add other tables for QSR, FCR, etc.)
-    """
-    rent = parse_numeric_value(rent_str)
-    if building_type == "CDR":
-        if rent < 170000:
-            return 8
-        elif 170000 <= rent < 210000:
-            return 7
-        elif 210000 <= rent < 250000:
-            return 6
-        elif 250000 <= rent < 285000:
-            return 5
-        elif 285000 <= rent < 330000:
-            return 3
-        else:
-            return 0
-
-    if building_type == "QSR":
-        if rent < 90000:
-            return 8
-        elif 90000 <= rent < 110000:
-            return 7
-        elif 110000 <= rent < 135000:
-            return 6
-        elif 135000 <= rent < 150000:
-            return 5
-        elif 150000 <= rent < 170000:
-            return 3
-        else:
-            return 0
-    # Default if building_type not recognized:
-    return 0
+    Maps Absolute Rent based on the building type, using that type's ladder in
+    score_rules.RENT_BANDS. Unrecognised building types score 0.
+    """
+    return rent_band(rent_str, building_type)[0]
 
 def map_rent_growth(rent_growth_str):
     """
-    Parse the rent growth percentage value.
-    For example, "1.5% Annually" -> 1.5.
-    You might later choose to map this into a score if desired.
+    Parse the rent growth percentage value (e.g. "1.5% Annually" -> 1.5) and
+    map it to its score (bands in score_rules.SCORE_BANDS["Rent Growth"]).
     """
-    rent_growth = parse_numeric_value(rent_growth_str)
-
-    if rent_growth < 0.5 or rent_growth > 2.25:
-        return 0
-    elif 0.5 <= rent_growth < 1.25:
-        return 1
-    elif 1.25 <= rent_growth <= 2.25:
-        return 1.5
-    else:
-        return 0 
+    return score_band("Rent Growth", rent_growth_str)[0]
 
 def map_restaurant_auto_medical_comment(tenant: str, is_ram: str) -> str:
     """Maps the comment for Restaurant/Auto/Medical field"""
@@ -526,19 +797,7 @@ def map_portfolio_target_geography_comment(address: dict) -> str:
 
 def map_acreage_comment(acreage: str) -> str:
     """Maps the comment for Acreage"""
-    acres = parse_numeric_value(acreage)
-    if acres > 2.25:
-        return f"Large parcel size of {acres} acres"
-    elif 1.75 <= acres <= 2.25:
-        return f"Good parcel size of {acres} acres"
-    elif 1.25 <= acres < 1.75:
-        return f"Adequate parcel size of {acres} acres"
-    elif 0.75 <= acres < 1.25:
-        return f"Moderate parcel size of {acres} acres"
-    elif 0.5 <= acres < 0.75:
-        return f"Small parcel size of {acres} acres"
-    else:
-        return f"Very small parcel size of {acres} acres"
+    return score_band("Acreage", acreage)[1]
 
 def map_drive_thru_comment(val: str, tenant: str) -> str:
     """Maps the comment for Drive-Thru/Carry-out"""
@@ -553,25 +812,11 @@ def map_drive_thru_comment(val: str, tenant: str) -> str:
 
 def map_box_size_comment(size: str) -> str:
     """Maps the comment for Box Size"""
-    sqft = parse_numeric_value(size)
-    if 2000 <= sqft <= 9000:
-        return f"Optimal box size of {sqft:,.0f} square feet"
-    elif sqft < 2000:
-        return f"Box size of {sqft:,.0f} square feet is below optimal range"
-    else:
-        return f"Box size of {sqft:,.0f} square feet is above optimal range"
+    return score_band("Box Size", size)[1]
 
 def map_national_locations_comment(locations: str, tenant: str) -> str:
     """Maps the comment for Number of National Locations"""
-    loc_num = parse_numeric_value(locations)
-    if loc_num > 600:
-        return f"{tenant} has strong national presence with {loc_num:,.0f} locations"
-    elif 300 < loc_num <= 600:
-        return f"{tenant} has moderate national presence with {loc_num:,.0f} locations"
-    elif 100 < loc_num <= 300:
-        return f"{tenant} has limited national presence with {loc_num:,.0f} locations"
-    else:
-        return f"{tenant} has minimal national presence with {loc_num:,.0f} locations"
+    return score_band("Number of National Locations", locations, tenant=tenant)[1]
 
 def map_lease_structure_comment(structure: str) -> str:
     """Maps the comment for Lease Structure"""
@@ -590,161 +835,160 @@ def map_lease_structure_comment(structure: str) -> str:
 
 def map_lease_term_comment(term: str) -> str:
     """Maps the comment for Lease Term"""
-    years = parse_numeric_value(term)
-    if years > 15:
-        return f"Very long remaining lease term of {years:,.1f} years"
-    elif 10 <= years <= 15:
-        return f"Long remaining lease term of {years:,.1f} years"
-    elif 7.5 <= years < 10:
-        return f"Moderate remaining lease term of {years:,.1f} years"
-    elif 5 <= years < 7.5:
-        return f"Short remaining lease term of {years:,.1f} years"
-    elif 3 <= years < 5:
-        return f"Very short remaining lease term of {years:,.1f} years"
-    else:
-        return f"Extremely short remaining lease term of {years:,.1f} years"
+    return score_band("Lease Term", term)[1]
 
 def map_absolute_rent_comment(rent: str, building_type: str) -> str:
     """Maps the comment for Absolute Rent"""
-    rent_val = parse_numeric_value(rent)
-    if building_type == "CDR":
-        if rent_val < 170000:
-            return f"Very attractive rent of ${rent_val:,.0f} for CDR"
-        elif 170000 <= rent_val < 210000:
-            return f"Attractive rent of ${rent_val:,.0f} for CDR"
-        elif 210000 <= rent_val < 250000:
-            return f"Moderate rent of ${rent_val:,.0f} for CDR"
-        elif 250000 <= rent_val < 285000:
-            return f"High rent of ${rent_val:,.0f} for CDR"
-        elif 285000 <= rent_val < 330000:
-            return f"Very high rent of ${rent_val:,.0f} for CDR"
-        else:
-            return f"Extremely high rent of ${rent_val:,.0f} for CDR"
-    elif building_type == "QSR":
-        if rent_val < 90000:
-            return f"Very attractive rent of ${rent_val:,.0f} for QSR"
-        elif 90000 <= rent_val < 110000:
-            return f"Attractive rent of ${rent_val:,.0f} for QSR"
-        elif 110000 <= rent_val < 135000:
-            return f"Moderate rent of ${rent_val:,.0f} for QSR"
-        elif 135000 <= rent_val < 150000:
-            return f"High rent of ${rent_val:,.0f} for QSR"
-        elif 150000 <= rent_val < 170000:
-            return f"Very high rent of ${rent_val:,.0f} for QSR"
-        else:
-            return f"Extremely high rent of ${rent_val:,.0f} for QSR"
-    return f"Rent: ${rent_val:,.0f}"
+    return rent_band(rent, building_type)[1]
 
 def map_rent_growth_comment(growth: str) -> str:
     """Maps the comment for Rent Growth"""
-    growth_val = parse_numeric_value(growth)
-    if growth_val < 0.5:
-        return f"Minimal annual rent growth of {growth_val:.1f}%"
-    elif 0.5 <= growth_val < 1.25:
-        return f"Moderate annual rent growth of {growth_val:.1f}%"
-    elif 1.25 <= growth_val <= 2.25:
-        return f"Strong annual rent growth of {growth_val:.1f}%"
-    else:
-        return f"Very high annual rent growth of {growth_val:.1f}%"
+    return score_band("Rent Growth", growth)[1]
 
 ###############################################
-# Main Function to Write to the Template      #
+# Scorecard Layout                            #
 ###############################################
 
-def write_to_template(extracted_fields, template_path, output_path):
+# Cell C3 holds the scorecard title (see map_address)
+TITLE_CELL = "C3"
+
+# Each scored line item: (score cell, merged comment range). Comments are
+# written to the top-left cell of their merged range.
+SCORECARD_LAYOUT = {
+    "Restaurant/Auto/Medical?":           ("L8",  "N7:N8"),
+    "Single Tenant?":                     ("L10", "N9:N10"),
+    "Portfolio Target Brand":             ("L12", "N11:N12"),
+    "Portfolio Target Geography":         ("L14", "N13:N14"),
+    "Acreage":                            ("L30", "N29:N30"),
+    "Drive-Thru (QSR) / Carry-out (CDR)": ("L36", "N35:N36"),
+    "Box Size":                           ("L38", "N37:N38"),
+    "Number of National Locations":       ("L62", "N60:N62"),
+    "Lease Structure":                    ("L72", "N71:N72"),
+    "Lease Term":                         ("L74", "N73:N74"),
+    "Absolute Rent":                      ("L78", "N75:N78"),
+    "Rent Growth":                        ("L81", "N79:N81"),
+}
+
+def score_deal(extracted_fields: dict) -> dict[str, tuple]:
     """
-    Writes the extracted fields into a preloaded spreadsheet template.
-    
+    Score every line item of the scorecard.
+
     Args:
         extracted_fields (dict): Dictionary from your extraction output.
-        template_path (str): Path to the Excel template.
-        output_path (str): Path where the filled-out spreadsheet will be saved.
-    
+
     Returns:
-        output_path (str): Path to the saved Excel file.
+        dict: {line item: (score, comment)} for every key of SCORECARD_LAYOUT.
     """
-    wb = load_workbook(template_path)
-    ws = wb.active
-
-    def write_comment(cell_range: str, comment: str):
-        """Helper function to write to merged cells"""
-        # Get the first cell of the merged range (top-left)
-        first_cell = cell_range.split(':')[0]
-        ws[first_cell] = comment
-
     # Get common values used in multiple places
     address_raw = extracted_fields.get("Address", {})
     current_tenant = extracted_fields.get("Current Tenant", "")
     restaurant_flag = extracted_fields.get("Restaurant/Auto/Medical?", "")
-
-    # Address: cell C3
-    formatted_address = map_address(address_raw, current_tenant)
-    ws["C3"] = formatted_address
-
-    # Restaurant/Auto/Medical?: cell L8 + comment in N7:N8
-    ws["L8"] = map_restaurant_auto_medical(restaurant_flag)
-    write_comment("N7:N8", map_restaurant_auto_medical_comment(current_tenant, restaurant_flag))
-
-    # Single Tenant?: cell L10 + comment in N9:N10
     single_tenant_raw = extracted_fields.get("Single Tenant?", "")
-    ws["L10"] = map_single_tenant(single_tenant_raw)
-    write_comment("N9:N10", map_single_tenant_comment(single_tenant_raw))
-
-    # Portfolio Management Target Brand: cell L12 + comment in N11:N12
-    ws["L12"] = map_portfolio_target()
-    write_comment("N11:N12", map_portfolio_target_brand_comment(current_tenant))
-
-    # Portfolio Management Target Geography: cell L14 + comment in N13:N14
-    ws["L14"] = map_portfolio_target()
-    write_comment("N13:N14", map_portfolio_target_geography_comment(address_raw))
-
-    # Acreage: cell L30 + comment in N29:N30
     acreage_raw = extracted_fields.get("Acreage", "")
-    ws["L30"] = map_acreage(acreage_raw)
-    write_comment("N29:N30", map_acreage_comment(acreage_raw))
-
-    # Drive-Thru (QSR) / Carry-out (CDR): cell L36 + comment in N35:N36
     drive_val = extracted_fields.get("Drive-Thru (QSR) / Carry-out (CDR)", "") or ""
-    ws["L36"] = map_drive_thru_carryout(drive_val)
-    write_comment("N35:N36", map_drive_thru_comment(drive_val, current_tenant))
-
-    # Box Size: cell L38 + comment in N37:N38
     box_size_raw = extracted_fields.get("Box Size", "")
-    ws["L38"] = map_box_size(box_size_raw)
-    write_comment("N37:N38", map_box_size_comment(box_size_raw))
-
-    # Number of National Locations: cell L62 + comment in N61:N62
-    concept_value = map_national_locations(extracted_fields)
-    ws["L62"] = concept_value
-    write_comment("N60:N62", map_national_locations_comment(
-        extracted_fields.get("Number of National Locations", ""),
-        current_tenant
-    ))
-
-    # Lease Structure: cell L72 + comment in N71:N72
+    locations_raw = extracted_fields.get("Number of National Locations", "")
     lease_structure_raw = extracted_fields.get("Lease Structure", "")
-    ws["L72"] = map_lease_structure(lease_structure_raw)
-    write_comment("N71:N72", map_lease_structure_comment(lease_structure_raw))
-
-    # Lease Term: cell L74 + comment in N73:N74
     lease_term_raw = extracted_fields.get("Lease Term", "")
-    ws["L74"] = map_lease_term(lease_term_raw)
-    write_comment("N73:N74", map_lease_term_comment(lease_term_raw))
-
-    # Absolute Rent: cell L78 + comment in N77:N78
     absolute_rent_raw = extracted_fields.get("Absolute Rent", "")
-    drive_val_lower = drive_val.lower() if isinstance(drive_val, str) else ""
-    building_type = "CDR" if "cdr" in drive_val_lower else "QSR"
-    ws["L78"] = map_absolute_rent(absolute_rent_raw, building_type)
-    write_comment("N75:N78", map_absolute_rent_comment(absolute_rent_raw, building_type))
-
-    # Rent Growth: cell L81 + comment in N80:N81
     rent_growth_raw = extracted_fields.get("Rent Growth", "")
-    ws["L81"] = map_rent_growth(rent_growth_raw)
-    write_comment("N79:N81", map_rent_growth_comment(rent_growth_raw))
 
-    wb.save(output_path)
-    return output_path
+    building_type = rent_building_type(drive_val)
+
+    return {
+        "Restaurant/Auto/Medical?": (
+            map_restaurant_auto_medical(restaurant_flag),
+            map_restaurant_auto_medical_comment(current_tenant, restaurant_flag)),
+        "Single Tenant?": (
+            map_single_tenant(single_tenant_raw),
+            map_single_tenant_comment(single_tenant_raw)),
+        "Portfolio Target Brand": (
+            map_portfolio_target(),
+            map_portfolio_target_brand_comment(current_tenant)),
+        "Portfolio Target Geography": (
+            map_portfolio_target(),
+            map_portfolio_target_geography_comment(address_raw)),
+        "Acreage": score_band("Acreage", acreage_raw),
+        "Drive-Thru (QSR) / Carry-out (CDR)": (
+            map_drive_thru_carryout(drive_val),
+            map_drive_thru_comment(drive_val, current_tenant)),
+        "Box Size": score_band("Box Size", box_size_raw),
+        "Number of National Locations": score_band(
+            "Number of National Locations", locations_raw, tenant=current_tenant),
+        "Lease Structure": (
+            map_lease_structure(lease_structure_raw),
+            map_lease_structure_comment(lease_structure_raw)),
+        "Lease Term": score_band("Lease Term", lease_term_raw),
+        "Absolute Rent": rent_band(absolute_rent_raw, building_type),
+        "Rent Growth": score_band("Rent Growth", rent_growth_raw),
+    }
+
+# Every cell the scorecard writes, in a fixed order (used to compile templates)
+SCORECARD_CELLS = (TITLE_CELL,) + tuple(
+    cell for score_cell, comment_range in SCORECARD_LAYOUT.values()
+    for cell in (score_cell, comment_range.split(':')[0])
+)
+
+def scorecard_cells(extracted_fields: dict) -> dict[str, object]:
+    """Every cell value the scorecard needs, keyed by cell address (e.g. {"L8": 2, "N7": "..."})."""
+    cells = {TITLE_CELL: map_address(extracted_fields.get("Address", {}),
+                                     extracted_fields.get("Current Tenant", ""))}
+    for item, (score, comment) in score_deal(extracted_fields).items():
+        score_cell, comment_range = SCORECARD_LAYOUT[item]
+        cells[score_cell] = score
+        cells[comment_range.split(':')[0]] = comment
+    return cells
+
+###############################################
+# Main Function to Write to the Template      #
+###############################################
+
+def write_to_template(extracted_fields, template_path, output_path, *, compiled: bool = False):
+    """
+    Writes the extracted fields into a preloaded spreadsheet template.
+    
+    Args:
+        extracted_fields (dict): Dictionary from your extraction output.
+        template_path (str): Path to the Excel template (or its bytes / an in-memory file).
+        output_path (str): Path (or writable binary file) where the filled-out spreadsheet will be saved.
+        compiled (bool): Patch the scorecard sheet XML of a pre-compiled template
+                         (see template_writer.py) instead of loading the workbook
+                         with openpyxl. Much faster; every other part of the file
+                         is copied unchanged.
+    
+    Returns:
+        output_path (str): Path to the saved Excel file.
+    """
+    with span("scoring"):
+        cells = scorecard_cells(extracted_fields)
+
+    if isinstance(template_path, bytes):
+        template_path = io.BytesIO(template_path)
+
+    with span("workbook_save", compiled=compiled) as attrs:
+        if compiled:
+            if isinstance(template_path, io.BytesIO):
+                template_bytes = template_path.getvalue()
+            elif hasattr(template_path, "read"):
+                template_bytes = template_path.read()
+            else:
+                template_bytes = Path(template_path).read_bytes()
+            try:
+                get_compiled_template(template_bytes, SCORECARD_CELLS).save(cells, output_path)
+                return output_path
+            except TemplateCompileError as e:
+                print(f"Template can't be compiled ({e}); falling back to openpyxl")
+                attrs["compiled"] = False
+                template_path = io.BytesIO(template_bytes)
+
+        from openpyxl import load_workbook
+        wb = load_workbook(template_path)
+        ws = wb.active
+        for address, value in cells.items():
+            ws[address] = value
+
+        wb.save(output_path)
+        return output_path
 
 def sanitize_filename(name: str) -> str:
     """
@@ -779,7 +1023,10 @@ def sanitize_filename(name: str) -> str:
 
 def get_template_from_s3(bucket_name: str, template_key: str) -> io.BytesIO:
     """
-    Downloads the template file from S3 into memory.
+    Returns the template file from S3 as an in-memory file.
+
+    Served from the process-wide template cache (see template_cache.py), which
+    only goes back to S3 to revalidate by ETag every TEMPLATE_REVALIDATE_SECONDS.
     
     Args:
         bucket_name: Name of the S3 bucket
@@ -788,108 +1035,235 @@ def get_template_from_s3(bucket_name: str, template_key: str) -> io.BytesIO:
     Returns:
         BytesIO object containing the template file
     """
+    from botocore.exceptions import ClientError
     try:
-        s3 = boto3.client(
-            's3',
-            aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
-            aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY')
-        )
-        
-        # Download template to memory
-        template_obj = io.BytesIO()
-        s3.download_fileobj(bucket_name, template_key, template_obj)
-        template_obj.seek(0)  # Reset file pointer to beginning
-        return template_obj
+        return io.BytesIO(get_template_bytes(bucket_name, template_key))
     except ClientError as e:
         print(f"Error downloading template: {e}")
         raise
 
-def build_scorecard(
-    source: str | Path,
-    template_path: str | Path = None,  # Made optional
+DEFAULT_TABLE_SETTINGS = [
+    {"vertical_strategy": "lines", "horizontal_strategy": "lines",
+     "intersection_x_tolerance": 10, "intersection_y_tolerance": 10},
+    {"vertical_strategy": "lines", "horizontal_strategy": "lines",
+     "intersection_x_tolerance": 25, "intersection_y_tolerance": 25},
+    {"vertical_strategy": "text",  "horizontal_strategy": "text",
+     "intersection_x_tolerance": 15, "intersection_y_tolerance": 15},
+]
+
+def load_payload(
+    source: str | Path | bytes | io.BytesIO,
     *,
     settings_list: list[dict] | None = None,
     keywords: list[str] | None = None,
-    out_dir: str | Path = "/tmp",
-    client: Optional[OpenAI] = None,
-) -> tuple[dict, str]:
+    use_cache: bool = True,
+    pdf_workers: Optional[int] = None,
+    full_scan: bool = False,
+    token_budget: Optional[int] = None,
+    with_pages: bool = False,
+) -> tuple:
     """
-    Parse an OM PDF or plain text, extract the fields via GPT, and write a filled‑out Excel scorecard.
-    
-    Now supports loading template from S3.
-    """
-    from datetime import datetime
-    from pathlib import Path
-    import os
-    from openai import OpenAI
-
-    out_dir = Path(out_dir)
+    Turn an e-mail body, PDF path, text-file path or in-memory PDF into the text payload sent to GPT.
 
-    if client is None:
-        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-    # Load template from S3 if path not provided
-    if template_path is None:
-        bucket = os.getenv('S3_BUCKET_NAME')
-        key = os.getenv('TEMPLATE_S3_KEY', 'templates/Scorecard - Blank v1 streamlit.xlsx')
-        template_obj = get_template_from_s3(bucket, key)
-        wb = load_workbook(template_obj)
-    else:
-        wb = load_workbook(template_path)
+    pdf_workers sets how many processes extract page text of long PDFs
+    (default: extractor.PDF_WORKERS). PDFs are only read until every field has
+    some evidence unless full_scan is set (see extractor.get_best_payload).
+    The payload is capped at token_budget estimated tokens (default
+    payload_ranker.PAYLOAD_TOKEN_BUDGET) by keeping the chunks that rank best
+    for the scorecard fields.
 
-    # --- defaults --------------------------------------------------
-    if settings_list is None:
-        settings_list = [
-            {"vertical_strategy": "lines", "horizontal_strategy": "lines",
-             "intersection_x_tolerance": 10, "intersection_y_tolerance": 10},
-            {"vertical_strategy": "lines", "horizontal_strategy": "lines",
-             "intersection_x_tolerance": 25, "intersection_y_tolerance": 25},
-            {"vertical_strategy": "text",  "horizontal_strategy": "text",
-             "intersection_x_tolerance": 15, "intersection_y_tolerance": 15},
-        ]
+    Returns:
+        (payload, source_name), plus {page number: text} of the pages read
+        as a third item when with_pages is set
+    """
+    settings_list = DEFAULT_TABLE_SETTINGS if settings_list is None else settings_list
     keywords = KW if keywords is None else keywords
 
-    # --- 1) Get text payload --------------------------------------
+    if isinstance(source, io.BytesIO):
+        source = source.getvalue()
+
     if isinstance(source, str):
-        # Direct text input
-        payload = source
+        # Direct text input: short e-mails go through as-is, long ones are ranked down to the token budget
+        payload = get_best_payload(source, token_budget=token_budget, with_pages=with_pages)
         source_name = "email_text"
+    elif isinstance(source, bytes):
+        # PDF already in memory (e.g. an upload) - never touches disk
+        print(f"📄 Reading PDF from memory ({len(source):,} bytes)")
+        payload = get_best_payload(source, settings_list=settings_list, keywords=keywords,
+                                   use_cache=use_cache, workers=pdf_workers, full_scan=full_scan,
+                                   token_budget=token_budget, with_pages=with_pages)
+        source_name = "uploaded_pdf"
     elif isinstance(source, Path):
         if source.suffix.lower() == '.pdf':
             # PDF file
             print("📄 Reading PDF:", source.resolve())
-            payload = get_best_payload(source, settings_list=settings_list, keywords=keywords)
-            source_name = source.stem
+            payload = get_best_payload(source, settings_list=settings_list, keywords=keywords,
+                                       use_cache=use_cache, workers=pdf_workers, full_scan=full_scan,
+                                       token_budget=token_budget, with_pages=with_pages)
         else:
             # Text file
-            payload = source.read_text()
-            source_name = source.stem
+            payload = get_best_payload(source.read_text(), token_budget=token_budget, with_pages=with_pages)
+        source_name = source.stem
     else:
-        raise TypeError(f"Expected str or Path, got {type(source)}")
-
-    print("Here's the extracted text:", payload)
-
-    # --- 2) LLM interpretation  -----------------------------------
-    result_raw = interpret_payload_with_gpt(payload, client=client)
-    result = normalize_fields(result_raw)
-    print(f"Here are the extracted results: \n {result} \n")
-
-    # --- 3) build output file name --------------------------------
+        raise TypeError(f"Expected str, Path or bytes, got {type(source)}")
+    if with_pages:
+        payload, pages = payload
+        return payload, source_name, pages
+    return payload, source_name
+
+def scorecard_filename(result: dict) -> str:
+    """Standard output file name for a scorecard, e.g. 'Auto Scorecard - Taco Bell (Cedar Rapids, IA) 2025.01.31 v1.xlsx'."""
     addr = result.get("Address", {}) if isinstance(result.get("Address"), dict) else {}
-    tenant = result.get("Current Tenant", "Unknown Tenant")
-    city_state = f"{addr.get('City','')}, {addr.get('State','')}".strip(" ,")
+    tenant = result.get("Current Tenant") or "Unknown Tenant"
+    city_state = f"{addr.get('City') or ''}, {addr.get('State') or ''}".strip(" ,")
 
     ts = datetime.now().strftime("%Y.%m.%d")
     # Sanitize the tenant name and location for the filename
     safe_tenant = sanitize_filename(tenant)
     safe_location = sanitize_filename(city_state)
     
-    out_name = f"Auto Scorecard - {safe_tenant} ({safe_location}) {ts} v1.xlsx"
-    out_path = out_dir / out_name
+    return f"Auto Scorecard - {safe_tenant} ({safe_location}) {ts} v1.xlsx"
+
+def extract_source_fields(
+    source: str | Path | bytes,
+    *,
+    settings_list: list[dict] | None = None,
+    keywords: list[str] | None = None,
+    client: OpenAI,
+    use_cache: bool = True,
+    full_scan: bool = False,
+    on_field=None,
+) -> tuple[dict, str, dict[int, str]]:
+    """
+    The extraction half of ``build_scorecard_bytes``: payload, GPT, normalised fields. No template, no workbook.
+
+    Returns:
+        (fields, source name, {page number: text} of the pages read)
+    """
+    # --- 1) Get text payload --------------------------------------
+    with span("load_payload") as attrs:
+        payload, source_name, pages = load_payload(source, settings_list=settings_list, keywords=keywords,
+                                                   use_cache=use_cache, full_scan=full_scan, with_pages=True)
+        attrs.update(source=source_name, payload_chars=len(payload))
+
+    print("Here's the extracted text:", payload)
 
-    # --- 4) write to template -------------------------------------
-    write_to_template(result, template_path, out_path)
+    # --- 2) LLM interpretation  -----------------------------------
+    result_raw = extract_fields(payload, client=client, use_cache=use_cache, on_field=on_field)
+    with span("normalize_fields"):
+        result = normalize_fields(result_raw)
+    print(f"Here are the extracted results: \n {result} \n")
+    return result, source_name, pages
+
+def build_scorecard_bytes(
+    source: str | Path | bytes | io.BytesIO,
+    template: str | Path | bytes | io.BytesIO | None = None,
+    *,
+    settings_list: list[dict] | None = None,
+    keywords: list[str] | None = None,
+    client: Optional[OpenAI] = None,
+    use_cache: bool = True,
+    full_scan: bool = False,
+    compiled: bool = True,
+    index: bool = True,
+    on_field=None,
+    trace: bool = False,
+) -> tuple:
+    """
+    In-memory version of ``build_scorecard``: nothing is written to disk.
+
+    PDF bytes are fed to pdfplumber directly and the workbook is saved to a
+    buffer, so concurrent callers never share a file path.
+
+    Every stage is timed as a span (see tracing.py). If the caller already
+    opened a ``tracing()`` block, the spans join that trace; trace=True also
+    returns this run's spans. Unless index is
+    False, the source and its fields are then added to the search index
+    (search_index.py) on a background thread. ``on_field(name, value)`` is
+    called with each field as soon as it is known (see ``extract_fields``),
+    long before the workbook is written.
+
+    Args:
+        source: E-mail text, a PDF/text file path, or PDF bytes / BytesIO
+        template: Template path, bytes or BytesIO (defaults to the S3 template)
+
+    Returns:
+        (fields, xlsx bytes, suggested file name), plus the trace spans
+        as a fourth item when trace=True
+    """
+    if client is None:
+        client = get_openai_client()
+    if isinstance(source, io.BytesIO):
+        source = source.getvalue()
+
+    with tracing() as run_trace:
+        # Load template from S3 if not provided
+        if template is None:
+            bucket = os.getenv('S3_BUCKET_NAME')
+            key = os.getenv('TEMPLATE_S3_KEY', 'templates/Scorecard - Blank v1 streamlit.xlsx')
+            with span("template_fetch", key=key):
+                template = get_template_from_s3(bucket, key)
+        elif isinstance(template, bytes):
+            template = io.BytesIO(template)
+
+        # --- 1-2) Text payload and LLM interpretation ----------------
+        result, source_name, pages = extract_source_fields(source, settings_list=settings_list, keywords=keywords,
+                                                           client=client, use_cache=use_cache, full_scan=full_scan,
+                                                           on_field=on_field)
+
+        # --- 3) write to template -------------------------------------
+        out = io.BytesIO()
+        write_to_template(result, template, out, compiled=compiled)
+
+    if index:
+        index_in_background(source, result, source_name, pages)
+    if trace:
+        return result, out.getvalue(), scorecard_filename(result), run_trace.to_list()
+    return result, out.getvalue(), scorecard_filename(result)
 
-    return result, str(out_path)
+def build_scorecard(
+    source: str | Path | bytes | io.BytesIO,
+    template_path: str | Path | bytes | io.BytesIO = None,  # Made optional
+    *,
+    settings_list: list[dict] | None = None,
+    keywords: list[str] | None = None,
+    out_dir: str | Path = "/tmp",
+    client: Optional[OpenAI] = None,
+    use_cache: bool = True,
+    full_scan: bool = False,
+    compiled: bool = True,
+    index: bool = True,
+    trace: bool = False,
+) -> tuple:
+    """
+    Parse an OM PDF or plain text, extract the fields via GPT, and write a filled‑out Excel scorecard.
+    
+    Now supports loading template from S3. PDF text and GPT responses are reused
+    from the on-disk caches when the same input was seen before; pass
+    use_cache=False to force a re-parse and a fresh API call. PDFs are scanned
+    only until every field has turned up; full_scan=True reads every page.
+    The workbook is written with the compiled template writer unless compiled=False,
+    and the document is added to the search index unless index=False.
+    Use build_scorecard_bytes to get the workbook back in memory instead.
 
+    Returns:
+        (fields, output path). With trace=True, the run's trace spans follow
+        as a third item - each a dict with "name", "start" and "duration"
+        (seconds), "depth" and "attrs".
+    """
+    result, xlsx, name, *spans = build_scorecard_bytes(
+        source,
+        template_path,
+        settings_list=settings_list,
+        keywords=keywords,
+        client=client,
+        use_cache=use_cache,
+        full_scan=full_scan,
+        compiled=compiled,
+        index=index,
+        trace=trace,
+    )
 
+    out_path = Path(out_dir) / name
+    out_path.write_bytes(xlsx)
+    return (result, str(out_path), *spans)
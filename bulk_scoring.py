@@ -0,0 +1,185 @@
+"""
+Vectorised scoring of many deals at once.
+
+``score_frame`` takes a DataFrame with one row per deal and one column per
+extracted field (the keys of build_scorecard.REQUIRED_KEYS, "Address" holding
+the address dict) and returns every line-item score, comment and the total.
+Numeric parsing and score banding run on whole columns with pandas/NumPy;
+results match ``build_scorecard.score_deal`` row for row.
+
+Missing values (None / NaN) are treated as the scalar path treats None.
+"""
+import numpy as np
+import pandas as pd
+
+from build_scorecard import SCORECARD_LAYOUT
+from score_rules import RENT_TABLES, SCORE_TABLES, UNKNOWN_RENT, ScoreTable
+
+
+def parse_numeric_series(values: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorised ``parse_numeric_value``.
+
+    Returns:
+        (numbers as float64, mask of values the scalar path would return as int)
+    """
+    values = values.astype(object)
+    missing = values.isna().to_numpy()
+    is_number = values.map(lambda v: isinstance(v, (int, float, np.number))).to_numpy() & ~missing
+
+    out = np.zeros(len(values), dtype=float)
+    is_int = np.ones(len(values), dtype=bool)
+
+    if is_number.any():
+        numbers = values[is_number]
+        out[is_number] = numbers.astype(float).to_numpy()
+        is_int[is_number] = numbers.map(lambda v: isinstance(v, (int, np.integer))).to_numpy()
+
+    is_text = ~missing & ~is_number
+    if is_text.any():
+        matched = (values[is_text].astype(str)
+                   .str.replace(",", "", regex=False)
+                   .str.extract(r"([\d\.]+)", expand=False))
+        parsed = pd.to_numeric(matched, errors="coerce")
+        out[is_text] = parsed.fillna(0).to_numpy()
+        is_int[is_text] = ~matched.str.contains(".", regex=False).fillna(False).to_numpy(dtype=bool)
+
+    return out, is_int
+
+
+def _python_numbers(values: np.ndarray, is_int: np.ndarray) -> list:
+    """Back to int/float so f-strings render exactly as the scalar path does."""
+    return [int(v) if i else float(v) for v, i in zip(values.tolist(), is_int.tolist())]
+
+
+def _text(values: pd.Series) -> pd.Series:
+    """Lower-cased, stripped strings; non-strings become NaN."""
+    return values.astype(object).where(values.map(lambda v: isinstance(v, str)), None).str.strip().str.lower()
+
+
+def _display(values: pd.Series) -> list:
+    """How a field renders inside an f-string (None for missing, like dict.get)."""
+    return [None if (v is None or (isinstance(v, float) and np.isnan(v))) else v
+            for v in values.astype(object).tolist()]
+
+
+def _lookup(table: ScoreTable, values: np.ndarray, numbers: list | None = None, **context) -> tuple:
+    """Vectorised ``ScoreTable.lookup``: band every value with one searchsorted."""
+    idx = np.searchsorted(np.asarray(table.bounds, dtype=float), values, side="right")
+    numbers = values.tolist() if numbers is None else numbers
+    columns = {k: v if isinstance(v, list) else [v] * len(numbers) for k, v in context.items()}
+    comments = [table.comments[i].format(value=v, **{k: c[j] for k, c in columns.items()})
+                for j, (i, v) in enumerate(zip(idx.tolist(), numbers))]
+    return np.asarray(table.scores)[idx], comments
+
+
+def score_frame(deals: pd.DataFrame) -> pd.DataFrame:
+    """
+    Score every deal in ``deals``.
+
+    Returns:
+        DataFrame on the same index with "<item> Score" and "<item> Comment"
+        for each line item of SCORECARD_LAYOUT, plus "Total Score".
+    """
+    n = len(deals)
+
+    def col(name: str) -> pd.Series:
+        return deals[name] if name in deals else pd.Series([""] * n, index=deals.index, dtype=object)
+
+    tenant = _display(col("Current Tenant"))
+    out = {}
+
+    # Restaurant/Auto/Medical? and Single Tenant?
+    is_ram = _text(col("Restaurant/Auto/Medical?")).eq("yes").to_numpy()
+    out["Restaurant/Auto/Medical?"] = (
+        np.where(is_ram, 2, 0),
+        [f"{t} is a restaurant/auto/medical tenant" if yes and t else "Not a restaurant/auto/medical tenant"
+         for yes, t in zip(is_ram, tenant)])
+
+    single = _text(col("Single Tenant?")).eq("yes").to_numpy()
+    out["Single Tenant?"] = (
+        np.where(single, 2, 0),
+        np.where(single, "Free-standing, single-tenant asset", "Multi-tenant property"))
+
+    # Portfolio targets
+    states = [a.get("State", "") if isinstance(a, dict) else "" for a in col("Address").astype(object).tolist()]
+    out["Portfolio Target Brand"] = (np.ones(n, dtype=int), [f"{t} is a target brand for FCPT" for t in tenant])
+    out["Portfolio Target Geography"] = (
+        np.ones(n, dtype=int),
+        [f"{s} is an attractive market for FCPT" if s else "Location is an attractive market for FCPT"
+         for s in states])
+
+    # Acreage (comments render the number as parsed, so keep ints as ints)
+    acres, acres_int = parse_numeric_series(col("Acreage"))
+    out["Acreage"] = _lookup(SCORE_TABLES["Acreage"], acres, _python_numbers(acres, acres_int))
+
+    # Drive-Thru (QSR) / Carry-out (CDR)
+    drive_raw = col("Drive-Thru (QSR) / Carry-out (CDR)").astype(object)
+    drive = drive_raw.where(drive_raw.map(lambda v: isinstance(v, str)), "").str.lower()
+    qsr = drive.str.contains("qsr", regex=False).to_numpy()
+    cdr = drive.str.contains("cdr", regex=False).to_numpy()
+    no_drive = (drive.eq("") | drive.eq("na")).to_numpy()
+    out["Drive-Thru (QSR) / Carry-out (CDR)"] = (
+        np.where(qsr | cdr, 2, 0),
+        [("Not applicable for this tenant type" if na else
+          f"{t} has a drive-thru" if q else
+          f"{t} has carry-out capability" if c else
+          "No drive-thru or carry-out capability")
+         for na, q, c, t in zip(no_drive, qsr, cdr, tenant)])
+
+    # Box Size and Number of National Locations
+    sqft, _ = parse_numeric_series(col("Box Size"))
+    out["Box Size"] = _lookup(SCORE_TABLES["Box Size"], sqft)
+
+    locations, _ = parse_numeric_series(col("Number of National Locations"))
+    out["Number of National Locations"] = _lookup(
+        SCORE_TABLES["Number of National Locations"], locations, tenant=tenant)
+
+    # Lease Structure
+    structure = _text(col("Lease Structure")).fillna("")
+    master = structure.str.contains("master lease", regex=False).to_numpy()
+    nnn = structure.str.contains("nnn", regex=False).to_numpy()
+    nn = structure.eq("nn").to_numpy()
+    ll = structure.str.contains("meaningful ll obligations", regex=False).to_numpy()
+    blank = _display(col("Lease Structure"))
+    out["Lease Structure"] = (
+        np.select([master, nnn], [1.5, 1], 0),
+        np.select(
+            [np.array([not b for b in blank]), master, nnn, nn, ll],
+            ["Lease structure not specified",
+             "Master lease provides additional tenant credit support",
+             "NNN lease structure",
+             "NN lease structure with some landlord responsibilities",
+             "Significant landlord obligations under lease"],
+            "Standard lease structure"))
+
+    # Lease Term and Rent Growth
+    years, _ = parse_numeric_series(col("Lease Term"))
+    out["Lease Term"] = _lookup(SCORE_TABLES["Lease Term"], years)
+
+    growth, _ = parse_numeric_series(col("Rent Growth"))
+    out["Rent Growth"] = _lookup(SCORE_TABLES["Rent Growth"], growth)
+
+    # Absolute Rent: each building type's ladder scores the rows of that type
+    rent, _ = parse_numeric_series(col("Absolute Rent"))
+    buildings = np.where(cdr, "CDR", "QSR")
+    scores = np.zeros(n)
+    comments = [""] * n
+    for building in np.unique(buildings):
+        rows = np.flatnonzero(buildings == building)
+        table = RENT_TABLES.get(building, UNKNOWN_RENT)
+        band_scores, band_comments = _lookup(table, rent[rows])
+        scores[rows] = band_scores
+        for row, comment in zip(rows.tolist(), band_comments):
+            comments[row] = comment
+    out["Absolute Rent"] = (scores, comments)
+
+    result = pd.DataFrame(index=deals.index)
+    total = np.zeros(n)
+    for item in SCORECARD_LAYOUT:
+        scores, comments = out[item]
+        result[f"{item} Score"] = scores
+        result[f"{item} Comment"] = comments
+        total = total + scores
+    result["Total Score"] = total
+    return result
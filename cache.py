@@ -0,0 +1,122 @@
+"""
+Small on-disk cache used to skip repeat work on the same inputs.
+
+Entries are JSON files named by their key inside a cache directory. Reading an
+entry touches the file so its mtime tracks last use; writing one evicts the
+least recently used entries once the directory grows past ``max_bytes``.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+CACHE_ROOT = Path(os.getenv("SCORECARD_CACHE_DIR", Path.home() / ".cache" / "fcpt-scorecard"))
+
+
+def sha256_file(path: str | Path, chunk_size: int = 1 << 20) -> str:
+    """Hex SHA-256 of a file's contents, read in chunks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def sha256_bytes(data: bytes) -> str:
+    """Hex SHA-256 of an in-memory file."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def sha256_text(*parts: str) -> str:
+    """Hex SHA-256 of the given strings, separated so ("ab", "c") != ("a", "bc")."""
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+class DiskCache:
+    """
+    JSON key/value store on local disk with LRU eviction by total size.
+
+    Args:
+        directory: Folder holding the entries (created on first write).
+        max_bytes: Evict least recently used entries above this total size.
+        ttl_seconds: Optional maximum age of an entry; older ones are dropped on read.
+    """
+
+    def __init__(self, directory: str | Path, max_bytes: int, ttl_seconds: Optional[float] = None):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str):
+        """Return the stored value for ``key``, or None on a miss."""
+        path = self._path(key)
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            # Corrupt or half-written entry: treat as a miss
+            path.unlink(missing_ok=True)
+            return None
+
+        if self.ttl_seconds is not None and time.time() - entry.get("created", 0) > self.ttl_seconds:
+            path.unlink(missing_ok=True)
+            return None
+
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            pass
+        return entry.get("value")
+
+    def set(self, key: str, value) -> None:
+        """Store ``value`` (must be JSON-serialisable) under ``key``."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        entry = json.dumps({"created": time.time(), "value": value})
+
+        # Write to a temp file and rename so readers never see half an entry
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                fh.write(entry)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        self.evict()
+
+    def delete(self, key: str) -> None:
+        self._path(key).unlink(missing_ok=True)
+
+    def evict(self) -> None:
+        """Remove least recently used entries until the cache fits in ``max_bytes``."""
+        entries = []
+        for path in self.directory.glob("*.json"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return
+        for _, size, path in sorted(entries):
+            path.unlink(missing_ok=True)
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self) -> None:
+        for path in self.directory.glob("*.json"):
+            path.unlink(missing_ok=True)
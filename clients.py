@@ -0,0 +1,129 @@
+"""
+Process-wide OpenAI and S3 clients.
+
+Building a client costs credential resolution and, on first use, a TLS
+handshake; reusing one keeps its HTTP connections alive between deals. Every
+Streamlit session, background job and batch run in the process gets its
+clients from here. Clients are keyed on the credentials they were built
+with, so pasting a new API key (or rotating AWS keys) transparently builds a
+fresh client while the old one stays usable by requests already in flight.
+
+Connection pools are sized for our concurrency: OPENAI_MAX_CONNECTIONS
+(default 20, comfortably above the batch runner's default --llm-workers and
+the app's JOB_WORKERS) and S3_MAX_POOL_CONNECTIONS (default 10). The OpenAI
+SDK's own retries are off; llm_policy.py handles timeouts, retries and hedging.
+
+openai, httpx and boto3 are imported when the first client is built.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+from cache import sha256_text
+
+if TYPE_CHECKING:
+    import httpx
+    from openai import AsyncOpenAI, OpenAI
+
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "20"))
+OPENAI_KEEPALIVE_SECONDS = float(os.getenv("OPENAI_KEEPALIVE_SECONDS", "60"))
+S3_MAX_POOL_CONNECTIONS = int(os.getenv("S3_MAX_POOL_CONNECTIONS", "10"))
+
+# Clients kept per kind; older credentials are dropped first
+MAX_CLIENTS = 8
+
+_clients: OrderedDict = OrderedDict()
+_lock = threading.Lock()
+
+# Async clients get a registry per event loop, keyed on the loop object itself:
+# an id() can be reused by a later loop once the first one is garbage-collected
+_loop_clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def _cached(key: tuple, build, registry: OrderedDict | None = None):
+    """The registry entry for ``key``, built on first use."""
+    registry = _clients if registry is None else registry
+    with _lock:
+        client = registry.get(key)
+        if client is None:
+            client = registry[key] = build()
+            kind = key[0]
+            same_kind = [k for k in registry if k[0] == kind]
+            for old in same_kind[:-MAX_CLIENTS]:
+                del registry[old]  # not closed: a request may still be using it
+        registry.move_to_end(key)
+        return client
+
+
+def _loop_registry(loop: asyncio.AbstractEventLoop) -> OrderedDict:
+    """Client registry of ``loop``; registries of closed loops are dropped on the way."""
+    with _lock:
+        # A client with open connections keeps its loop alive, so closed loops are not always collected
+        for closed in [other for other in _loop_clients if other.is_closed()]:
+            del _loop_clients[closed]
+        return _loop_clients.setdefault(loop, OrderedDict())
+
+
+def _limits() -> httpx.Limits:
+    import httpx
+    return httpx.Limits(max_connections=OPENAI_MAX_CONNECTIONS,
+                        max_keepalive_connections=OPENAI_MAX_CONNECTIONS,
+                        keepalive_expiry=OPENAI_KEEPALIVE_SECONDS)
+
+
+def get_openai_client(api_key: str | None = None) -> OpenAI:
+    """Shared OpenAI client for ``api_key`` (default: OPENAI_API_KEY)."""
+    api_key = os.getenv("OPENAI_API_KEY") if api_key is None else api_key
+
+    def build():
+        from openai import DefaultHttpxClient, OpenAI
+        return OpenAI(api_key=api_key, max_retries=0, http_client=DefaultHttpxClient(limits=_limits()))
+    return _cached(("openai", sha256_text(api_key or "")), build)
+
+
+def get_async_openai_client(api_key: str | None = None) -> AsyncOpenAI:
+    """
+    Shared AsyncOpenAI client for ``api_key`` (default: OPENAI_API_KEY).
+
+    Async connections belong to the event loop that opened them, so clients
+    are also keyed on the running loop (if any).
+    """
+    api_key = os.getenv("OPENAI_API_KEY") if api_key is None else api_key
+    try:
+        registry = _loop_registry(asyncio.get_running_loop())
+    except RuntimeError:
+        registry = None
+
+    def build():
+        from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+        return AsyncOpenAI(api_key=api_key, max_retries=0, http_client=DefaultAsyncHttpxClient(limits=_limits()))
+    return _cached(("async_openai", sha256_text(api_key or "")), build, registry)
+
+
+def get_s3_client():
+    """Shared S3 client for the AWS_ACCESS_KEY_ID / AWS_SECRET_ACCESS_KEY in the environment."""
+    access_key = os.getenv('AWS_ACCESS_KEY_ID')
+    secret_key = os.getenv('AWS_SECRET_ACCESS_KEY')
+
+    def build():
+        import boto3
+        from botocore.config import Config
+        # boto3 clients are thread-safe once built; building one from the shared default session is not
+        return boto3.session.Session().client(
+            's3',
+            aws_access_key_id=access_key,
+            aws_secret_access_key=secret_key,
+            config=Config(max_pool_connections=S3_MAX_POOL_CONNECTIONS),
+        )
+    return _cached(("s3", access_key, sha256_text(secret_key or "")), build)
+
+
+def clear_clients() -> None:
+    """Forget every cached client (the next call builds new ones)."""
+    with _lock:
+        _clients.clear()
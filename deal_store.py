@@ -0,0 +1,146 @@
+"""
+Persistent store of every deal built in the app.
+
+Only the extracted fields and their scores are kept (in a local SQLite
+database); the workbook is rebuilt from them with ``write_to_template`` when
+someone asks to download it. Callers page through deals newest first, so a
+long-running server never holds more than one page of history per session.
+Each deal records its owner (the app passes its session id), and the app
+lists only the deals its own session built, as the in-memory history did.
+
+The database lives at DEAL_STORE_PATH (default: deals.sqlite3 in the scorecard
+cache folder).
+"""
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+from build_scorecard import score_deal, write_to_template
+from cache import CACHE_ROOT
+
+DEAL_STORE_PATH = Path(os.getenv("DEAL_STORE_PATH", CACHE_ROOT / "deals.sqlite3"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS deals (
+    id INTEGER PRIMARY KEY,
+    created_at REAL NOT NULL,
+    tenant TEXT,
+    filename TEXT NOT NULL,
+    source TEXT,
+    fields TEXT NOT NULL,
+    scores TEXT NOT NULL,
+    total_score REAL NOT NULL,
+    owner TEXT
+);
+CREATE INDEX IF NOT EXISTS deals_created ON deals (created_at);
+"""
+
+# Columns added after the first release, created on databases that predate them
+_ADDED_COLUMNS = {"owner": "TEXT"}
+_INDEXES = "CREATE INDEX IF NOT EXISTS deals_owner ON deals (owner, created_at);"
+
+_ready: set[Path] = set()
+_ready_lock = threading.Lock()
+
+
+def connect(path: Optional[Path] = None) -> sqlite3.Connection:
+    """Connection to the store, creating the table on first use."""
+    path = DEAL_STORE_PATH if path is None else Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    with _ready_lock:
+        if path not in _ready:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            add_missing_columns(conn, "deals", _ADDED_COLUMNS)
+            conn.executescript(_INDEXES)
+            _ready.add(path)
+    return conn
+
+
+def add_missing_columns(conn: sqlite3.Connection, table: str, columns: dict[str, str]) -> None:
+    """ALTER TABLE ``table`` to add any of ``columns`` ({name: type}) it does not have yet."""
+    existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    for name, kind in columns.items():
+        if name not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {kind}")
+
+
+def model_filename(fields: dict) -> str:
+    """Download name of a model built in the app, e.g. "Automated Scorecard Taco Bell (Ames, IA) 05.01.25 v1.xlsx"."""
+    tenant_name = fields.get("Current Tenant", "Unnamed Tenant")
+    address = fields.get("Address") or {}
+    city = address.get("City", "") if isinstance(address, dict) else ""
+    state = address.get("State", "") if isinstance(address, dict) else ""
+    location_str = f"({city}, {state})" if city and state else ""
+    current_date = datetime.now().strftime("%m.%d.%y")
+    return f"Automated Scorecard {tenant_name} {location_str} {current_date} v1.xlsx"
+
+
+def _deal(row: sqlite3.Row) -> dict:
+    deal = dict(row)
+    deal["fields"] = json.loads(deal["fields"])
+    deal["scores"] = {item: tuple(v) for item, v in json.loads(deal["scores"]).items()}
+    return deal
+
+
+def save_deal(fields: dict, filename: str, *, source: Optional[str] = None, owner: Optional[str] = None,
+              path: Optional[Path] = None) -> int:
+    """Store a built deal (fields are scored here) and return its id."""
+    scores = score_deal(fields)
+    total = sum(score for score, _ in scores.values())
+    with closing(connect(path)) as conn, conn:
+        return conn.execute(
+            "INSERT INTO deals (created_at, tenant, filename, source, fields, scores, total_score, owner) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (time.time(), fields.get("Current Tenant"), filename, source,
+             json.dumps(fields, default=str), json.dumps(scores, default=str), total, owner),
+        ).lastrowid
+
+
+def _owner_filter(owner: Optional[str]) -> tuple[str, tuple]:
+    return ("WHERE owner = ?", (owner,)) if owner is not None else ("", ())
+
+
+def count_deals(*, owner: Optional[str] = None, path: Optional[Path] = None) -> int:
+    """Number of deals (only ``owner``'s when given)."""
+    where, params = _owner_filter(owner)
+    with closing(connect(path)) as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM deals {where}", params).fetchone()[0]
+
+
+def list_deals(offset: int = 0, limit: int = 10, *, owner: Optional[str] = None,
+               path: Optional[Path] = None) -> list[dict]:
+    """One page of deals (only ``owner``'s when given), newest first."""
+    where, params = _owner_filter(owner)
+    with closing(connect(path)) as conn:
+        rows = conn.execute(f"SELECT * FROM deals {where} ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?",
+                            (*params, limit, offset)).fetchall()
+    return [_deal(row) for row in rows]
+
+
+def get_deal(deal_id: int, *, path: Optional[Path] = None) -> Optional[dict]:
+    with closing(connect(path)) as conn:
+        row = conn.execute("SELECT * FROM deals WHERE id = ?", (deal_id,)).fetchone()
+    return _deal(row) if row is not None else None
+
+
+def deal_workbook(deal_id: int, template: str | Path | bytes | BinaryIO, *,
+                  path: Optional[Path] = None) -> bytes:
+    """Rebuild a stored deal's scorecard workbook from its fields."""
+    deal = get_deal(deal_id, path=path)
+    if deal is None:
+        raise KeyError(f"No deal with id {deal_id}")
+    if isinstance(template, bytes):
+        template = io.BytesIO(template)
+    out = io.BytesIO()
+    write_to_template(deal["fields"], template, out, compiled=True)
+    return out.getvalue()
@@ -1,6 +1,25 @@
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing, contextmanager
+from functools import cache
 from pathlib import Path
-import pdfplumber, re
-from typing import Optional
+import io
+import math
+import multiprocessing
+import os
+import tempfile
+import time
+import re
+from importlib.metadata import version
+from typing import Iterable, Iterator, Optional, Union
+
+from cache import CACHE_ROOT, DiskCache, sha256_bytes, sha256_file, sha256_text
+from payload_ranker import PAYLOAD_TOKEN_BUDGET, head_payload, rank_payload
+from layout_index import known_layout, layout_fingerprint, remember_layout
+from table_settings import document_fingerprint, order_settings, record_outcome, settings_key
+from tracing import annotate, record_span, span
+
+# A PDF on disk, or the raw bytes of one (e.g. a Streamlit upload)
+PdfSource = Union[Path, bytes]
 
 
 KW = [
@@ -11,6 +30,59 @@ KW = [
 KW_REGEX = re.compile("|".join(KW), re.I)
 TITLE_REGEX = re.compile(r"(PROPERTY OVERVIEW|RENT ROLL|TENANT PROFILE)", re.I)
 
+# What counts as evidence that a page covers each field GPT has to fill in.
+# Keys mirror build_scorecard.REQUIRED_KEYS; the Yes/No judgement fields
+# (Restaurant/Auto/Medical?, Single Tenant?) are inferred by GPT and not tracked.
+FIELD_EVIDENCE = {
+    "Lease Structure": re.compile(r"\bNNN\b|\bNN\b|ABSOLUTE NET|LEASE TYPE|MASTER LEASE", re.I),
+    "Lease Term": re.compile(r"EXPIR|LEASE TERM|TERM REMAINING|REMAINING TERM|LEASE END", re.I),
+    # A bare RENT would match inside "CURRENT" (the "Current Tenant" label on nearly every OM)
+    "Absolute Rent": re.compile(r"ANNUAL RENT|BASE RENT|CURRENT RENT|RENT ROLL|RENT SCHEDULE|RENTAL INCOME|"
+                                r"\bNOI\b|NET OPERATING INCOME|\bRENT\s*[:\-–—]?\s*\$", re.I),
+    "Rent Growth": re.compile(r"INCREASE|ESCALATION|BUMP|RENT GROWTH", re.I),
+    "Acreage": re.compile(r"ACRE|LOT SIZE|LAND AREA", re.I),
+    "Drive-Thru (QSR) / Carry-out (CDR)": re.compile(r"DRIVE[- ]?THR|CARRY[- ]?OUT", re.I),
+    "Box Size": re.compile(r"\bGLA\b|BUILDING SIZE|SQUARE F|\bSF\b|RENTABLE AREA", re.I),
+    # Only the label is case-insensitive: "IA 52404" is a state and ZIP, "at 12345" is not
+    "Address": re.compile(r"(?i:ADDRESS)|\b[A-Z]{2},? \d{5}\b"),
+    "Year Built": re.compile(r"YEAR BUILT|BUILT IN|CONSTRUCTED", re.I),
+    "Current Tenant": re.compile(r"TENANT|LESSEE|GUARANTOR", re.I),
+    "Number of National Locations": re.compile(r"LOCATIONS|RESTAURANTS|\bUNITS\b|\bSTORES\b", re.I),
+}
+
+# Early page scans stop after this many pages even if some field has no evidence yet
+SCAN_MAX_PAGES = int(os.getenv("SCAN_MAX_PAGES", "25"))
+
+# Per-page text and final payloads of every OM we have parsed, keyed by file hash.
+# Bump _CACHE_VERSION whenever the extraction logic changes what gets stored.
+_CACHE_VERSION = "4"
+PDF_TEXT_CACHE = DiskCache(
+    CACHE_ROOT / "pdf_text",
+    max_bytes=int(os.getenv("PDF_CACHE_MAX_MB", "512")) * 1024 * 1024,
+)
+
+# Page text extraction is sharded across processes only for documents at least
+# this long; below it, spawning workers costs more than it saves.
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "0")) or min(os.cpu_count() or 1, 8)
+PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "40"))
+
+def _pool_context():
+    # Page workers start from a fresh interpreter: forking a multi-threaded process (Streamlit,
+    # the job queue's worker threads) can copy a lock another thread holds and hang the child
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+@contextmanager
+def _shared_path(pdf_path: PdfSource) -> Iterator[Path]:
+    """The PDF as a path every page worker can open; bytes are written to a temp file once, not pickled per shard."""
+    if not isinstance(pdf_path, bytes):
+        yield pdf_path
+        return
+    with tempfile.TemporaryDirectory(prefix="scorecard-pdf-") as tmp:
+        path = Path(tmp) / "source.pdf"
+        path.write_bytes(pdf_path)
+        yield path
+
 def looks_like_real_table(table: list[list[str]]) -> bool:
     """
     Reject grids that are mostly one-letter cells.
@@ -46,23 +118,51 @@ def is_good_table(table, keywords):
     
     return False
 
-def extract_tables(pdf_path: Path,
+def _open_pdf(pdf: PdfSource):
+    """pdfplumber.open for a path or in-memory PDF bytes (pdfplumber is imported on first use)."""
+    import pdfplumber
+    return pdfplumber.open(io.BytesIO(pdf) if isinstance(pdf, bytes) else pdf)
+
+def extract_tables(pdf_path: PdfSource,
                    settings_list: list[dict],
-                   keywords: list[str]) -> list[dict]:
+                   keywords: list[str],
+                   *,
+                   page_texts: Optional[list[str] | dict[int, str]] = None,
+                   adaptive: bool = True) -> list[dict]:
     """
     Try each settings-combo on each page **only until we find ≥1 good table**.
+
+    With adaptive=True the settings are tried in the order that worked best on
+    earlier PDFs with the same layout fingerprint, settings that never work on
+    that layout are skipped, and this document's outcome is added to the
+    history (see table_settings.py). Pass page_texts (already extracted page
+    text, as a list starting at page 1 or {page number: text}) to skip
+    re-reading it for the keyword check; only those pages are searched.
     """
     kw_regex = re.compile("|".join(re.escape(k) for k in keywords), re.I)
     good_tables = []
+    tried, won = {}, {}
 
-    with pdfplumber.open(pdf_path) as pdf:
-        for page_no, page in enumerate(pdf.pages, start=1):
+    with span("extract_tables") as attrs, _open_pdf(pdf_path) as pdf:
+        if isinstance(page_texts, list):
+            page_texts = dict(enumerate(page_texts, start=1))
+        page_nos = range(1, len(pdf.pages) + 1) if page_texts is None else sorted(page_texts)
+        fingerprint = None
+        if adaptive:
+            fingerprint = document_fingerprint(pdf, (page_texts or {}).get(1))
+            settings_list = order_settings(fingerprint, settings_list)
+            attrs.update(fingerprint=fingerprint, settings=len(settings_list))
+
+        for page_no in page_nos:
+            page = pdf.pages[page_no - 1]
             # Skip pages that don't mention any keyword → big speed win
-            page_text = (page.extract_text() or "").upper()
+            page_text = page_texts[page_no] if page_texts is not None else (page.extract_text() or "")
             if not kw_regex.search(page_text):
                 continue
 
             for opts in settings_list:
+                key = settings_key(opts)
+                tried[key] = tried.get(key, 0) + 1
                 tables = page.extract_tables(
                     {
                         "vertical_strategy": opts["vertical_strategy"],
@@ -72,27 +172,172 @@ def extract_tables(pdf_path: Path,
                     }
                 ) or []
 
-                for tbl in tables:
-                    if looks_like_real_table(tbl):
-                        good_tables.append(
-                            {"page": page_no, "settings": opts, "table": tbl}
-                        )
-                        # Early exit: stop once we have 2–3 high-quality tables
-                        if len(good_tables) >= 3:
-                            return good_tables
+                found = [tbl for tbl in tables if looks_like_real_table(tbl)]
+                if found:
+                    won[key] = won.get(key, 0) + 1
+                    # Early exit: the later settings would mostly re-find the same tables
+                    good_tables.extend({"page": page_no, "settings": opts, "table": tbl} for tbl in found[:3])
+                    break
             # (optional) break if we already have something after this page
             if good_tables:
-                return good_tables
+                break
+
+        attrs.update(tables=len(good_tables), attempts=sum(tried.values()))
+
+    if fingerprint is not None:
+        record_outcome(fingerprint, tried, won)
+    return good_tables
+
+def tables_text(tables: list[dict]) -> str:
+    """Tables from ``extract_tables`` as text, one "cell | cell" line per row."""
+    blocks = []
+    for t in tables:
+        rows = [" | ".join((cell or "").replace("\n", " ").strip() for cell in row) for row in t["table"]]
+        blocks.append("\n".join(row for row in rows if row.strip(" |")))
+    return "\n\n".join(blocks)
+
+@cache
+def _pdfplumber_version() -> str:
+    # From the package metadata, so a cache hit never has to import pdfplumber
+    return version("pdfplumber")
+
+def pdf_cache_key(pdf_path: PdfSource) -> str:
+    """Content hash of the PDF plus the extractor/pdfplumber versions."""
+    digest = sha256_bytes(pdf_path) if isinstance(pdf_path, bytes) else sha256_file(pdf_path)
+    return f"{digest}-v{_CACHE_VERSION}-{_pdfplumber_version()}"
+
+def _extract_page_range(pdf_path: PdfSource, start: int, stop: Optional[int],
+                        known: Optional[dict[int, str]] = None) -> list[tuple[str, float, float]]:
+    """Worker: open the PDF independently and return (text, started, seconds) for pages[start:stop]."""
+    out = []
+    with _open_pdf(pdf_path) as pdf:
+        for page_no, page in enumerate(pdf.pages[start:stop], start=start + 1):
+            t0 = time.perf_counter()
+            if known and page_no in known:
+                out.append((known[page_no], t0, 0.0))
+                continue
+            text = page.extract_text() or ""
+            out.append((text, t0, time.perf_counter() - t0))
+            page.close()  # drop cached layout objects as we go
+    return out
 
-    return good_tables  # may be empty
+def _read_pages(pdf_path: PdfSource, workers: Optional[int] = None,
+                known: Optional[dict[int, str]] = None) -> list[str]:
+    """
+    Extract the text of every page, sharding page ranges across a process pool for long PDFs.
+
+    Args:
+        pdf_path: PDF to read
+        workers: Process count (default PDF_WORKERS); 1 forces a sequential read
+        known: {page number: text} of pages already read; they are not extracted again
+
+    Returns:
+        list[str]: Page text in page order
+    """
+    workers = PDF_WORKERS if workers is None else workers
+    t0 = time.perf_counter()
+
+    with span("pdf_open"), _open_pdf(pdf_path) as pdf:
+        page_count = len(pdf.pages)
+        annotate(pages=page_count)
+
+    if workers <= 1 or page_count < PARALLEL_MIN_PAGES:
+        workers = 1
+        results = _extract_page_range(pdf_path, 0, None, known)
+    else:
+        # A few shards per worker so one slow (image-heavy) range doesn't hold up the rest
+        shard = math.ceil(page_count / (workers * 3))
+        with _shared_path(pdf_path) as path, \
+                ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context()) as pool:
+            futures = [pool.submit(_extract_page_range, path, start, start + shard,
+                                   {n: t for n, t in (known or {}).items() if start < n <= start + shard})
+                       for start in range(0, page_count, shard)]
+            results = [item for fut in futures for item in fut.result()]
+
+    for page_no, (_, started, seconds) in enumerate(results, start=1):
+        record_span("page_text", started, seconds, page=page_no)
+    report_page_timing([sec for _, _, sec in results], time.perf_counter() - t0, workers)
+    return [text for text, _, _ in results]
+
+def report_page_timing(page_seconds: list[float], total_seconds: float, workers: int) -> None:
+    """Print a one-line summary of per-page extraction time."""
+    if not page_seconds:
+        return
+    slowest = max(range(len(page_seconds)), key=page_seconds.__getitem__)
+    print(f"📄 Extracted {len(page_seconds)} pages in {total_seconds:.2f}s "
+          f"({workers} worker{'s' if workers > 1 else ''}, "
+          f"avg {sum(page_seconds) / len(page_seconds):.3f}s/page, "
+          f"slowest p.{slowest + 1} {page_seconds[slowest]:.3f}s)")
+
+def _load_entry(pdf_path: PdfSource, use_cache: bool) -> tuple[Optional[str], dict]:
+    """
+    Cache entry for a PDF: {"pages": [...], "payloads": {mode: payload}}, either part optional.
+
+    Returns (None, {}) when caching is off.
+    """
+    if not use_cache:
+        return None, {}
+    key = pdf_cache_key(pdf_path)
+    return key, PDF_TEXT_CACHE.get(key) or {}
+
+def _save_entry(key: Optional[str], entry: dict) -> None:
+    if key is not None:
+        PDF_TEXT_CACHE.set(key, entry)
+
+def extract_pages(pdf_path: PdfSource, *, use_cache: bool = True, workers: Optional[int] = None,
+                  known: Optional[dict[int, str]] = None) -> list[str]:
+    """
+    Text of every page, in order. Served from the on-disk cache when possible.
 
-def extract_plain_text(pdf_path: Path) -> str:
+    Pages in ``known`` ({page number: text}, e.g. what an early scan read) are
+    taken as they are; only the rest are extracted.
+    """
+    key, entry = _load_entry(pdf_path, use_cache)
+    if "pages" not in entry:
+        entry["pages"] = _read_pages(pdf_path, workers, known)
+        _save_entry(key, entry)
+    return entry["pages"]
+
+def extract_plain_text(pdf_path: PdfSource, *, use_cache: bool = True, workers: Optional[int] = None) -> str:
     """Pull all visible text from every page, collapsed into paragraphs."""
-    text_pages = []
-    with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            text_pages.append(page.extract_text() or "")
-    return "\n\n".join(text_pages)
+    return "\n\n".join(extract_pages(pdf_path, use_cache=use_cache, workers=workers))
+
+def iter_page_text(pdf_path: PdfSource, first_page_text: Optional[str] = None) -> Iterator[str]:
+    """
+    Yield page text one page at a time, so callers can stop reading early.
+
+    Pass first_page_text when page 1 has already been extracted; it is yielded
+    as is instead of being extracted again.
+    """
+    with span("pdf_open") as attrs:
+        pdf = _open_pdf(pdf_path)
+        attrs["pages"] = len(pdf.pages)
+    with pdf:
+        for page_no, page in enumerate(pdf.pages, start=1):
+            if page_no == 1 and first_page_text is not None:
+                yield first_page_text
+                continue
+            with span("page_text", page=page_no):
+                text = page.extract_text() or ""
+                page.close()
+            yield text
+
+def scan_pages(pages: Iterable[str], max_pages: Optional[int] = None) -> tuple[list[str], set[str]]:
+    """
+    Consume pages until every FIELD_EVIDENCE field has been seen or max_pages is reached.
+
+    Returns:
+        (pages_read, fields_without_evidence)
+    """
+    max_pages = SCAN_MAX_PAGES if max_pages is None else max_pages
+    missing = set(FIELD_EVIDENCE)
+    read = []
+    for text in pages:
+        read.append(text)
+        missing = {f for f in missing if not FIELD_EVIDENCE[f].search(text)}
+        if not missing or len(read) >= max_pages:
+            break
+    return read, missing
 
 def keyword_window(text: str, window=2) -> str:
     lines = text.upper().splitlines()
@@ -102,25 +347,174 @@ def keyword_window(text: str, window=2) -> str:
             keep.update(range(max(0, i - window), min(len(lines), i + window + 1)))
     return "\n".join(lines[i] for i in sorted(keep))
 
-def get_best_payload(source: str | Path, *, settings_list=None, keywords=None) -> str:
+def build_payload(text: str, token_budget: int) -> str:
+    """
+    Rank ``text`` into a payload of at most ``token_budget`` tokens (see payload_ranker.py).
+
+    Returns "" if no part of the text matches any field.
+    """
+    with span("rank_payload", chars=len(text), budget=token_budget) as attrs:
+        payload = rank_payload(text, token_budget)
+        attrs["payload_chars"] = len(payload)
+    return payload
+
+def find_sections(page_texts: dict[int, str]) -> dict[str, list[int]]:
+    """{section title: page numbers it is on} for the TITLE_REGEX sections in ``page_texts``."""
+    sections = {}
+    for page_no, text in sorted(page_texts.items()):
+        for title in sorted({t.upper() for t in TITLE_REGEX.findall(text)}):
+            sections.setdefault(title, []).append(page_no)
+    return sections
+
+def fields_with_evidence(pages: Iterable[str]) -> set[str]:
+    return {f for f, rx in FIELD_EVIDENCE.items() if any(rx.search(text) for text in pages)}
+
+def index_layout(fingerprint: str, pages: list[str]) -> None:
+    """
+    Add a scanned PDF's layout to the layout index.
+
+    Only page 1 and the section pages are read for a known layout, so the
+    fields recorded as covered are the ones with evidence on those pages.
+    """
+    sections = find_sections(dict(enumerate(pages, start=1)))
+    if not sections:
+        return  # nothing to skip to; layouts without sections are not indexed
+    section_pages = {1} | {p for numbers in sections.values() for p in numbers}
+    remember_layout(fingerprint, sections, fields_with_evidence([pages[p - 1] for p in section_pages]))
+
+def read_known_sections(pdf_path: PdfSource) -> tuple[str, str, Optional[dict[int, str]]]:
+    """
+    Read only page 1 and the pages where this PDF's layout had its sections before.
+
+    Returns (layout fingerprint, page 1 text, {page number: text}); the pages
+    are None when the layout is not in the index or fails verification: a
+    section is not on the page the index says, or a field that had evidence
+    on those pages last time has none now.
+    """
+    with span("layout_lookup") as attrs, _open_pdf(pdf_path) as pdf:
+        if not pdf.pages:
+            return "", "", None
+        first_text = pdf.pages[0].extract_text() or ""
+        fingerprint = layout_fingerprint(pdf, first_text)
+        layout = known_layout(fingerprint)
+        attrs["known"] = layout is not None
+        if layout is None:
+            return fingerprint, first_text, None
+
+        texts = {1: first_text}
+        for page_no in sorted({p for pages in layout["sections"].values() for p in pages}):
+            page = pdf.pages[page_no - 1]
+            texts[page_no] = page.extract_text() or ""
+            page.close()
+        found = find_sections(texts)
+        verified = (all(set(pages) <= set(found.get(title, ())) for title, pages in layout["sections"].items())
+                    and set(layout["covered"]) <= fields_with_evidence(texts.values()))
+        attrs.update(verified=verified, pages=sorted(texts))
+    return fingerprint, first_text, texts if verified else None
+
+def _with_tables(pdf_path: PdfSource, pages: list[str] | dict[int, str], settings_list, keywords) -> str:
+    """Page text, followed by the tables on those pages when table settings were given."""
+    text = "\n\n".join(pages.values() if isinstance(pages, dict) else pages)
+    if not settings_list:
+        return text
+    tables = tables_text(extract_tables(pdf_path, settings_list, keywords or KW, page_texts=pages))
+    return f"{text}\n\n{tables}" if tables else text
+
+def _pages_read(entry: dict, mode: str) -> dict[int, str]:
+    """{page number: text} behind a cached payload: every page once they are all in the cache."""
+    if "pages" in entry:
+        return dict(enumerate(entry["pages"], start=1))
+    return {page_no: text for page_no, text in entry.get("read", {}).get(mode, ())}
+
+def get_best_payload(source: str | PdfSource, *, settings_list=None, keywords=None, use_cache: bool = True,
+                     workers: Optional[int] = None, full_scan: bool = False,
+                     max_pages: Optional[int] = None, token_budget: Optional[int] = None,
+                     with_pages: bool = False):
     """
     Get the best text payload from either a text string or PDF file.
+
+    PDFs are read page by page and the scan stops as soon as every field in
+    FIELD_EVIDENCE has turned up (or after max_pages pages). For layouts in the
+    layout index (see layout_index.py) only page 1 and the pages their sections
+    were on last time are read, as long as those pages check out. If nothing in that
+    early scan matches any field, or full_scan is set, every page is read.
+    When settings_list is given, tables found on the pages read (see
+    extract_tables) are appended as "cell | cell" rows, so rent schedules keep
+    their structure. The text is then cut into chunks ranked per field with
+    BM25 and the best ones are packed into token_budget tokens; when nothing
+    ranks at all, the start of the document (up to the budget) is sent instead.
+    With with_pages set, the page text that was read comes back too, so
+    callers (e.g. the search index) never have to extract it again.
     
     Args:
-        source: Either a string of text or a Path to a PDF file
-        settings_list: Optional list of table extraction settings
-        keywords: Optional list of keywords to look for
+        source: Either a string of text, a Path to a PDF file, or the PDF's bytes
+        settings_list: Optional list of table extraction settings (PDFs only; no tables when omitted)
+        keywords: Keywords a page needs before its tables are extracted (default KW)
+        use_cache: Reuse page text / payloads from a previous run on the same PDF
+        workers: Processes used to extract page text of long PDFs on a full scan (default PDF_WORKERS)
+        full_scan: Read every page instead of stopping once all fields are covered
+        max_pages: Page cap for the early scan (default SCAN_MAX_PAGES)
+        token_budget: Payload size cap in estimated tokens (default PAYLOAD_TOKEN_BUDGET)
+        with_pages: Also return {page number: text} of every page read (text input is page 1)
         
     Returns:
-        str: The extracted text payload
+        str: The extracted text payload, or (payload, pages) when with_pages is set
     """
+    if isinstance(source, io.BytesIO):
+        source = source.getvalue()
+
+    token_budget = PAYLOAD_TOKEN_BUDGET if token_budget is None else token_budget
+
     if isinstance(source, str):
-        return keyword_window(source) or source
-    elif isinstance(source, Path):
-        full = extract_plain_text(source)
-        return keyword_window(full) or full
+        payload = build_payload(source, token_budget) or head_payload(source, token_budget)
+        return (payload, {1: source}) if with_pages else payload
+    elif isinstance(source, (Path, bytes)):
+        max_pages = SCAN_MAX_PAGES if max_pages is None else max_pages
+        mode = ("full" if full_scan else f"scan:{max_pages}") + f":bm25:{token_budget}"
+        if settings_list:
+            mode += ":tables:" + sha256_text(*map(settings_key, settings_list), *(keywords or KW))[:12]
+        key, entry = _load_entry(source, use_cache)
+        payloads = entry.setdefault("payloads", {})
+        if mode in payloads:
+            annotate(payload_cache="hit")
+            return (payloads[mode], _pages_read(entry, mode)) if with_pages else payloads[mode]
+
+        payload = None
+        if not full_scan:
+            known = None
+            if "pages" in entry:
+                pages, missing = scan_pages(entry["pages"], max_pages)
+            else:
+                # Known broker layout: read just the pages its sections were on last time
+                fingerprint, first_text, known = read_known_sections(source)
+                if known is None:
+                    with closing(iter_page_text(source, first_text)) as stream:
+                        pages, missing = scan_pages(stream, max_pages)
+                    index_layout(fingerprint, pages)
+            if known is not None:
+                pages = known
+                print(f"📄 Known layout: read pages {', '.join(map(str, pages))}")
+            elif missing:
+                print(f"📄 Early scan stopped after {len(pages)} pages; no evidence for: {', '.join(sorted(missing))}")
+            else:
+                print(f"📄 Early scan covered every field in {len(pages)} pages")
+            payload = build_payload(_with_tables(source, pages, settings_list, keywords), token_budget) or None
+
+        if payload is None:
+            if "pages" not in entry:
+                entry["pages"] = _read_pages(source, workers)
+            full = _with_tables(source, entry["pages"], settings_list, keywords)
+            payload = build_payload(full, token_budget) or head_payload(full, token_budget)
+
+        payloads[mode] = payload
+        if "pages" not in entry:
+            # Early scans keep what they read, so a payload cache hit can still hand back its pages
+            read = known if known is not None else dict(enumerate(pages, start=1))
+            entry.setdefault("read", {})[mode] = sorted(read.items())
+        _save_entry(key, entry)
+        return (payload, _pages_read(entry, mode)) if with_pages else payload
     else:
-        raise TypeError(f"Expected str or Path, got {type(source)}")
+        raise TypeError(f"Expected str, Path or bytes, got {type(source)}")
 
 def parse_deal(*, plain_text: Optional[str] = None, pdf_path: Optional[Path] = None) -> dict:
     """
@@ -0,0 +1,314 @@
+"""
+Rule-based extraction of the scorecard fields that OMs and broker e-mails
+state outright, usually as labelled "Key: Value" lines ("Lot Size: 0.83
+Acres", "Lease Type: Absolute NNN", "Annual Rent: $120,000").
+
+Every rule returns a value in the same shape GPT would (see
+build_scorecard.FIELD_PROMPTS) plus a confidence between 0 and 1. Fields at
+or above FAST_PATH_MIN_CONFIDENCE (default 0.8) are taken as resolved and
+left out of the GPT request; when every field resolves, GPT is not called.
+Only a value read from a line labelled for its field, with nothing
+ambiguous about it, scores that high. Guesses from running text ("near 30
+restaurants", "multi-tenant" somewhere in the OM) score INLINE, below the
+threshold, so GPT still decides those fields.
+"""
+import os
+import re
+from datetime import datetime
+from typing import Optional
+
+FAST_PATH_MIN_CONFIDENCE = float(os.getenv("FAST_PATH_MIN_CONFIDENCE", "0.8"))
+
+# Confidence of a value read from a line labelled for that field vs. one found in running text
+# (INLINE must stay below FAST_PATH_MIN_CONFIDENCE: such guesses never stand in for GPT)
+LABELLED = 0.95
+INLINE = 0.6
+WEAK = 0.5
+
+SQFT_PER_ACRE = 43560
+
+_NUMBER = r"(\d{1,3}(?:,\d{3})+|\d+)(?:\.(\d+))?"
+_STATES = ("AL AK AZ AR CA CO CT DE DC FL GA HI ID IL IN IA KS KY LA ME MD MA MI MN MS MO MT NE NV NH NJ "
+           "NM NY NC ND OH OK OR PA RI SC SD TN TX UT VT VA WA WV WI WY").split()
+_CITY_STATE_ZIP = re.compile(
+    r"^(?P<line1>.+?),\s*(?P<city>[A-Za-z .'-]+?),?\s+(?P<state>[A-Z]{2})\.?\s+(?P<zip>\d{5})(?:-\d{4})?\b")
+
+_RESTAURANT = re.compile(r"\b(restaurant|QSR|quick[- ]service|fast[- ]food|fast casual|casual dining|diner|"
+                         r"pizza|burger|coffee|caf[eé]|drive[- ]?thr(?:u|ough))\b", re.I)
+_AUTO = re.compile(r"\b(auto(?:motive)?|tire|car wash|collision|oil change|lube|auto parts|transmission)\b", re.I)
+_MEDICAL = re.compile(r"\b(medical|dental|dentist|clinic|urgent care|veterinar\w*|dialysis|physical therapy|"
+                      r"orthodont\w*|optometr\w*|health ?care)\b", re.I)
+
+_MONTHS = "january february march april may june july august september october november december".split()
+
+
+def labelled_values(text: str, *labels: str) -> list[str]:
+    """Values of every "Label: value" line (also "Label - value") for any of ``labels``, in order."""
+    pattern = re.compile(r"^[ \t•*-]*(?:" + "|".join(labels) + r")\s*(?:\([^)]*\))?\s*[:\-–—]\s*(.+?)\s*$",
+                         re.I | re.M)
+    return [m.group(1) for m in pattern.finditer(text)]
+
+
+def _to_number(match: re.Match) -> float | int:
+    whole = match.group(1).replace(",", "")
+    return float(f"{whole}.{match.group(2)}") if match.group(2) else int(whole)
+
+
+def split_address(address: str) -> Optional[dict]:
+    """{"Line 1", "City", "State", "Zip"} from "123 Main St, Cedar Rapids, IA 52404"; None if it doesn't parse."""
+    match = _CITY_STATE_ZIP.match(address.strip())
+    if not match or match.group("state") not in _STATES:
+        return None
+    return {"Line 1": match.group("line1").strip(), "City": match.group("city").strip(),
+            "State": match.group("state"), "Zip": match.group("zip")}
+
+
+def normalize_date(value: str) -> Optional[str]:
+    """A lease date in a form calculate_remaining_term understands ("06/30/2035" or "June 2035")."""
+    value = value.strip().rstrip(".")
+    for fmt in ("%B %d, %Y", "%b %d, %Y", "%B %d %Y", "%m/%d/%Y", "%m/%d/%y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(value, fmt).strftime("%m/%d/%Y")
+        except ValueError:
+            pass
+    match = re.fullmatch(r"([A-Za-z]+)\.? (\d{4})", value)
+    if match:
+        month = next((m for m in _MONTHS if m.startswith(match.group(1).lower()[:3])), None)
+        if month:
+            return f"{month.title()} {match.group(2)}"
+    match = re.fullmatch(r"(\d{1,2})/(\d{4})", value)
+    if match and 1 <= int(match.group(1)) <= 12:
+        return value
+    return None
+
+
+#################################################
+# Field rules: text -> (value, confidence)      #
+#################################################
+
+def _address(text: str):
+    for value in labelled_values(text, "Address", "Property Address", "Site Address", "Location"):
+        parts = split_address(value)
+        if parts:
+            return parts, LABELLED
+    # An unlabelled "street, city, ST 12345" line
+    for line in text.splitlines():
+        parts = split_address(line)
+        if parts and re.match(r"\d+\s", parts["Line 1"]):
+            return parts, INLINE
+    return None, 0.0
+
+
+def _acreage(text: str):
+    for value in labelled_values(text, "Acreage", "Lot Size", "Land Area", "Parcel Size", "Site Size",
+                                 "Land Size", "Site Area", "Lot Area"):
+        acres = re.search(_NUMBER + r"\s*(?:\+/-\s*)?(?:acres?|ac)\b", value, re.I)
+        if acres:
+            return _to_number(acres), LABELLED
+        sqft = re.search(_NUMBER + r"\s*(?:SF|sq\.? ?ft|square feet)", value, re.I)
+        if sqft:
+            return round(_to_number(sqft) / SQFT_PER_ACRE, 2), LABELLED - 0.1
+    found = {_to_number(m) for m in re.finditer(_NUMBER + r"\s*(?:\+/-\s*)?acres?\b", text, re.I)}
+    if len(found) == 1:
+        return found.pop(), INLINE
+    return None, 0.0
+
+
+def _box_size(text: str):
+    for value in labelled_values(text, "GLA", "Building Size", "Building SF", "Building Area", "Rentable Area",
+                                 "Gross Leasable Area", "Square Footage", "Box Size"):
+        match = re.search(_NUMBER, value)
+        if match:
+            return f"{match.group(0)} SF", LABELLED
+    return None, 0.0
+
+
+def _year_built(text: str):
+    for value in labelled_values(text, "Year Built", "Built", "Year Constructed", "Constructed",
+                                 "Year Built / Renovated", "Year Built/Renovated"):
+        match = re.search(r"\b(19\d{2}|20\d{2})\b", value)
+        if match:
+            return int(match.group(1)), LABELLED
+    match = re.search(r"\b(?:built|constructed) in (19\d{2}|20\d{2})\b", text, re.I)
+    if match:
+        return int(match.group(1)), INLINE
+    return None, 0.0
+
+
+# "$32.50 PSF", "$32.50/SF", "$32.50 per square foot" are rates, not the rent
+_PER_SF = re.compile(r"\s*(?:PSF\b|/\s*(?:SF|sq\.? ?ft)\b|per\s+(?:SF\b|sq\.? ?ft|square f(?:oo|ee)t))", re.I)
+
+
+def _absolute_rent(text: str):
+    # Annual figures first: an OM listing "Base Rent: $32.50 PSF" above "Annual Rent: $120,000" means the latter
+    for labels, confidence in ((("Annual Rent", "Annual Base Rent", "Current Annual Rent"), LABELLED),
+                               (("Base Rent", "Current Rent", "Rent"), LABELLED),
+                               (("NOI", "Net Operating Income"), INLINE)):
+        for value in labelled_values(text, *labels):
+            match = next((m for m in re.finditer(r"\$\s*" + _NUMBER, value)
+                          if not _PER_SF.match(value, m.end())), None)
+            if not match:
+                continue
+            rent = _to_number(match)
+            if re.search(r"month|/\s*mo\b", value, re.I):
+                rent = rent * 12
+            return rent, confidence
+    return None, 0.0
+
+
+def _lease_structure(text: str):
+    for value in labelled_values(text, "Lease Type", "Lease Structure", "Lease"):
+        lower = value.lower()
+        if "master lease" in lower:
+            return "Master Lease", LABELLED
+        if re.search(r"\bnnn\b|triple[- ]net|absolute[- ]net|\babsolute\b", lower):
+            return "NNN", LABELLED
+        if re.search(r"\bnn\b|double[- ]net", lower):
+            return "NN", LABELLED
+        if re.search(r"gross|modified", lower):
+            return value, INLINE
+    return None, 0.0
+
+
+def _lease_term(text: str):
+    for value in labelled_values(text, "Lease Expiration", "Lease Expiration Date", "Expiration",
+                                 "Expiration Date", "Lease End", "Lease End Date", "Term Expiration",
+                                 "Lease Term Expiration"):
+        date = normalize_date(value)
+        if date:
+            return {"expiration_date": date, "remaining_years": None}, LABELLED
+    for value in labelled_values(text, "Lease Term Remaining", "Remaining Lease Term", "Remaining Term",
+                                 "Term Remaining", "Years Remaining"):
+        match = re.search(r"(\d+(?:\.\d+)?)\s*(?:years|yrs)", value, re.I)
+        if match:
+            return match.group(1), LABELLED - 0.05
+    # "Lease Term: 15 years remaining"; a bare "Lease Term: 20 years" is the original term, not what is left
+    for value in labelled_values(text, "Lease Term", "Term"):
+        match = re.search(r"(\d+(?:\.\d+)?)\s*(?:years|yrs)\s*(?:remaining|left)\b", value, re.I)
+        if match:
+            return match.group(1), LABELLED - 0.05
+    return None, 0.0
+
+
+def _rent_growth(text: str):
+    for value in labelled_values(text, "Rent Increases", "Rent Increase", "Rent Escalations", "Escalations",
+                                 "Rent Bumps", "Increases", "Rent Growth", "Rental Increases"):
+        match = re.search(r"(\d+(?:\.\d+)?)\s*%\s*(?:every|each|/)\s*(\d+)\s*(?:years|yrs)", value, re.I)
+        if match:
+            annual = float(match.group(1)) / int(match.group(2))
+            return f"{annual:g}% annually", LABELLED
+        match = re.search(r"(\d+(?:\.\d+)?)\s*%\s*(?:annual|annually|per year|yearly|/\s*yr)", value, re.I)
+        if match:
+            return f"{float(match.group(1)):g}% annually", LABELLED
+        if re.search(r"\b(none|flat|no increases)\b", value, re.I):
+            return "0% annually", LABELLED
+    return None, 0.0
+
+
+def _current_tenant(text: str):
+    for value in labelled_values(text, "Tenant", "Current Tenant", "Lessee", "Concept", "Brand", "Tenant Name"):
+        name = re.sub(r"\s*\(.*?\)\s*", " ", value).strip(" .,")
+        if not name:
+            continue
+        # The prompt prefers the brand over the operator's legal entity
+        if re.search(r"\b(LLC|L\.L\.C|Inc|Corp|Corporation|LP|Holdings|Enterprises)\b\.?", name):
+            return name, WEAK
+        return name, LABELLED
+    return None, 0.0
+
+
+def _single_tenant(text: str):
+    for value in labelled_values(text, r"Single[- ]Tenant\??", "Tenancy", "Occupancy"):
+        if re.match(r"\s*(yes|y|true|single)\b", value, re.I):
+            return "Yes", LABELLED
+        if re.match(r"\s*(no|n|false|multi)\b", value, re.I):
+            return "No", LABELLED
+    single = re.search(r"\bsingle[- ]tenant\b|\bfree[- ]?standing\b", text, re.I)
+    multi = re.search(r"\bmulti[- ]tenant\b|\bstrip (?:center|mall)\b|\binline\b", text, re.I)
+    if single and not multi:
+        return "Yes", INLINE
+    if multi and not single:
+        return "No", INLINE
+    return None, 0.0
+
+
+def _restaurant_auto_medical(text: str):
+    def matches(s: str) -> int:
+        return sum(len(p.findall(s)) for p in (_RESTAURANT, _AUTO, _MEDICAL))
+
+    for value in labelled_values(text, r"Restaurant\s*/\s*Auto\s*/\s*Medical\??"):
+        if re.match(r"\s*(yes|y|true)\b", value, re.I):
+            return "Yes", LABELLED
+        if re.match(r"\s*(no|n|false)\b", value, re.I):
+            return "No", LABELLED
+    for value in labelled_values(text, "Property Type", "Use", "Tenant Type", "Concept", "Asset Type"):
+        if matches(value):
+            return "Yes", LABELLED
+    # One passing mention ("close to several restaurants") is not enough
+    if matches(text) >= 2:
+        return "Yes", INLINE
+    return None, 0.0
+
+
+def _drive_thru(text: str):
+    for value in labelled_values(text, "Drive[- ]?Thru", "Drive[- ]?Through"):
+        if re.match(r"\s*(yes|y|true|included|dual)\b", value, re.I):
+            return "QSR", LABELLED
+    for value in labelled_values(text, "Carry[- ]?out", "Carryout", "Take[- ]?out"):
+        if re.match(r"\s*(yes|y|true|included)\b", value, re.I):
+            return "CDR", LABELLED
+    if re.search(r"\bdrive[- ]?thr(?:u|ough)\b", text, re.I) and _RESTAURANT.search(text):
+        return "QSR", INLINE
+    if (_AUTO.search(text) or _MEDICAL.search(text)) and not _RESTAURANT.search(text):
+        return "NA", INLINE
+    return None, 0.0
+
+
+def _national_locations(text: str):
+    for value in labelled_values(text, "Number of Locations", "National Locations", "Locations", "Units",
+                                 "Number of National Locations", "Store Count"):
+        match = re.search(_NUMBER, value)
+        if match:
+            return _to_number(match), LABELLED
+    counts = [_to_number(m) for m in re.finditer(
+        _NUMBER + r"\+?\s+(?:locations|restaurants|units|stores|clinics|shops|outlets)\b", text, re.I)]
+    counts = [c for c in counts if c >= 10]
+    if counts:
+        return max(counts), INLINE
+    return None, 0.0
+
+
+FIELD_RULES = {
+    "Lease Structure": _lease_structure,
+    "Lease Term": _lease_term,
+    "Absolute Rent": _absolute_rent,
+    "Rent Growth": _rent_growth,
+    "Acreage": _acreage,
+    "Restaurant/Auto/Medical?": _restaurant_auto_medical,
+    "Single Tenant?": _single_tenant,
+    "Drive-Thru (QSR) / Carry-out (CDR)": _drive_thru,
+    "Box Size": _box_size,
+    "Address": _address,
+    "Year Built": _year_built,
+    "Current Tenant": _current_tenant,
+    "Number of National Locations": _national_locations,
+}
+
+
+def extract_known_fields(text: str) -> dict[str, tuple]:
+    """{field: (value, confidence)} for every field in FIELD_RULES (value None, confidence 0 if not found)."""
+    return {field: rule(text) for field, rule in FIELD_RULES.items()}
+
+
+def resolve_fields(text: str, min_confidence: Optional[float] = None) -> tuple[dict, dict[str, float]]:
+    """
+    Run every rule over ``text``.
+
+    Returns:
+        (resolved values, {field: confidence} for every field)
+    """
+    min_confidence = FAST_PATH_MIN_CONFIDENCE if min_confidence is None else min_confidence
+    guesses = extract_known_fields(text)
+    resolved = {field: value for field, (value, confidence) in guesses.items()
+                if value is not None and confidence >= min_confidence}
+    return resolved, {field: confidence for field, (_, confidence) in guesses.items()}
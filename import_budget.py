@@ -0,0 +1,99 @@
+"""
+Import-time budget for the scorecard modules.
+
+Each module is imported in a fresh interpreter under ``python -X importtime``
+(best of --repeats runs). A module fails its budget when its cumulative import
+time is over the limit, or when importing it loads one of the heavy
+dependencies (pdfplumber, openai, boto3/botocore, openpyxl...) that the code only
+imports on first use. The second check is the one that catches regressions
+reliably; the millisecond limits have ~2x headroom over a warm laptop.
+
+scorecard_app_v2.py is not checked: importing it runs the Streamlit page.
+
+Usage:
+    python import_budget.py                 # exit 1 if any budget is exceeded
+    python import_budget.py --top 5         # also list each module's slowest imports
+    python import_budget.py --scale 2       # double every limit (slow CI machines)
+"""
+import argparse
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Optional
+
+# Loaded on first use only: a scoring caller or an e-mail run must not pay for them
+HEAVY_MODULES = ("pdfplumber", "pdfminer", "openai", "httpx", "boto3", "botocore", "s3transfer",
+                 "openpyxl", "pandas", "numpy", "altair")
+
+# Cumulative import-time limit (ms) per module, and heavy modules it is allowed to load
+BUDGETS = {
+    "score_rules": (10, ()),
+    "fast_extract": (20, ()),
+    "extractor": (150, ()),
+    "build_scorecard": (250, ()),
+    "deal_store": (250, ()),
+    "job_queue": (250, ()),
+    "batch_scorecard": (250, ()),
+    "portfolio_export": (500, ("openpyxl", "numpy")),  # openpyxl loads numpy when installed
+}
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)")
+
+
+def measure(module: str) -> tuple[float, dict[str, float]]:
+    """(cumulative ms of ``import module``, {every module it loaded: self ms})."""
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                         capture_output=True, text=True, cwd=Path(__file__).resolve().parent)
+    if out.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{out.stderr[-2000:]}")
+    # Children are listed before their parent; a top-level entry that is not
+    # ``module`` closes a block of interpreter startup imports
+    block, loaded, total = {}, {}, None
+    for line in out.stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        block[name] = int(self_us) / 1000
+        if len(indent) == 1:
+            if name == module:
+                total, loaded = int(cumulative_us) / 1000, block
+            block = {}
+    if total is None:
+        raise RuntimeError(f"import {module}: already imported at interpreter startup?")
+    return total, loaded
+
+
+def check(module: str, allowed: tuple, repeats: int) -> tuple[float, list[str], dict]:
+    """(best cumulative ms, heavy modules it should not have loaded, loaded modules of the best run)."""
+    best, loaded = min((measure(module) for _ in range(repeats)), key=lambda r: r[0])
+    heavy = sorted({name.split(".")[0] for name in loaded
+                    if name.split(".")[0] in HEAVY_MODULES and name.split(".")[0] not in allowed})
+    return best, heavy, loaded
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check the import-time budget of the scorecard modules.")
+    parser.add_argument("modules", nargs="*", help="Only check these modules (default: every budgeted one)")
+    parser.add_argument("--repeats", type=int, default=3, help="Fresh imports per module; the fastest counts")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every time limit by this")
+    parser.add_argument("--top", type=int, default=0, help="List this many of each module's slowest imports")
+    args = parser.parse_args(argv)
+
+    failures = 0
+    for module in args.modules or BUDGETS:
+        limit_ms, allowed = BUDGETS.get(module, (float("inf"), ()))
+        limit_ms *= args.scale
+        total, heavy, loaded = check(module, allowed, args.repeats)
+        ok = total <= limit_ms and not heavy
+        failures += not ok
+        print(f"{'✅' if ok else '❌'} {module}: {total:.1f}ms (budget {limit_ms:g}ms)"
+              + (f", loads {', '.join(heavy)}" if heavy else ""))
+        for name, ms in sorted(loaded.items(), key=lambda kv: -kv[1])[:args.top]:
+            print(f"     {ms:8.1f}ms  {name}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,292 @@
+"""
+Background scorecard jobs for the Streamlit app.
+
+Clicking "Extract + Build" enqueues a job instead of running the pipeline in
+the session's script thread. Jobs are kept in a local SQLite queue (so queued
+work survives a restart) and run by a fixed number of worker threads shared
+by every session (JOB_WORKERS, default 2), so a rush of uploads queues up
+instead of piling work onto the server.
+
+While a job runs, each finished pipeline stage (see tracing.py) and each
+extracted field (as GPT's answer streams in) is written to its row, so the UI
+can poll ``get_jobs`` for per-stage progress and show fields as they arrive.
+Finished deals go into the deal store (deal_store.py) and show up in the history.
+Workers only extract and score; the workbook is built from the stored deal
+when someone asks to download it.
+
+A running job records which process runs it, and that process refreshes the
+job's heartbeat every JOB_HEARTBEAT_SECONDS. Only jobs whose heartbeat is
+older than JOB_STALE_SECONDS (their process died mid-job) are queued again,
+so several app processes can share one queue.
+
+    job_id = enqueue(pdf_bytes, "Taco Bell OM")
+    get_jobs([job_id])  # [{"status": "running", "stage": "load_payload", "progress": 0.3, ...}]
+"""
+from __future__ import annotations
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+from build_scorecard import extract_source_fields
+from cache import CACHE_ROOT
+from clients import get_openai_client
+from deal_store import add_missing_columns, model_filename, save_deal
+from search_index import index_in_background
+from tracing import span, tracing
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+JOB_QUEUE_PATH = Path(os.getenv("JOB_QUEUE_PATH", CACHE_ROOT / "jobs.sqlite3"))
+JOB_INPUT_DIR = CACHE_ROOT / "job_inputs"
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", "10"))
+JOB_STALE_SECONDS = float(os.getenv("JOB_STALE_SECONDS", "60"))
+
+# This process, as recorded on the jobs it runs
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+# Top-level pipeline stages in the order they finish (stages that do not run, e.g.
+# llm_call when every field came from the fast path, are simply skipped)
+JOB_STAGES = ["load_payload", "fast_path", "llm_call", "post_processing", "normalize_fields", "scoring"]
+
+# Page progress is written at most this often while a PDF is being read
+_PAGE_PROGRESS_SECONDS = 0.5
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    status TEXT NOT NULL DEFAULT 'queued',
+    source_name TEXT NOT NULL,
+    input_path TEXT NOT NULL,
+    options TEXT NOT NULL,
+    stage TEXT,
+    stages_done INTEGER NOT NULL DEFAULT 0,
+    pages_read INTEGER NOT NULL DEFAULT 0,
+    fields TEXT,
+    spans TEXT,
+    deal_id INTEGER,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    owner TEXT,
+    worker TEXT,
+    heartbeat_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id);
+"""
+
+# Columns added after the first release, created on databases that predate them
+_ADDED_COLUMNS = {"owner": "TEXT", "worker": "TEXT", "heartbeat_at": "REAL"}
+
+_ready: set[Path] = set()
+_ready_lock = threading.Lock()
+
+
+def connect(path: Optional[Path] = None) -> sqlite3.Connection:
+    """Connection to the queue, creating the table on first use."""
+    path = JOB_QUEUE_PATH if path is None else Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    with _ready_lock:
+        if path not in _ready:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            add_missing_columns(conn, "jobs", _ADDED_COLUMNS)
+            _ready.add(path)
+    return conn
+
+
+def _update(job_id: int, **values) -> None:
+    columns = ", ".join(f"{name} = ?" for name in values)
+    with closing(connect()) as conn, conn:
+        conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*values.values(), job_id))
+
+
+def enqueue(source: str | bytes, source_name: str, *, use_cache: bool = True, full_scan: bool = False,
+            owner: Optional[str] = None) -> int:
+    """
+    Queue one e-mail body (str) or PDF (bytes) and return the job id.
+
+    The input is saved under JOB_INPUT_DIR until the job has run; the deal it
+    produces is stored under ``owner`` (see deal_store.list_deals).
+    """
+    JOB_INPUT_DIR.mkdir(parents=True, exist_ok=True)
+    options = json.dumps({"use_cache": use_cache, "full_scan": full_scan})
+    with closing(connect()) as conn, conn:
+        job_id = conn.execute(
+            "INSERT INTO jobs (source_name, input_path, options, created_at, owner) VALUES (?, '', ?, ?, ?)",
+            (source_name, options, time.time(), owner),
+        ).lastrowid
+        input_path = JOB_INPUT_DIR / f"{job_id}.{'txt' if isinstance(source, str) else 'pdf'}"
+        if isinstance(source, str):
+            input_path.write_text(source, encoding="utf-8")
+        else:
+            input_path.write_bytes(source)
+        conn.execute("UPDATE jobs SET input_path = ? WHERE id = ?", (str(input_path), job_id))
+    _wake.set()
+    return job_id
+
+
+def _job(row: sqlite3.Row) -> dict:
+    job = dict(row)
+    job["options"] = json.loads(job["options"])
+    job["fields"] = json.loads(job["fields"]) if job["fields"] else None
+    job["spans"] = json.loads(job["spans"]) if job["spans"] else []
+    job["progress"] = 1.0 if job["status"] == "done" else job["stages_done"] / len(JOB_STAGES)
+    return job
+
+
+def get_jobs(job_ids: list[int]) -> list[dict]:
+    """Current state of the given jobs, in the order given (unknown ids are left out)."""
+    if not job_ids:
+        return []
+    with closing(connect()) as conn:
+        rows = conn.execute(f"SELECT * FROM jobs WHERE id IN ({', '.join('?' * len(job_ids))})",
+                            list(job_ids)).fetchall()
+    jobs = {row["id"]: _job(row) for row in rows}
+    return [jobs[i] for i in job_ids if i in jobs]
+
+
+def queue_position(job_id: int) -> int:
+    """How many queued jobs are ahead of this one."""
+    with closing(connect()) as conn:
+        return conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND id < ?",
+                            (job_id,)).fetchone()[0]
+
+
+def _claim() -> Optional[sqlite3.Row]:
+    """Take the oldest queued job, marking it running here (atomic across threads and processes)."""
+    now = time.time()
+    with closing(connect()) as conn, conn:
+        return conn.execute(
+            "UPDATE jobs SET status = 'running', started_at = ?, worker = ?, heartbeat_at = ? "
+            "WHERE id = (SELECT id FROM jobs WHERE status = 'queued' ORDER BY id LIMIT 1) "
+            "RETURNING *",
+            (now, WORKER_ID, now),
+        ).fetchone()
+
+
+def heartbeat() -> None:
+    """Mark every job this process is running as still alive."""
+    with closing(connect()) as conn, conn:
+        conn.execute("UPDATE jobs SET heartbeat_at = ? WHERE status = 'running' AND worker = ?",
+                     (time.time(), WORKER_ID))
+
+
+def requeue_stale(stale_seconds: Optional[float] = None) -> int:
+    """Queue again the running jobs whose process stopped sending heartbeats; returns how many."""
+    stale_seconds = JOB_STALE_SECONDS if stale_seconds is None else stale_seconds
+    with closing(connect()) as conn, conn:
+        return conn.execute(
+            "UPDATE jobs SET status = 'queued', stage = NULL, stages_done = 0, pages_read = 0, fields = NULL, "
+            "worker = NULL, heartbeat_at = NULL "
+            "WHERE status = 'running' AND (heartbeat_at IS NULL OR heartbeat_at < ?)",
+            (time.time() - stale_seconds,),
+        ).rowcount
+
+
+class _Progress:
+    """Trace listener writing a running job's finished stages (and, via ``field``, its fields) to its row."""
+
+    def __init__(self, job_id: int):
+        self.job_id = job_id
+        self.pages = 0
+        self.written = 0.0
+        self.fields = {}
+
+    def field(self, name: str, value) -> None:
+        self.fields[name] = value
+        _update(self.job_id, fields=json.dumps(self.fields, default=str))
+
+    def __call__(self, span: dict) -> None:
+        if span["name"] == "page_text":
+            self.pages += 1
+            if time.monotonic() - self.written >= _PAGE_PROGRESS_SECONDS:
+                self.written = time.monotonic()
+                _update(self.job_id, pages_read=self.pages)
+        elif span["depth"] == 0 and span["name"] in JOB_STAGES:
+            _update(self.job_id, stage=span["name"], stages_done=JOB_STAGES.index(span["name"]) + 1,
+                    pages_read=self.pages)
+
+
+def run_job(job: sqlite3.Row | dict, client: Optional[OpenAI] = None) -> None:
+    """Extract and score one queued job's deal and store it (the workbook is only built on download)."""
+    input_path = Path(job["input_path"])
+    options = json.loads(job["options"]) if isinstance(job["options"], str) else job["options"]
+    try:
+        source = input_path.read_text(encoding="utf-8") if input_path.suffix == ".txt" else input_path.read_bytes()
+        progress = _Progress(job["id"])
+        with tracing(progress) as trace:
+            fields, _, pages = extract_source_fields(source, client=client or get_openai_client(),
+                                                     use_cache=options["use_cache"], full_scan=options["full_scan"],
+                                                     on_field=progress.field)
+            with span("scoring"):
+                deal_id = save_deal(fields, model_filename(fields), source=job["source_name"], owner=job["owner"])
+        index_in_background(source, fields, job["source_name"], pages)
+        _update(job["id"], status="done", fields=json.dumps(fields, default=str),
+                spans=json.dumps(trace.to_list()), deal_id=deal_id, finished_at=time.time())
+    except Exception as e:
+        print(f"❌ Job {job['id']} ({job['source_name']}) failed: {e}")
+        _update(job["id"], status="error", error=str(e), finished_at=time.time())
+    finally:
+        input_path.unlink(missing_ok=True)
+
+
+_wake = threading.Event()
+_workers: list[threading.Thread] = []
+_workers_lock = threading.Lock()
+
+
+def _work() -> None:
+    while True:
+        job = _claim()
+        if job is None:
+            # Idle: sleep until something is enqueued (or re-check now and then
+            # for jobs queued by another process)
+            _wake.wait(timeout=2)
+            _wake.clear()
+            continue
+        run_job(job)
+
+
+def _monitor() -> None:
+    """Send this process's heartbeats and requeue jobs whose process has died."""
+    while True:
+        time.sleep(JOB_HEARTBEAT_SECONDS)
+        try:
+            heartbeat()
+            if requeue_stale():
+                _wake.set()
+        except sqlite3.Error as e:
+            print(f"⚠️ Job heartbeat failed: {e}")
+
+
+def start_workers(count: Optional[int] = None) -> None:
+    """
+    Start the shared worker threads (once per process; later calls do nothing).
+
+    Jobs left "running" by a process that stopped mid-job are queued again once
+    their heartbeat goes stale; jobs other live processes are running are left alone.
+    """
+    with _workers_lock:
+        if _workers:
+            return
+        requeue_stale()
+        monitor = threading.Thread(target=_monitor, name="scorecard-job-heartbeat", daemon=True)
+        monitor.start()
+        _workers.append(monitor)
+        for n in range(JOB_WORKERS if count is None else count):
+            worker = threading.Thread(target=_work, name=f"scorecard-job-{n + 1}", daemon=True)
+            worker.start()
+            _workers.append(worker)
@@ -0,0 +1,88 @@
+"""
+Incremental parser for a JSON object that arrives in pieces (a streamed GPT answer).
+
+Feed it the text as it comes in; every top-level member is handed back as
+soon as its value is complete: a string at its closing quote, an object or
+array at its closing bracket, a number / true / false / null at the comma
+or brace after it.
+
+    parser = JSONObjectStream()
+    parser.feed('{"Acreage": "1.2')   # []
+    parser.feed('5", "Box Size": 2')  # [("Acreage", "1.25")]
+    parser.feed('400}')               # [("Box Size", 2400)]
+
+Only the scanner state is kept between calls, so each character is looked at
+once. A member that does not parse on its own is skipped; whether the whole
+answer is valid JSON is for the caller to check once the stream ends.
+"""
+import json
+
+
+class JSONObjectStream:
+    """Top-level members of one streamed JSON object, reported as they complete."""
+
+    def __init__(self):
+        self.text = ""
+        self.done = False
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member_start = None  # just after the "{" or "," opening the current member
+        self._value = None         # None (no value yet), "string", "container", "scalar" or "reported"
+
+    def _report(self, end: int, found: list) -> None:
+        self._value = "reported"
+        try:
+            member = json.loads("{" + self.text[self._member_start:end] + "}")
+        except ValueError:
+            return
+        found.extend(member.items())
+
+    def feed(self, chunk: str) -> list[tuple[str, object]]:
+        """Add the next piece of text; returns the (key, value) members it completed."""
+        self.text += chunk
+        found = []
+        text = self.text
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._value == "string":
+                        self._report(i + 1, found)
+                continue
+            if ch == '"':
+                self._in_string = True
+                if self._depth == 1 and self._value == "":
+                    self._value = "string"
+            elif ch in "{[":
+                self._depth += 1
+                if self._depth == 1:
+                    self._member_start = i + 1
+                elif self._depth == 2 and self._value == "":
+                    self._value = "container"
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 1 and self._value == "container":
+                    self._report(i + 1, found)
+                elif self._depth == 0:
+                    if self._value == "scalar":
+                        self._report(i, found)
+                    self.done = True
+            elif self._depth == 1:
+                if ch == ":":
+                    self._value = ""  # a value comes next
+                elif ch == ",":
+                    if self._value == "scalar":
+                        self._report(i, found)
+                    self._member_start = i + 1
+                    self._value = None
+                elif self._value == "" and not ch.isspace():
+                    self._value = "scalar"
+        self._pos = len(text)
+        return found
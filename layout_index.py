@@ -0,0 +1,50 @@
+"""
+Index of known OM layouts and the pages their sections sit on.
+
+Decks from the same brokerage template put "PROPERTY OVERVIEW", "RENT ROLL"
+and "TENANT PROFILE" (extractor.TITLE_REGEX) on the same pages every time.
+Each PDF gets a layout fingerprint built from page 1 (brokerage named on it,
+fonts and font sizes used) and the page count. After a scan, the pages where
+each section turned up are stored under that fingerprint, together with the
+fields that had evidence on page 1 and those section pages; the next deck with
+the same fingerprint can be parsed on just those pages (see
+extractor.read_known_sections), with the usual scan as fallback.
+"""
+import os
+import re
+from typing import Optional
+
+from cache import CACHE_ROOT, DiskCache, sha256_text
+from table_settings import BROKER_REGEX
+
+LAYOUT_INDEX = DiskCache(
+    CACHE_ROOT / "layouts",
+    max_bytes=int(os.getenv("LAYOUT_INDEX_MAX_MB", "8")) * 1024 * 1024,
+)
+# Bump when what an entry records changes (v2: "covered" only counts page 1 and the section pages;
+# v3: "Current Tenant" no longer counts as rent evidence)
+_INDEX_VERSION = "3"
+
+# Embedded fonts are named like "ABCDEF+Montserrat-Bold"; the prefix changes per file
+_SUBSET_PREFIX = re.compile(r"^[A-Z]{6}\+")
+
+
+def layout_fingerprint(pdf, first_page_text: str) -> str:
+    """Fingerprint of an open pdfplumber document's layout (not its content)."""
+    page = pdf.pages[0]
+    fonts = sorted({_SUBSET_PREFIX.sub("", c.get("fontname") or "") for c in page.chars})
+    sizes = sorted({round(float(c.get("size") or 0)) for c in page.chars})
+    match = BROKER_REGEX.search(first_page_text)
+    broker = re.sub(r"\s+", " ", match.group(1)).lower() if match else ""
+    return "|".join((broker, ",".join(fonts), ",".join(map(str, sizes)), str(len(pdf.pages))))
+
+
+def known_layout(fingerprint: str) -> Optional[dict]:
+    """{"sections": {title: [page numbers]}, "covered": [fields]} for a layout seen before, else None."""
+    return LAYOUT_INDEX.get(sha256_text(_INDEX_VERSION, fingerprint))
+
+
+def remember_layout(fingerprint: str, sections: dict[str, list[int]], covered: list[str]) -> None:
+    """Store where this layout's sections were found; layouts without any section are not indexed."""
+    if sections:
+        LAYOUT_INDEX.set(sha256_text(_INDEX_VERSION, fingerprint), {"sections": sections, "covered": sorted(covered)})
@@ -0,0 +1,172 @@
+"""
+Deadlines, retries and hedging for GPT calls.
+
+Every chat completion attempt gets its own timeout (LLM_TIMEOUT_SECONDS,
+default 60) and the whole call, retries included, a deadline
+(LLM_DEADLINE_SECONDS, default 180). Retryable failures (429s, timeouts,
+dropped connections, 5xx, and responses that are not a JSON object) are
+retried up to LLM_MAX_RETRIES times with jittered exponential backoff;
+anything else, or running out of retries or time, raises instead of handing
+an empty answer to the scorecard.
+
+With LLM_HEDGE=1 a duplicate request is fired when the first one has not
+answered within the p95 latency seen so far (LLM_HEDGE_DELAY_SECONDS until
+there are enough samples); the first valid response wins.
+
+Every attempt's latency and outcome is recorded in a process-wide
+LatencyStats, which reports p50/p95/p99.
+"""
+import asyncio
+import functools
+import json
+import math
+import os
+import random
+import threading
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from typing import Awaitable, Callable, Optional, TypeVar
+
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+LLM_DEADLINE_SECONDS = float(os.getenv("LLM_DEADLINE_SECONDS", "180"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+LLM_BACKOFF_BASE_SECONDS = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "0.5"))
+LLM_BACKOFF_MAX_SECONDS = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "10"))
+LLM_HEDGE = os.getenv("LLM_HEDGE", "0") == "1"
+LLM_HEDGE_DELAY_SECONDS = float(os.getenv("LLM_HEDGE_DELAY_SECONDS", "10"))
+# Samples needed before the hedge delay follows the measured p95
+LLM_HEDGE_MIN_SAMPLES = 20
+
+T = TypeVar("T")
+
+
+class InvalidResponse(ValueError):
+    """The model answered, but not with a JSON object."""
+
+
+@functools.cache
+def retryable_errors() -> tuple[type[BaseException], ...]:
+    """Exception types worth retrying, RateLimitError first (openai is imported on first use)."""
+    from openai import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+    return (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError, InvalidResponse)
+
+
+def is_retryable(err: BaseException) -> bool:
+    return isinstance(err, retryable_errors())
+
+
+def is_rate_limited(err: BaseException) -> bool:
+    return isinstance(err, retryable_errors()[0])
+
+
+def never_reached_model(err: BaseException) -> bool:
+    """Whether ``err`` means the model never took the request (a 429 or no connection), so no tokens were used."""
+    from openai import APIConnectionError, APITimeoutError, RateLimitError
+    return isinstance(err, (RateLimitError, APIConnectionError)) and not isinstance(err, APITimeoutError)
+
+
+def check_content(content: Optional[str]) -> str:
+    """``content`` if it is a JSON object, else InvalidResponse."""
+    try:
+        data = json.loads(content or "")
+    except ValueError as e:
+        raise InvalidResponse(f"response is not JSON: {e}") from None
+    if not isinstance(data, dict):
+        raise InvalidResponse(f"response is a JSON {type(data).__name__}, not an object")
+    return content
+
+
+def backoff_seconds(attempt: int) -> float:
+    """Full-jitter exponential backoff before retry number ``attempt + 1``."""
+    return random.uniform(0, min(LLM_BACKOFF_MAX_SECONDS, LLM_BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+
+class LatencyStats:
+    """Latency and outcome of the most recent ``size`` attempts."""
+
+    def __init__(self, size: int = 1000):
+        self._samples: deque = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, outcome: str = "ok") -> None:
+        with self._lock:
+            self._samples.append((seconds, outcome))
+
+    def percentile(self, q: float, outcome: Optional[str] = "ok") -> Optional[float]:
+        """``q``-th percentile (0-100, nearest rank) of attempts with ``outcome`` (None: all)."""
+        with self._lock:
+            values = sorted(s for s, o in self._samples if outcome is None or o == outcome)
+        if not values:
+            return None
+        return values[max(0, math.ceil(q / 100 * len(values)) - 1)]
+
+    def summary(self) -> dict:
+        """{"count", "p50", "p95", "p99" (successful attempts, seconds), "outcomes": {outcome: count}}."""
+        with self._lock:
+            outcomes = Counter(o for _, o in self._samples)
+        return {"count": outcomes.get("ok", 0),
+                **{f"p{q}": self.percentile(q) for q in (50, 95, 99)},
+                "outcomes": dict(outcomes)}
+
+    def hedge_delay(self) -> float:
+        """How long to wait before hedging: the p95 once enough attempts succeeded."""
+        with self._lock:
+            ok = sum(1 for _, o in self._samples if o == "ok")
+        if ok < LLM_HEDGE_MIN_SAMPLES:
+            return LLM_HEDGE_DELAY_SECONDS
+        return self.percentile(95)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._samples.clear()
+
+
+_stats = LatencyStats()
+
+
+def get_latency_stats() -> LatencyStats:
+    """The process-wide stats every GPT attempt is recorded in."""
+    return _stats
+
+
+# Sync hedges run the duplicate on a thread; a losing attempt finishes (or times out) on its own
+_hedge_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="llm-hedge")
+
+
+def run_hedged(attempt: Callable[[], T], delay: float) -> tuple[T, bool]:
+    """
+    Run ``attempt``; if it has not finished after ``delay`` seconds, start a second one.
+
+    Returns (first successful result, whether a hedge was fired). Raises the
+    last error if every attempt fails.
+    """
+    first = _hedge_pool.submit(attempt)
+    done, _ = wait([first], timeout=delay)
+    if done:
+        return first.result(), False
+    error = None
+    for future in as_completed([first, _hedge_pool.submit(attempt)]):
+        try:
+            return future.result(), True
+        except Exception as e:
+            error = e
+    raise error
+
+
+async def run_hedged_async(attempt: Callable[[], Awaitable[T]], delay: float) -> tuple[T, bool]:
+    """Async ``run_hedged``; the losing attempt is cancelled."""
+    first = asyncio.ensure_future(attempt())
+    done, _ = await asyncio.wait({first}, timeout=delay)
+    if done:
+        return first.result(), False
+    pending = {first, asyncio.ensure_future(attempt())}
+    error = None
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if task.exception() is None:
+                for other in pending:
+                    other.cancel()
+                return task.result(), True
+            error = task.exception()
+    raise error
@@ -0,0 +1,163 @@
+"""
+Token-budgeted payload builder.
+
+OM text is split into small chunks of consecutive lines, every chunk is scored
+with BM25 against a short query per scorecard field, and the best chunks are
+packed into a token budget. Fields take turns picking their next-best chunk,
+so every field gets its strongest evidence in before any field gets a second
+chunk. Kept chunks go out in document order.
+
+The budget comes from PAYLOAD_TOKEN_BUDGET (default 3000 tokens) and is
+measured with rate_limit.estimate_tokens, the same estimate the GPT rate
+limiter uses.
+"""
+import math
+import os
+import re
+from collections import Counter
+from typing import Optional
+
+from rate_limit import estimate_tokens
+
+PAYLOAD_TOKEN_BUDGET = int(os.getenv("PAYLOAD_TOKEN_BUDGET", "3000"))
+
+# Chunks are runs of consecutive lines within one page, capped at either limit
+CHUNK_MAX_LINES = 3
+CHUNK_MAX_CHARS = 240
+
+# BM25 parameters (the usual defaults)
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# One query per field GPT fills in (keys mirror build_scorecard.REQUIRED_KEYS)
+FIELD_QUERIES = {
+    "Lease Structure": "lease type structure nnn nn absolute net triple landlord responsibilities master",
+    "Lease Term": "lease term expiration expires remaining commencement options years",
+    "Absolute Rent": "annual rent base rent noi net operating income",
+    "Rent Growth": "rent increases escalations bumps growth annually",
+    "Acreage": "acres acreage lot size land area parcel",
+    "Restaurant/Auto/Medical?": "restaurant automotive auto medical clinic dental",
+    "Single Tenant?": "single tenant multi freestanding free standing occupancy",
+    "Drive-Thru (QSR) / Carry-out (CDR)": "drive thru through carry out pickup window",
+    "Box Size": "gla building size square feet sf rentable area",
+    "Address": "address located street city state zip",
+    "Year Built": "year built constructed renovated",
+    "Current Tenant": "tenant lessee guarantor franchisee operator",
+    "Number of National Locations": "locations restaurants units stores nationwide operates",
+}
+
+_WORD = re.compile(r"[a-z0-9]+")
+_DIGITS = re.compile(r"[\d,.$%]+")
+
+
+def _stem(word: str) -> str:
+    # Plural-insensitive matching is all the queries need ("acres" ~ "acre")
+    return word[:-1] if len(word) > 3 and word.endswith("s") and not word.endswith("ss") else word
+
+
+def tokenize(text: str) -> list[str]:
+    return [_stem(w) for w in _WORD.findall(text.lower())]
+
+
+FIELD_TERMS = {field: set(tokenize(query)) for field, query in FIELD_QUERIES.items()}
+
+
+def split_chunks(text: str) -> list[str]:
+    """Runs of consecutive non-empty lines; pages ("\\n\\n"-separated) never share a chunk."""
+    chunks = []
+    for page in text.split("\n\n"):
+        lines, size = [], 0
+        for line in page.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            if lines and (len(lines) >= CHUNK_MAX_LINES or size + len(line) > CHUNK_MAX_CHARS):
+                chunks.append("\n".join(lines))
+                lines, size = [], 0
+            lines.append(line)
+            size += len(line)
+        if lines:
+            chunks.append("\n".join(lines))
+    return chunks
+
+
+def bm25_scores(chunks: list[str], queries: dict[str, set[str]] = FIELD_TERMS) -> dict[str, list[float]]:
+    """{field: BM25 score of every chunk against that field's query terms}."""
+    docs = [Counter(tokenize(chunk)) for chunk in chunks]
+    n = len(docs)
+    if n == 0:
+        return {field: [] for field in queries}
+    lengths = [sum(doc.values()) for doc in docs]
+    avg_len = sum(lengths) / n or 1.0
+
+    df = Counter()
+    for doc in docs:
+        df.update(doc.keys())
+    idf = {term: math.log(1 + (n - count + 0.5) / (count + 0.5)) for term, count in df.items()}
+
+    scores = {}
+    for field, terms in queries.items():
+        field_scores = []
+        for doc, length in zip(docs, lengths):
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_len)
+            score = 0.0
+            for term in terms:
+                tf = doc.get(term)
+                if tf:
+                    score += idf[term] * tf * (BM25_K1 + 1) / (tf + norm)
+            field_scores.append(score)
+        scores[field] = field_scores
+    return scores
+
+
+def rank_payload(text: str, token_budget: Optional[int] = None) -> str:
+    """
+    The most field-relevant parts of ``text`` that fit in ``token_budget`` tokens.
+
+    Returns "" when no chunk matches any field query (the caller decides what
+    to fall back to), and ``text`` unchanged when it already fits the budget.
+    """
+    token_budget = PAYLOAD_TOKEN_BUDGET if token_budget is None else token_budget
+    chunks = split_chunks(text)
+    scores = bm25_scores(chunks)
+
+    # Each field's matching chunks, best first
+    ranked = {field: sorted((i for i, s in enumerate(field_scores) if s > 0), key=lambda i: -field_scores[i])
+              for field, field_scores in scores.items()}
+    if not any(ranked.values()):
+        return ""
+    if estimate_tokens(text) <= token_budget:
+        return text
+
+    costs = [estimate_tokens(chunk) + 1 for chunk in chunks]  # +1 for the joining newline
+    # Repeated boilerplate (the same table or footer on every page) only needs to go in once
+    shapes = [_DIGITS.sub("", chunk.lower()) for chunk in chunks]
+    kept, kept_shapes, used = set(), set(), 0
+    queues = {field: list(order) for field, order in ranked.items() if order}
+    while queues:
+        # One pick per field per round; strongest fields pick first
+        for field in sorted(queues, key=lambda f: -scores[f][queues[f][0]]):
+            queue = queues[field]
+            while queue and (queue[0] in kept or shapes[queue[0]] in kept_shapes
+                             or used + costs[queue[0]] > token_budget):
+                queue.pop(0)
+            if queue:
+                i = queue.pop(0)
+                kept.add(i)
+                kept_shapes.add(shapes[i])
+                used += costs[i]
+        queues = {field: queue for field, queue in queues.items() if queue}
+
+    return "\n".join(chunks[i] for i in sorted(kept))
+
+
+def head_payload(text: str, token_budget: Optional[int] = None) -> str:
+    """Leading chunks of ``text`` up to ``token_budget`` tokens (fallback when nothing ranks)."""
+    token_budget = PAYLOAD_TOKEN_BUDGET if token_budget is None else token_budget
+    kept, used = [], 0
+    for chunk in split_chunks(text):
+        used += estimate_tokens(chunk) + 1
+        if used > token_budget:
+            break
+        kept.append(chunk)
+    return "\n".join(kept) or text[:token_budget * 4]
@@ -0,0 +1,175 @@
+"""
+Side-by-side portfolio workbook for many deals.
+
+Every deal becomes one row of a single summary sheet: its extracted fields,
+each line-item score and comment from ``score_deal``, the total, and
+optionally a link to that deal's own scorecard file. The workbook is written
+with openpyxl's write-only mode, so rows are streamed to disk as they are
+added and memory stays flat no matter how many deals go in.
+"""
+import os
+from pathlib import Path
+from typing import BinaryIO, Iterable, Optional
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.styles import Font
+
+from build_scorecard import SCORECARD_LAYOUT, score_deal
+
+# Extracted fields in column order (Address is flattened to one string)
+PORTFOLIO_FIELDS = [
+    "Current Tenant",
+    "Address",
+    "Restaurant/Auto/Medical?",
+    "Single Tenant?",
+    "Drive-Thru (QSR) / Carry-out (CDR)",
+    "Acreage",
+    "Box Size",
+    "Year Built",
+    "Number of National Locations",
+    "Lease Structure",
+    "Lease Term",
+    "Absolute Rent",
+    "Rent Growth",
+]
+LINK_HEADER = "Scorecard"
+
+
+def format_address(address) -> str:
+    """One-line address ("Line 1 City, State Zip"); non-dict values pass through as text."""
+    if not isinstance(address, dict):
+        return "" if address is None else str(address)
+    return (f"{address.get('Line 1') or ''} {address.get('City') or ''}, "
+            f"{address.get('State') or ''} {address.get('Zip') or ''}").strip(" ,")
+
+
+def _cell_value(value):
+    """Something openpyxl can store: numbers as-is, everything else as clean text."""
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, (list, tuple)):
+        value = ", ".join(str(v) for v in value)
+    return ILLEGAL_CHARACTERS_RE.sub("", str(value))
+
+
+def _hyperlink_formula(target: str, label: str = "Open") -> str:
+    # A HYPERLINK formula keeps nothing per row in memory, unlike cell.hyperlink
+    target = target.replace('"', '""')
+    return f'=HYPERLINK("{target}","{label}")'
+
+
+class PortfolioWriter:
+    """
+    Streams deals into a one-sheet portfolio workbook.
+
+    Use as a context manager (or call close()) so the file is written:
+
+        with PortfolioWriter("Portfolio.xlsx") as portfolio:
+            for result, path in deals:
+                portfolio.add(result, path)
+
+    Args:
+        output: Path or writable binary file for the .xlsx
+        link_files: Add a column linking each row to its per-deal scorecard
+        sheet_title: Name of the summary sheet
+    """
+
+    def __init__(self, output: str | Path | BinaryIO, *, link_files: bool = True,
+                 sheet_title: str = "Portfolio"):
+        self.output = output
+        self.link_files = link_files
+        self.rows = 0
+        # Links are written relative to the portfolio so the folder can be moved as a whole
+        self._link_base = None if hasattr(output, "write") else Path(output).resolve().parent
+
+        self._wb = Workbook(write_only=True)
+        self._ws = self._wb.create_sheet(sheet_title)
+        self._ws.freeze_panes = "B2"
+        self._ws.column_dimensions["A"].width = 28
+
+        header = list(PORTFOLIO_FIELDS)
+        for item in SCORECARD_LAYOUT:
+            header += [f"{item} Score", f"{item} Comment"]
+        header.append("Total Score")
+        if link_files:
+            header.append(LINK_HEADER)
+        bold = Font(bold=True)
+        cells = []
+        for title in header:
+            cell = WriteOnlyCell(self._ws, value=title)
+            cell.font = bold
+            cells.append(cell)
+        self._ws.append(cells)
+
+    def _link(self, scorecard_path: str | Path) -> str:
+        path = Path(scorecard_path)
+        if self._link_base is not None:
+            try:
+                path = Path(os.path.relpath(path.resolve(), self._link_base))
+            except ValueError:
+                pass  # different drive on Windows: keep the absolute path
+        return _hyperlink_formula(path.as_posix())
+
+    def add(self, result: dict, scorecard_path: Optional[str | Path] = None) -> None:
+        """
+        Append one deal.
+
+        Args:
+            result: Normalised fields, as returned by build_scorecard
+            scorecard_path: The deal's own scorecard workbook, if any
+        """
+        row = [_cell_value(format_address(result.get(field)) if field == "Address" else result.get(field))
+               for field in PORTFOLIO_FIELDS]
+        total = 0
+        for score, comment in score_deal(result).values():
+            row += [score, _cell_value(comment)]
+            total += score
+        row.append(total)
+        if self.link_files:
+            row.append(self._link(scorecard_path) if scorecard_path else None)
+        self._ws.append(row)
+        self.rows += 1
+
+    def close(self) -> None:
+        """Write the workbook out. The writer cannot be used afterwards."""
+        if self._wb is not None:
+            self._wb.save(self.output)
+            self._wb = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_portfolio(
+    deals: Iterable[dict | tuple],
+    output: str | Path | BinaryIO,
+    *,
+    link_files: bool = True,
+) -> int:
+    """
+    Write a portfolio workbook from an iterable of deals.
+
+    Args:
+        deals: build_scorecard results, or (result, scorecard path) pairs
+            (anything after the path, e.g. trace spans, is ignored). A
+            generator is consumed lazily, so deals never all sit in memory.
+        output: Path or writable binary file for the .xlsx
+        link_files: Add a column linking each row to its per-deal scorecard
+
+    Returns:
+        int: Number of deal rows written
+    """
+    with PortfolioWriter(output, link_files=link_files) as portfolio:
+        for deal in deals:
+            if isinstance(deal, tuple):
+                # build_scorecard(..., trace=True) results carry the spans as a third item
+                result, path = deal[:2]
+                portfolio.add(result, path)
+            else:
+                portfolio.add(deal)
+    return portfolio.rows
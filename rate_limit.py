@@ -0,0 +1,121 @@
+"""
+Process-wide rate limiter for OpenAI calls.
+
+Two token buckets (requests per minute and tokens per minute) are shared by
+every caller in the process: Streamlit sessions, batch jobs, sync and async
+code alike. State is guarded by a plain threading lock and never held across
+a wait, so callers on different threads or event loops can share it safely.
+
+Callers reserve capacity up front with an estimated token count and settle
+the difference once the response's ``usage`` is known. A bucket may go into
+debt; the caller that pushed it negative waits until it would have refilled.
+"""
+import asyncio
+import os
+import threading
+import time
+from typing import Optional
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for English text (~4 characters per token)."""
+    return max(1, len(text) // 4)
+
+
+class TokenBucket:
+    """Refills continuously at ``capacity`` per ``period`` seconds."""
+
+    def __init__(self, capacity: float, period: float = 60.0):
+        self.capacity = float(capacity)
+        self.rate = self.capacity / period
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Take ``amount`` now and return how long the caller must wait before using it."""
+        self._refill(now)
+        self.level -= amount
+        return 0.0 if self.level >= 0 else -self.level / self.rate
+
+    def credit(self, amount: float, now: float) -> None:
+        """Give back (or, if negative, take more of) capacity after the fact."""
+        self._refill(now)
+        self.level = min(self.capacity, self.level + amount)
+
+
+class RateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute limits shared across threads and event loops.
+
+    Args:
+        rpm: Requests allowed per minute.
+        tpm: Tokens (prompt + completion) allowed per minute.
+    """
+
+    def __init__(self, rpm: float, tpm: float):
+        self._lock = threading.Lock()
+        self._requests = TokenBucket(rpm)
+        self._tokens = TokenBucket(tpm)
+        self._paused_until = 0.0
+
+    def _reserve(self, tokens: int) -> float:
+        with self._lock:
+            now = time.monotonic()
+            wait = max(self._requests.reserve(1, now), self._tokens.reserve(tokens, now))
+            return max(wait, self._paused_until - now)
+
+    def acquire(self, tokens: int) -> None:
+        """Block the calling thread until one request of ``tokens`` fits the limits."""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens: int) -> None:
+        """Async counterpart of ``acquire``; yields to the event loop while waiting."""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def settle(self, estimated: int, actual: Optional[int]) -> None:
+        """Correct the token bucket once the real usage of a request is known."""
+        if actual is None:
+            return
+        with self._lock:
+            self._tokens.credit(estimated - actual, time.monotonic())
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every caller for ``seconds`` (e.g. after a 429 with Retry-After)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """
+    The limiter shared by the whole process.
+
+    Limits come from OPENAI_RPM / OPENAI_TPM (defaults: 500 requests, 30,000 tokens per minute).
+    """
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter(
+                rpm=float(os.getenv("OPENAI_RPM", "500")),
+                tpm=float(os.getenv("OPENAI_TPM", "30000")),
+            )
+        return _limiter
+
+
+def set_rate_limiter(limiter: Optional[RateLimiter]) -> Optional[RateLimiter]:
+    """Replace the process-wide limiter (None: rebuild it from the environment on next use); returns the old one."""
+    global _limiter
+    with _limiter_lock:
+        previous, _limiter = _limiter, limiter
+        return previous
@@ -0,0 +1,132 @@
+"""
+Declarative score bands for the numeric scorecard fields.
+
+Each field is a list of bands ``(lower bound, score, comment template)`` in
+ascending order. A band applies from its lower bound up to the next band's;
+the first band (lower bound None) catches everything below. Bounds are
+inclusive unless wrapped in ``above()``, which makes the value have to
+exceed them. Comment templates are ``str.format`` strings that can use
+``{value}`` (the parsed number) and ``{tenant}``.
+
+NaN compares false against every bound. The original if/elif chains let it
+fall through to their final ``else``, which is the top band for some fields
+and the bottom band for others, and for Box Size is a different band for the
+score than for the comment. NAN_BANDS records where NaN lands for each field.
+
+The tables are compiled at import into sorted bound arrays, so scoring a
+value is a single ``bisect`` that yields both the score and the comment.
+Adding a building type to the rent ladders is a data change in RENT_BANDS.
+"""
+import math
+from bisect import bisect_right
+
+
+def above(bound: float) -> float:
+    """Exclusive lower bound: ``value >= above(b)`` is exactly ``value > b``."""
+    return math.nextafter(bound, math.inf)
+
+
+class ScoreTable:
+    """
+    A compiled band table.
+
+    Attributes:
+        bounds: Inclusive lower bounds of every band after the first
+        scores: Score of each band
+        comments: Comment template of each band
+        nan: (band whose score, band whose comment) a NaN value gets; default the last band
+    """
+
+    def __init__(self, bands: list[tuple], nan: tuple[int, int] = (-1, -1)):
+        if bands[0][0] is not None:
+            raise ValueError("First band must have lower bound None")
+        self.bounds = [float(lower) for lower, _, _ in bands[1:]]
+        if self.bounds != sorted(self.bounds):
+            raise ValueError("Bands must be in ascending order")
+        self.scores = [score for _, score, _ in bands]
+        self.comments = [comment for _, _, comment in bands]
+        self.nan = nan
+
+    def band(self, value: float) -> int:
+        """Index of the band ``value`` falls in (not meaningful for NaN; see ``nan``)."""
+        return bisect_right(self.bounds, value)
+
+    def lookup(self, value: float, **context) -> tuple:
+        """(score, comment) for an already-parsed value."""
+        if value != value:
+            score_band, comment_band = self.nan
+        else:
+            score_band = comment_band = self.band(value)
+        return self.scores[score_band], self.comments[comment_band].format(value=value, **context)
+
+
+SCORE_BANDS = {
+    "Acreage": [
+        (None,        0, "Very small parcel size of {value} acres"),
+        (0.5,         2, "Small parcel size of {value} acres"),
+        (0.75,        4, "Moderate parcel size of {value} acres"),
+        (1.25,        5, "Adequate parcel size of {value} acres"),
+        (1.75,        6, "Good parcel size of {value} acres"),
+        (above(2.25), 7, "Large parcel size of {value} acres"),
+    ],
+    "Box Size": [
+        (None,        0, "Box size of {value:,.0f} square feet is below optimal range"),
+        (2000,        2, "Optimal box size of {value:,.0f} square feet"),
+        (above(9000), 0, "Box size of {value:,.0f} square feet is above optimal range"),
+    ],
+    "Number of National Locations": [
+        (None,         0,   "{tenant} has minimal national presence with {value:,.0f} locations"),
+        (above(100),   1,   "{tenant} has limited national presence with {value:,.0f} locations"),
+        (above(300),   1.5, "{tenant} has moderate national presence with {value:,.0f} locations"),
+        (above(600),   2.5, "{tenant} has strong national presence with {value:,.0f} locations"),
+    ],
+    "Lease Term": [
+        (None,      0, "Extremely short remaining lease term of {value:,.1f} years"),
+        (3,         1, "Very short remaining lease term of {value:,.1f} years"),
+        (5,         2, "Short remaining lease term of {value:,.1f} years"),
+        (7.5,       3, "Moderate remaining lease term of {value:,.1f} years"),
+        (10,        4, "Long remaining lease term of {value:,.1f} years"),
+        (above(15), 5, "Very long remaining lease term of {value:,.1f} years"),
+    ],
+    "Rent Growth": [
+        (None,        0,   "Minimal annual rent growth of {value:.1f}%"),
+        (0.5,         1,   "Moderate annual rent growth of {value:.1f}%"),
+        (1.25,        1.5, "Strong annual rent growth of {value:.1f}%"),
+        (above(2.25), 0,   "Very high annual rent growth of {value:.1f}%"),
+    ],
+}
+
+# Absolute Rent ladders by building type (see build_scorecard.rent_building_type)
+RENT_BANDS = {
+    "CDR": [
+        (None,   8, "Very attractive rent of ${value:,.0f} for CDR"),
+        (170000, 7, "Attractive rent of ${value:,.0f} for CDR"),
+        (210000, 6, "Moderate rent of ${value:,.0f} for CDR"),
+        (250000, 5, "High rent of ${value:,.0f} for CDR"),
+        (285000, 3, "Very high rent of ${value:,.0f} for CDR"),
+        (330000, 0, "Extremely high rent of ${value:,.0f} for CDR"),
+    ],
+    "QSR": [
+        (None,   8, "Very attractive rent of ${value:,.0f} for QSR"),
+        (90000,  7, "Attractive rent of ${value:,.0f} for QSR"),
+        (110000, 6, "Moderate rent of ${value:,.0f} for QSR"),
+        (135000, 5, "High rent of ${value:,.0f} for QSR"),
+        (150000, 3, "Very high rent of ${value:,.0f} for QSR"),
+        (170000, 0, "Extremely high rent of ${value:,.0f} for QSR"),
+    ],
+}
+
+# (score band, comment band) of a NaN value, as the original if/elif chains
+# scored it; fields not listed here (the rent ladders too) take the last band
+NAN_BANDS = {
+    "Acreage": (0, 0),
+    "Box Size": (1, 2),
+    "Number of National Locations": (0, 0),
+    "Lease Term": (0, 0),
+}
+
+# Building types without a ladder score 0 with a plain comment
+UNKNOWN_RENT = ScoreTable([(None, 0, "Rent: ${value:,.0f}")])
+
+SCORE_TABLES = {field: ScoreTable(bands, NAN_BANDS.get(field, (-1, -1))) for field, bands in SCORE_BANDS.items()}
+RENT_TABLES = {building: ScoreTable(bands) for building, bands in RENT_BANDS.items()}
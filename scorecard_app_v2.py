@@ -1,24 +1,35 @@
 import os
-import tempfile
 import json
+import uuid
 from pathlib import Path
 from io import BytesIO
 from datetime import datetime
-import openpyxl
-import boto3
 from botocore.exceptions import ClientError
 
 import streamlit as st
-from openai import OpenAI
-import pandas as pd
-from typing import Dict, Optional
 
-import extractor
-from build_scorecard import build_scorecard
+import deal_store
+from clients import get_s3_client
+import job_queue
+import search_index
+from template_cache import get_template_cache
+from tracing import span
 
-# Initialize session state for history
-if "history" not in st.session_state:
-    st.session_state.history = []
+# Previous models live in the deal store (deal_store.py), stored under this
+# session's id so each session only lists its own; the session only
+# remembers which page of them is shown and at most one rebuilt workbook
+HISTORY_PAGE_SIZE = 10
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+if "history_page" not in st.session_state:
+    st.session_state.history_page = 0
+if "prepared_workbook" not in st.session_state:
+    st.session_state.prepared_workbook = None
+# Jobs this session has queued (see job_queue.py); their status (and fields, as
+# they stream in) is polled from the queue
+JOB_POLL_SECONDS = 1
+if "job_ids" not in st.session_state:
+    st.session_state.job_ids = []
 
 # Initialize session state for authentication
 if 'authenticated' not in st.session_state:
@@ -39,15 +50,10 @@ def get_template_from_s3() -> BytesIO:
                 "AWS Access Key ID": f"{os.getenv('AWS_ACCESS_KEY_ID', '')[:5]}..." if os.getenv('AWS_ACCESS_KEY_ID') else "Not set"
             })
 
-        s3 = boto3.client(
-            's3',
-            aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
-            aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY')
-        )
-        
         # List contents of bucket to verify access
         if st.session_state.get('debug_mode'):
             try:
+                s3 = get_s3_client()
                 response = s3.list_objects_v2(Bucket=bucket, Prefix='templates/')
                 st.write("Files in templates folder:")
                 for obj in response.get('Contents', []):
@@ -55,10 +61,12 @@ def get_template_from_s3() -> BytesIO:
             except Exception as e:
                 st.write(f"Error listing bucket contents: {str(e)}")
         
-        # Download template to memory
-        template_obj = BytesIO()
-        s3.download_fileobj(bucket, template_key, template_obj)
-        template_obj.seek(0)  # Reset file pointer to beginning
+        # Template bytes are shared across sessions and revalidated by ETag
+        cache = get_template_cache(bucket, template_key)
+        with span("template_fetch", key=template_key):
+            template_obj = BytesIO(cache.get())
+        if st.session_state.get('debug_mode'):
+            st.write({"Template ETag": cache.etag})
         return template_obj
     except ClientError as e:
         error_msg = f"Error downloading template: {str(e)}"
@@ -67,6 +75,123 @@ def get_template_from_s3() -> BytesIO:
         st.error(error_msg)
         raise
 
+def show_trace(spans: list[dict]) -> None:
+    """Timing waterfall of one run's stages (see tracing.py), plus the raw spans as JSON."""
+    import altair as alt  # only needed in debug mode; keeps it off the cold start
+    rows = []
+    for s in spans:
+        label = s["name"] + (f" p.{s['attrs']['page']}" if "page" in s["attrs"] else "")
+        rows.append({
+            "stage": "\u2003" * s["depth"] + label,
+            "start_ms": round(s["start"] * 1000, 1),
+            "end_ms": round((s["start"] + s["duration"]) * 1000, 1),
+            "duration_ms": round(s["duration"] * 1000, 1),
+            "details": ", ".join(f"{k}={v}" for k, v in s["attrs"].items()),
+        })
+    total = max((r["end_ms"] for r in rows), default=0)
+    st.markdown(f"**Stage timings** ({total / 1000:.2f}s total)")
+    chart = alt.Chart(alt.Data(values=rows)).mark_bar().encode(
+        x=alt.X("start_ms:Q", title="ms since start"),
+        x2="end_ms:Q",
+        y=alt.Y("stage:N", sort=None, title=None),
+        tooltip=["stage:N", "duration_ms:Q", "details:N"],
+    ).properties(height=max(120, 22 * len(rows)))
+    st.altair_chart(chart, use_container_width=True)
+    st.download_button("📥 Download trace (JSON)", data=json.dumps(spans, indent=2),
+                       file_name="scorecard_trace.json", mime="application/json")
+
+def show_search() -> None:
+    """Search box over every deal scored so far (see search_index.py)."""
+    query = st.text_input("🔎 Have we seen this before?", placeholder="Tenant, address, broker, any phrase...")
+    if not query:
+        return
+    started = datetime.now()
+    hits = search_index.search(query)
+    elapsed_ms = (datetime.now() - started).total_seconds() * 1000
+    st.caption(f"{len(hits)} match{'es' if len(hits) != 1 else ''} in {elapsed_ms:.0f} ms")
+    for hit in hits:
+        where = f"p.{hit['page']}" if hit["page"] is not None else "extracted fields"
+        seen = datetime.fromtimestamp(hit["indexed_at"]).strftime("%m.%d.%y")
+        st.markdown(f"**{hit['tenant'] or 'Unnamed Tenant'}** · {hit['address'] or 'no address'} · "
+                    f"{hit['source'] or 'unknown source'} ({where}, scored {seen})")
+        st.caption(hit["snippet"])
+
+def workbook_button(deal_id: int, filename: str, key: str, label: str = "📥 Download This Model") -> None:
+    """Download button for a stored deal; the workbook is only rebuilt once asked for."""
+    prepared = st.session_state.prepared_workbook
+    if prepared and prepared[0] == deal_id:
+        st.download_button(
+            label,
+            data=prepared[1],
+            file_name=filename,
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            key=f"{key}_download_{deal_id}",
+        )
+    elif st.button("🛠️ Prepare download", key=f"{key}_prepare_{deal_id}"):
+        # Only one rebuilt workbook is held per session
+        st.session_state.prepared_workbook = (deal_id, deal_store.deal_workbook(deal_id, get_template_from_s3()))
+        st.rerun()
+
+def show_jobs(debug_mode: bool) -> None:
+    """Status of this session's queued / running / finished jobs (re-run every few seconds while busy)."""
+    jobs = job_queue.get_jobs(st.session_state.job_ids)
+    busy = any(job["status"] in ("queued", "running") for job in jobs)
+    if st.session_state.get("jobs_busy") and not busy:
+        # The last job just finished: rerun the whole page so the history and polling catch up
+        st.session_state.jobs_busy = False
+        st.rerun()
+    st.session_state.jobs_busy = busy
+
+    st.markdown("### ⏳ Jobs")
+    for job in reversed(jobs):
+        name = job["source_name"]
+        if job["status"] == "queued":
+            ahead = job_queue.queue_position(job["id"])
+            st.info(f"{name}: queued" + (f" ({ahead} ahead)" if ahead else ""))
+        elif job["status"] == "running":
+            stage = (job["stage"] or "starting").replace("_", " ")
+            pages = f", {job['pages_read']} pages read" if job["pages_read"] else ""
+            st.progress(job["progress"], text=f"{name}: {stage}{pages}")
+            if job["fields"]:
+                with st.expander("🔍 Extracted Data", expanded=True):
+                    st.json(job["fields"])
+        elif job["status"] == "error":
+            st.error(f"{name}: {job['error']}")
+        else:
+            with st.expander(f"✅ {name}: {job['fields'].get('Current Tenant') or 'Unnamed Tenant'}"):
+                st.json(job["fields"])
+                if debug_mode:
+                    show_trace(job["spans"])
+                deal = deal_store.get_deal(job["deal_id"])
+                workbook_button(job["deal_id"], deal["filename"], "job", "📥 Download Excel Model")
+
+def show_history() -> None:
+    """One page of the models this session has built, newest first; workbooks are rebuilt on request."""
+    total = deal_store.count_deals(owner=st.session_state.session_id)
+    if not total:
+        return
+    pages = (total + HISTORY_PAGE_SIZE - 1) // HISTORY_PAGE_SIZE
+    page = min(st.session_state.history_page, pages - 1)
+    st.markdown("### 📚 Previous Models")
+
+    for deal in deal_store.list_deals(page * HISTORY_PAGE_SIZE, HISTORY_PAGE_SIZE,
+                                      owner=st.session_state.session_id):
+        created = datetime.fromtimestamp(deal["created_at"]).strftime("%m.%d.%y")
+        with st.expander(f"#{deal['id']}: {deal['tenant'] or 'Unnamed Tenant'} ({created})"):
+            st.json(deal["fields"])
+            st.caption(f"Total score: {deal['total_score']:g}")
+            workbook_button(deal["id"], deal["filename"], "history")
+
+    if pages > 1:
+        prev_col, label_col, next_col = st.columns([1, 2, 1])
+        if prev_col.button("◀", disabled=page == 0, key="history_prev"):
+            st.session_state.history_page = page - 1
+            st.rerun()
+        label_col.caption(f"Page {page + 1} of {pages}")
+        if next_col.button("▶", disabled=page >= pages - 1, key="history_next"):
+            st.session_state.history_page = page + 1
+            st.rerun()
+
 def check_password():
     """Returns `True` if the user had the correct password."""
     def password_entered():
@@ -117,122 +242,47 @@ if check_password():
             os.environ["DEBUG"] = "1"
         else:
             os.environ.pop("DEBUG", None)
+        bypass_cache = st.checkbox("Bypass caches", value=False,
+                                   help="Re-parse the PDF and call GPT again even if this input was seen before")
+        full_scan = st.checkbox("Scan every PDF page", value=False,
+                                help="By default the PDF is only read until every scorecard field has turned up")
         
         # Display history
-        if st.session_state.history:
-            st.markdown("### 📚 Previous Models")
-            for idx, item in enumerate(st.session_state.history):
-                with st.expander(f"#{idx + 1}: {item['property_name']} ({item['date']})"):
-                    st.json(item['data'])
-                    if 'excel_data' in item:
-                        st.download_button(
-                            "📥 Download This Model",
-                            data=item['excel_data'],
-                            file_name=item['filename'],
-                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                        )
+        show_history()
+
+    # ---------- search past deals ------------------------------------------------
+    with st.expander("🔎 Search past deals"):
+        show_search()
 
     # ---------- input choice ----------------------------------------------------
     mode = st.radio("Choose input type", ("E-mail text", "Offering Memorandum PDF"))
-    txt, pdf = "", None
+    txt, pdfs = "", []
 
     if mode == "E-mail text":
         txt = st.text_area("✉️ Paste e-mail body", height=250)
     else:
-        pdf = st.file_uploader("📄 Upload OM (PDF)", type=["pdf"])
-        if pdf:
+        pdfs = st.file_uploader("📄 Upload OMs (PDF)", type=["pdf"], accept_multiple_files=True)
+        if pdfs:
             st.info("Using template from secure storage")
 
-    run = st.button("🚀 Extract + Build", disabled=(not txt and not pdf))
+    run = st.button("🚀 Extract + Build", disabled=(not txt and not pdfs))
 
     if run:
-        try:
-            client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-            with st.spinner("Extracting data and building model..."):
-                # Get template from S3
-                template_obj = get_template_from_s3()
-                
-                # Save template temporarily
-                with tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False) as tmp_template:
-                    tmp_template.write(template_obj.getvalue())
-                    template_path = tmp_template.name
-
-                # Process based on input mode
-                if mode == "E-mail text":
-                    fields, excel_path = build_scorecard(
-                        txt,
-                        template_path=template_path,
-                        client=client
-                    )
-                    src_name = "email"
-                else:
-                    tmp = Path(tempfile.gettempdir()) / "upload.pdf"
-                    tmp.write_bytes(pdf.getvalue())
-                    fields, excel_path = build_scorecard(
-                        tmp,
-                        template_path=template_path,
-                        client=client
-                    )
-                    src_name = Path(pdf.name).stem
-
-                # Clean up temporary template
-                os.unlink(template_path)
-
-                # Show extraction results
-                with st.expander("🔍 Extracted Data", expanded=True):
-                    st.json(fields)
-
-                # Get tenant name and location info
-                tenant_name = fields.get("Current Tenant", "Unnamed Tenant")
-                address = fields.get("Address", {})
-                city = address.get("City", "")
-                state = address.get("State", "")
-                location_str = f"({city}, {state})" if city and state else ""
-                
-                current_date = datetime.now().strftime("%m.%d.%y")
-                
-                # Create standardized filename
-                standardized_filename = f"Automated Scorecard {tenant_name} {location_str} {current_date} v1.xlsx"
-                
-                if debug_mode:
-                    st.write("File Information:")
-                    st.write({
-                        "Tenant Name": tenant_name,
-                        "Location": location_str,
-                        "Date": current_date,
-                        "Final Filename": standardized_filename
-                    })
-
-                # Read the generated Excel file
-                with open(excel_path, "rb") as fh:
-                    bytes_xlsx = fh.read()
-
-                st.success("✅ Model successfully built!")
-                
-                # Add to session history
-                st.session_state.history.append({
-                    'property_name': tenant_name,
-                    'date': current_date,
-                    'data': fields,
-                    'excel_data': bytes_xlsx,
-                    'filename': standardized_filename
-                })
-
-                # Create download button
-                st.download_button(
-                    "📥 Download Excel Model",
-                    data=bytes_xlsx,
-                    file_name=standardized_filename,
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                )
-
-                # Clean up temporary files
-                if mode == "Offering Memorandum PDF":
-                    os.unlink(tmp)
-                os.unlink(excel_path)
-
-        except Exception as e:
-            st.error(f"Error: {str(e)}")
-            if debug_mode:
-                st.exception(e) 
\ No newline at end of file
+        # Jobs run on the shared worker pool (job_queue.py), not in this script thread
+        job_queue.start_workers()
+        if mode == "E-mail text":
+            inputs = [(txt, "email")]
+        else:
+            inputs = [(pdf.getvalue(), Path(pdf.name).stem) for pdf in pdfs]
+        for source, src_name in inputs:
+            st.session_state.job_ids.append(
+                job_queue.enqueue(source, src_name, use_cache=not bypass_cache, full_scan=full_scan,
+                                  owner=st.session_state.session_id))
+        st.session_state.history_page = 0
+
+    # ---------- this session's jobs -----------------------------------------------
+    if st.session_state.job_ids:
+        job_queue.start_workers()
+        active = any(job["status"] in ("queued", "running")
+                     for job in job_queue.get_jobs(st.session_state.job_ids))
+        st.fragment(show_jobs, run_every=JOB_POLL_SECONDS if active else None)(debug_mode)
@@ -0,0 +1,225 @@
+"""
+Full-text index of every OM and e-mail that has been scored.
+
+Each document's full page text and extracted fields go into a local SQLite
+database with two FTS5 tables: one row per page (for "which deck mentioned
+this?") and one row per deal with tenant, address and the field values (for
+"have we seen this tenant/property before?"). Documents are added one at a
+time as they are scored; re-scoring a document replaces its rows.
+
+    from search_index import search
+    search("taco bell cedar rapids")
+    # [{"doc_id", "source", "tenant", "address", "page", "snippet", "fields", "indexed_at"}, ...]
+
+The database lives at SEARCH_INDEX_PATH (default: search_index.sqlite3 in the
+scorecard cache folder). Set SEARCH_INDEX_ENABLED=0 to stop indexing new runs.
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import closing
+from pathlib import Path
+from typing import Optional
+
+from cache import CACHE_ROOT, sha256_bytes, sha256_file, sha256_text
+from extractor import extract_pages
+
+SEARCH_INDEX_PATH = Path(os.getenv("SEARCH_INDEX_PATH", CACHE_ROOT / "search_index.sqlite3"))
+SEARCH_INDEX_ENABLED = os.getenv("SEARCH_INDEX_ENABLED", "1") != "0"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS deals (
+    id INTEGER PRIMARY KEY,
+    doc_id TEXT NOT NULL UNIQUE,
+    source TEXT,
+    tenant TEXT,
+    address TEXT,
+    fields TEXT NOT NULL,
+    page_count INTEGER NOT NULL,
+    indexed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY,
+    deal_id INTEGER NOT NULL,
+    page INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pages_deal ON pages (deal_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS page_fts USING fts5(text, tokenize = 'porter unicode61');
+CREATE VIRTUAL TABLE IF NOT EXISTS deal_fts USING fts5(tenant, address, fields, tokenize = 'porter unicode61');
+"""
+
+_ready: set[Path] = set()
+_ready_lock = threading.Lock()
+
+
+def connect(path: Optional[Path] = None) -> sqlite3.Connection:
+    """Connection to the index, creating the tables on first use."""
+    path = SEARCH_INDEX_PATH if path is None else Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    with _ready_lock:
+        if path not in _ready:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            _ready.add(path)
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def document_id(source) -> str:
+    """Content hash identifying a source (PDF path or bytes, or e-mail text)."""
+    if isinstance(source, bytes):
+        return sha256_bytes(source)
+    if isinstance(source, Path):
+        return sha256_file(source)
+    return sha256_text(source)
+
+
+def _address_text(address) -> str:
+    if isinstance(address, dict):
+        return ", ".join(str(v) for v in address.values() if v)
+    return str(address or "")
+
+
+def index_document(doc_id: str, pages: list[str] | dict[int, str], fields: dict, *,
+                   source: Optional[str] = None, path: Optional[Path] = None) -> None:
+    """Add (or replace) one document's page text ({page number: text}, or a list from page 1) and fields."""
+    if not isinstance(pages, dict):
+        pages = dict(enumerate(pages, start=1))
+    tenant = str(fields.get("Current Tenant") or "")
+    address = _address_text(fields.get("Address"))
+    field_text = " ".join(f"{k}: {_address_text(v) if k == 'Address' else v}"
+                          for k, v in fields.items() if v not in (None, ""))
+
+    with closing(connect(path)) as conn, conn:
+        old = conn.execute("SELECT id FROM deals WHERE doc_id = ?", (doc_id,)).fetchone()
+        if old is not None:
+            conn.execute("DELETE FROM page_fts WHERE rowid IN (SELECT id FROM pages WHERE deal_id = ?)",
+                         (old["id"],))
+            conn.execute("DELETE FROM pages WHERE deal_id = ?", (old["id"],))
+            conn.execute("DELETE FROM deal_fts WHERE rowid = ?", (old["id"],))
+            conn.execute("DELETE FROM deals WHERE id = ?", (old["id"],))
+
+        deal_id = conn.execute(
+            "INSERT INTO deals (doc_id, source, tenant, address, fields, page_count, indexed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (doc_id, source, tenant, address, json.dumps(fields, default=str), len(pages), time.time()),
+        ).lastrowid
+        conn.execute("INSERT INTO deal_fts (rowid, tenant, address, fields) VALUES (?, ?, ?, ?)",
+                     (deal_id, tenant, address, field_text))
+        for page_no, text in sorted(pages.items()):
+            if not text.strip():
+                continue
+            row_id = conn.execute("INSERT INTO pages (deal_id, page) VALUES (?, ?)", (deal_id, page_no)).lastrowid
+            conn.execute("INSERT INTO page_fts (rowid, text) VALUES (?, ?)", (row_id, text))
+
+
+def fts_query(text: str) -> str:
+    """
+    FTS5 query matching every word of ``text`` (the last one as a prefix, for search-as-you-type).
+
+    Words are quoted, so user input can never be read as FTS5 syntax.
+    """
+    words = re.findall(r"\w+", text)
+    if not words:
+        return ""
+    quoted = ['"' + w.replace('"', '""') + '"' for w in words]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def search(query: str, limit: int = 20, *, path: Optional[Path] = None) -> list[dict]:
+    """
+    Deals and pages matching ``query``, best first.
+
+    Deal-level hits (tenant, address, extracted fields) come before page hits;
+    page hits carry the page number. Snippets mark matches with **bold**.
+    """
+    match = fts_query(query)
+    if not match:
+        return []
+    if path is None and not SEARCH_INDEX_PATH.exists():
+        return []
+
+    with closing(connect(path)) as conn:
+        deal_rows = conn.execute(
+            "SELECT d.doc_id, d.source, d.tenant, d.address, d.fields, d.indexed_at, NULL AS page, "
+            "       snippet(deal_fts, -1, '**', '**', '…', 12) AS snippet "
+            "FROM deal_fts JOIN deals d ON d.id = deal_fts.rowid "
+            "WHERE deal_fts MATCH ? ORDER BY rank LIMIT ?",
+            (match, limit),
+        ).fetchall()
+        page_rows = conn.execute(
+            "SELECT d.doc_id, d.source, d.tenant, d.address, d.fields, d.indexed_at, p.page, "
+            "       snippet(page_fts, 0, '**', '**', '…', 16) AS snippet "
+            "FROM page_fts JOIN pages p ON p.id = page_fts.rowid JOIN deals d ON d.id = p.deal_id "
+            "WHERE page_fts MATCH ? ORDER BY rank LIMIT ?",
+            (match, limit),
+        ).fetchall()
+
+    results = []
+    for row in [*deal_rows, *page_rows][:limit]:
+        hit = dict(row)
+        hit["fields"] = json.loads(hit["fields"])
+        results.append(hit)
+    return results
+
+
+def source_pages(source, known: Optional[list[str] | dict[int, str]] = None, *,
+                 workers: Optional[int] = None) -> list[str] | dict[int, str]:
+    """
+    Page text of a PDF (path or bytes), or the whole text of an e-mail / text file as one page.
+
+    ``known`` is the page text the scoring pipeline already read (see
+    extractor.get_best_payload's with_pages). For a PDF that is usually only
+    the early-scan or section pages, so the remaining pages are extracted and
+    added to it; any other source is taken as complete.
+    """
+    if isinstance(source, bytes) or (isinstance(source, Path) and source.suffix.lower() == ".pdf"):
+        if isinstance(known, list):
+            known = dict(enumerate(known, start=1))
+        return extract_pages(source, workers=workers, known=known)
+    if known is not None:
+        return known
+    if isinstance(source, Path):
+        return [source.read_text()]
+    return [source]
+
+
+def index_source(source, fields: dict, source_name: Optional[str] = None,
+                 pages: Optional[list[str] | dict[int, str]] = None, *, workers: Optional[int] = None) -> str:
+    """
+    Index every page of a scored source plus its fields; returns its document id.
+
+    ``pages`` are the pages already read while scoring it; only the rest of a
+    PDF is extracted (with ``workers`` processes, default PDF_WORKERS).
+    """
+    doc_id = document_id(source)
+    index_document(doc_id, source_pages(source, pages, workers=workers), fields, source=source_name)
+    return doc_id
+
+
+# Interactive runs index on one background thread so the user is not kept waiting (the rest
+# of a PDF's pages are extracted there, off the scoring path)
+_indexer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="search-index")
+
+
+def _index_quietly(source, fields: dict, source_name: Optional[str], pages) -> Optional[str]:
+    try:
+        return index_source(source, fields, source_name, pages)
+    except Exception as e:
+        print(f"⚠️ Could not add {source_name or 'document'} to the search index: {e}")
+        return None
+
+
+def index_in_background(source, fields: dict, source_name: Optional[str] = None,
+                        pages: Optional[list[str] | dict[int, str]] = None) -> Optional[Future]:
+    """Queue ``index_source`` on the indexing thread (no-op when SEARCH_INDEX_ENABLED=0)."""
+    if not SEARCH_INDEX_ENABLED:
+        return None
+    return _indexer.submit(_index_quietly, source, fields, source_name, pages)
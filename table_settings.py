@@ -0,0 +1,150 @@
+"""
+Table-extraction settings ordered by what worked on similar documents.
+
+``extractor.extract_tables`` tries pdfplumber table settings one after the
+other on every keyword page. Most OMs come from a handful of brokerages whose
+layouts barely change, so the setting that found a real table on the last
+deck from a brokerage almost always finds it on the next one.
+
+Each PDF gets a layout fingerprint (producer/creator metadata, first-page
+size, brokerage named on the first page). For every fingerprint we keep how
+often each setting was tried and how often it produced a table that passes
+``looks_like_real_table``; future documents with the same fingerprint try the
+best settings first and skip ones that never worked there.
+
+The counts live in a small SQLite database at TABLE_SETTINGS_PATH (default:
+table_settings.sqlite3 in the scorecard cache folder). Each document's counts
+are added with a single UPSERT, so concurrent sessions and batch workers
+never lose each other's updates.
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Optional
+
+from cache import CACHE_ROOT
+
+# A setting that has been tried this many times on a layout without ever
+# producing a table is skipped there (as long as another setting has worked)
+TABLE_SETTINGS_PRUNE_AFTER = int(os.getenv("TABLE_SETTINGS_PRUNE_AFTER", "5"))
+
+TABLE_SETTINGS_PATH = Path(os.getenv("TABLE_SETTINGS_PATH", CACHE_ROOT / "table_settings.sqlite3"))
+
+# History is kept for this many layouts; the least recently seen ones are dropped
+TABLE_SETTINGS_MAX_LAYOUTS = int(os.getenv("TABLE_SETTINGS_MAX_LAYOUTS", "5000"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outcomes (
+    fingerprint TEXT NOT NULL,
+    settings TEXT NOT NULL,
+    tried INTEGER NOT NULL,
+    won INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (fingerprint, settings)
+);
+CREATE INDEX IF NOT EXISTS outcomes_updated ON outcomes (updated_at);
+"""
+
+_ready: set[Path] = set()
+_ready_lock = threading.Lock()
+
+BROKER_REGEX = re.compile(
+    r"(Marcus\s*&\s*Millichap|CBRE|JLL|Jones Lang LaSalle|Cushman\s*&\s*Wakefield|Colliers|Newmark|"
+    r"SRS Real Estate|Matthews|Northmarq|Hanley Investment|Stan Johnson|Boulder Group|Calkain|"
+    r"B\+E|Sands Investment|Avison Young|Kidder Mathews|NAI\s+\w+|Horvath|Encore Real Estate)",
+    re.I,
+)
+
+
+def document_fingerprint(pdf, first_page_text: Optional[str] = None) -> str:
+    """
+    Layout fingerprint of an open pdfplumber document.
+
+    Two decks built by the same brokerage from the same template share it;
+    the PDF's own content does not matter.
+    """
+    meta = pdf.metadata or {}
+    producer = str(meta.get("Producer") or "").strip()
+    creator = str(meta.get("Creator") or "").strip()
+    size = ""
+    broker = ""
+    if pdf.pages:
+        page = pdf.pages[0]
+        size = f"{round(float(page.width))}x{round(float(page.height))}"
+        if first_page_text is None:
+            first_page_text = page.extract_text() or ""
+        match = BROKER_REGEX.search(first_page_text) or BROKER_REGEX.search(str(meta.get("Author") or ""))
+        broker = re.sub(r"\s+", " ", match.group(1)).lower() if match else ""
+    return "|".join((producer, creator, size, broker))
+
+
+def settings_key(opts: dict) -> str:
+    return json.dumps(opts, sort_keys=True)
+
+
+def connect(path: Optional[Path] = None) -> sqlite3.Connection:
+    """Connection to the history database, creating the table on first use."""
+    path = TABLE_SETTINGS_PATH if path is None else Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    with _ready_lock:
+        if path not in _ready:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            _ready.add(path)
+    return conn
+
+
+def _history(fingerprint: str) -> dict:
+    with closing(connect()) as conn:
+        rows = conn.execute("SELECT settings, tried, won FROM outcomes WHERE fingerprint = ?",
+                            (fingerprint,)).fetchall()
+    return {"tried": {key: tried for key, tried, _ in rows}, "won": {key: won for key, _, won in rows if won}}
+
+
+def order_settings(fingerprint: str, settings_list: list[dict]) -> list[dict]:
+    """
+    ``settings_list`` best-first for this layout, without settings that never work on it.
+
+    Settings are ranked by their smoothed hit rate on earlier documents with the
+    same fingerprint; ties (e.g. a layout seen for the first time) keep the
+    caller's order.
+    """
+    history = _history(fingerprint)
+    tried, won = history["tried"], history["won"]
+
+    def hit_rate(opts: dict) -> float:
+        key = settings_key(opts)
+        return (won.get(key, 0) + 1) / (tried.get(key, 0) + 2)
+
+    ordered = sorted(settings_list, key=hit_rate, reverse=True)
+    if any(won.get(settings_key(opts)) for opts in ordered):
+        ordered = [opts for opts in ordered
+                   if won.get(settings_key(opts)) or tried.get(settings_key(opts), 0) < TABLE_SETTINGS_PRUNE_AFTER]
+    return ordered
+
+
+def record_outcome(fingerprint: str, tried: dict[str, int], won: dict[str, int]) -> None:
+    """Add one document's attempts and wins ({settings_key: count}) to the layout's history."""
+    if not tried:
+        return
+    now = time.time()
+    rows = [(fingerprint, key, tried.get(key, 0), won.get(key, 0), now) for key in tried.keys() | won.keys()]
+    with closing(connect()) as conn, conn:
+        # The increments happen inside SQLite, so concurrent writers add up instead of overwriting each other
+        conn.executemany(
+            "INSERT INTO outcomes (fingerprint, settings, tried, won, updated_at) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (fingerprint, settings) DO UPDATE SET tried = tried + excluded.tried, "
+            "won = won + excluded.won, updated_at = excluded.updated_at",
+            rows,
+        )
+        conn.execute(
+            "DELETE FROM outcomes WHERE fingerprint IN (SELECT fingerprint FROM outcomes GROUP BY fingerprint "
+            "ORDER BY MAX(updated_at) DESC LIMIT -1 OFFSET ?)",
+            (TABLE_SETTINGS_MAX_LAYOUTS,),
+        )
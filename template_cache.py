@@ -0,0 +1,103 @@
+"""
+Process-wide cache of the scorecard template downloaded from S3.
+
+The template bytes are held in memory once per (bucket, key) and shared by
+every Streamlit session and batch job in the process. After
+TEMPLATE_REVALIDATE_SECONDS (default 300) the next request revalidates with a
+conditional GET (If-None-Match on the stored ETag), so an unchanged template
+costs a 304 instead of a full download.
+"""
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Optional
+
+from clients import get_s3_client
+
+if TYPE_CHECKING:
+    from botocore.exceptions import ClientError
+
+REVALIDATE_SECONDS = float(os.getenv("TEMPLATE_REVALIDATE_SECONDS", "300"))
+
+
+def default_s3_client():
+    # The process-wide client (clients.py), so revalidations reuse its connections
+    return get_s3_client()
+
+
+def _is_not_modified(err: "ClientError") -> bool:
+    error = err.response.get("Error", {})
+    status = err.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+    return error.get("Code") in ("304", "NotModified") or status == 304
+
+
+class TemplateCache:
+    """
+    In-memory copy of one S3 object, revalidated by ETag on an interval.
+
+    Args:
+        bucket: S3 bucket name
+        key: S3 object key
+        revalidate_seconds: How long a copy is served without checking S3
+        client_factory: Returns the boto3 S3 client to use (injectable for moto / tests)
+    """
+
+    def __init__(self, bucket: str, key: str, *, revalidate_seconds: float = REVALIDATE_SECONDS,
+                 client_factory: Callable = default_s3_client):
+        self.bucket = bucket
+        self.key = key
+        self.revalidate_seconds = revalidate_seconds
+        self.client_factory = client_factory
+        self.etag: Optional[str] = None
+        self._body: Optional[bytes] = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> bytes:
+        """Template bytes, downloading or revalidating them first if they are stale."""
+        from botocore.exceptions import BotoCoreError, ClientError
+        with self._lock:
+            if self._body is not None and time.monotonic() - self._checked < self.revalidate_seconds:
+                return self._body
+
+            request = {"Bucket": self.bucket, "Key": self.key}
+            if self._body is not None and self.etag:
+                request["IfNoneMatch"] = self.etag
+            try:
+                resp = self.client_factory().get_object(**request)
+                self._body = resp["Body"].read()
+                self.etag = resp.get("ETag")
+            except ClientError as e:
+                if not (self._body is not None and _is_not_modified(e)):
+                    raise
+            except BotoCoreError as e:
+                # S3 unreachable: keep serving the copy we have rather than failing the deal
+                if self._body is None:
+                    raise
+                print(f"Template revalidation failed, serving cached copy: {e}")
+
+            self._checked = time.monotonic()
+            return self._body
+
+    def invalidate(self) -> None:
+        """Force the next get() to revalidate against S3."""
+        with self._lock:
+            self._checked = 0.0
+
+
+_caches: dict[tuple[str, str], TemplateCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_template_cache(bucket: str, key: str) -> TemplateCache:
+    """The shared TemplateCache for (bucket, key), created on first use."""
+    with _caches_lock:
+        cache = _caches.get((bucket, key))
+        if cache is None:
+            cache = _caches[(bucket, key)] = TemplateCache(bucket, key)
+        return cache
+
+
+def get_template_bytes(bucket: str, key: str) -> bytes:
+    """Template bytes for (bucket, key) from the process-wide cache."""
+    return get_template_cache(bucket, key).get()
@@ -0,0 +1,276 @@
+"""
+Pre-compiled scorecard template writer.
+
+An .xlsx file is a zip of XML parts. Filling in a scorecard only touches a
+couple of dozen cells on one sheet, so instead of loading and re-serialising
+the whole workbook with openpyxl for every deal, the template is compiled
+once: the active sheet's XML is parsed to locate every target cell, and the
+raw (already compressed) bytes of every other part are kept as-is.
+
+Rendering a deal then means splicing new <c> elements into the sheet XML,
+compressing that one part, and copying every other part byte-for-byte into
+a new zip.
+"""
+import hashlib
+import io
+import posixpath
+import re
+import struct
+import threading
+import zipfile
+import zlib
+from pathlib import Path
+from typing import BinaryIO
+from xml.sax.saxutils import escape
+
+_CELL_REF = re.compile(r"^([A-Z]{1,3})(\d+)$")
+_ILLEGAL_XML_CHARS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+class TemplateCompileError(ValueError):
+    """The template uses a layout the compiled writer cannot patch safely."""
+
+
+def _column_index(letters: str) -> int:
+    n = 0
+    for ch in letters:
+        n = n * 26 + (ord(ch) - 64)
+    return n
+
+
+def _split_ref(ref: str) -> tuple[int, int]:
+    match = _CELL_REF.match(ref)
+    if not match:
+        raise TemplateCompileError(f"Not a cell reference: {ref!r}")
+    return int(match.group(2)), _column_index(match.group(1))
+
+
+def _cell_pattern(ref: str) -> re.Pattern:
+    # <c r="L8" .../>  or  <c r="L8" ...>...</c>
+    return re.compile(r'<c\s[^>]*?\br="' + ref + r'"[^>]*?(?:/>|>.*?</c>)', re.S)
+
+
+def _row_pattern(row: int) -> re.Pattern:
+    return re.compile(r'<row\s[^>]*?\br="' + str(row) + r'"[^>]*?(?:/>|>.*?</row>)', re.S)
+
+
+def _ensure_cell(xml: str, ref: str) -> str:
+    """Insert an empty <c r="ref"/> (and its <row> if needed) so every target cell has an element."""
+    if _cell_pattern(ref).search(xml):
+        return xml
+    row, col = _split_ref(ref)
+    empty_cell = f'<c r="{ref}"/>'
+
+    row_match = _row_pattern(row).search(xml)
+    if row_match is None:
+        # Insert a new row before the first row numbered higher, or at the end of sheetData
+        if "<sheetData/>" in xml:
+            return xml.replace("<sheetData/>", f'<sheetData><row r="{row}">{empty_cell}</row></sheetData>', 1)
+        insert_at = xml.index("</sheetData>")
+        for m in re.finditer(r'<row\s[^>]*?\br="(\d+)"', xml):
+            if int(m.group(1)) > row:
+                insert_at = m.start()
+                break
+        return xml[:insert_at] + f'<row r="{row}">{empty_cell}</row>' + xml[insert_at:]
+
+    row_xml = row_match.group(0)
+    if row_xml.endswith("/>"):
+        new_row = row_xml[:-2] + ">" + empty_cell + "</row>"
+    else:
+        # Keep cells in column order within the row
+        insert_at = len(row_xml) - len("</row>")
+        for m in re.finditer(r'<c\s[^>]*?\br="([A-Z]+)\d+"', row_xml):
+            if _column_index(m.group(1)) > col:
+                insert_at = m.start()
+                break
+        new_row = row_xml[:insert_at] + empty_cell + row_xml[insert_at:]
+    return xml[:row_match.start()] + new_row + xml[row_match.end():]
+
+
+def _cell_xml(ref: str, style: str, value) -> str:
+    """Serialise one cell the way openpyxl would store it (strings inline)."""
+    s = f' s="{style}"' if style else ""
+    if value is None:
+        return f'<c r="{ref}"{s}/>'
+    if isinstance(value, bool):
+        return f'<c r="{ref}"{s} t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f'<c r="{ref}"{s}><v>{value!r}</v></c>'
+    text = escape(_ILLEGAL_XML_CHARS.sub("", str(value)))
+    return f'<c r="{ref}"{s} t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _dos_datetime(date_time: tuple) -> tuple[int, int]:
+    year, month, day, hour, minute, second = date_time
+    return ((hour << 11) | (minute << 5) | (second // 2),
+            ((max(year, 1980) - 1980) << 9) | (month << 5) | day)
+
+
+class CompiledTemplate:
+    """
+    A scorecard template parsed once, ready to render many deals.
+
+    Args:
+        template_bytes: The .xlsx template
+        cells: Every cell address render() may be asked to fill
+    """
+
+    def __init__(self, template_bytes: bytes, cells):
+        self._data = template_bytes
+        with zipfile.ZipFile(io.BytesIO(template_bytes)) as zf:
+            self._infos = zf.infolist()
+            self.sheet_part = self._active_sheet_part(zf)
+            sheet_xml = zf.read(self.sheet_part).decode("utf-8")
+            workbook_xml = zf.read("xl/workbook.xml").decode("utf-8")
+            rels_xml = zf.read("xl/_rels/workbook.xml.rels").decode("utf-8")
+            types_xml = zf.read("[Content_Types].xml").decode("utf-8")
+
+        # Make sure every target cell exists, then remember where each one sits
+        for ref in cells:
+            sheet_xml = _ensure_cell(sheet_xml, ref)
+        self._slots = []
+        for ref in cells:
+            match = _cell_pattern(ref).search(sheet_xml)
+            style = re.search(r'\bs="(\d+)"', match.group(0)[:match.group(0).index(">")])
+            self._slots.append((match.start(), match.end(), ref, style.group(1) if style else ""))
+        self._slots.sort()
+        self._sheet_xml = sheet_xml
+
+        # Formulas referencing the patched cells must recalculate when the file is opened,
+        # and the calc chain (which openpyxl also drops) would be stale.
+        self._replaced = {
+            "xl/workbook.xml": self._force_full_calc(workbook_xml).encode("utf-8"),
+            "xl/_rels/workbook.xml.rels": re.sub(
+                r'<Relationship\s[^>]*Target="[^"]*calcChain\.xml"[^>]*/>', "", rels_xml).encode("utf-8"),
+            "[Content_Types].xml": re.sub(
+                r'<Override\s[^>]*PartName="/xl/calcChain\.xml"[^>]*/>', "", types_xml).encode("utf-8"),
+        }
+        self._dropped = {"xl/calcChain.xml"}
+
+    @staticmethod
+    def _active_sheet_part(zf: zipfile.ZipFile) -> str:
+        """Zip path of the sheet openpyxl's ``wb.active`` would return."""
+        workbook_xml = zf.read("xl/workbook.xml").decode("utf-8")
+        rels_xml = zf.read("xl/_rels/workbook.xml.rels").decode("utf-8")
+
+        active = re.search(r'<workbookView\s[^>]*\bactiveTab="(\d+)"', workbook_xml)
+        sheets = re.findall(r"<sheet\s[^>]*?/>", workbook_xml)
+        if not sheets:
+            raise TemplateCompileError("Workbook has no sheets")
+        sheet = sheets[int(active.group(1)) if active else 0]
+        rid = re.search(r'\br:id="([^"]+)"', sheet) or re.search(r'\bid="([^"]+)"', sheet)
+
+        for rel in re.findall(r"<Relationship\s[^>]*/>", rels_xml):
+            if re.search(r'\bId="' + re.escape(rid.group(1)) + '"', rel):
+                target = re.search(r'\bTarget="([^"]+)"', rel).group(1)
+                if target.startswith("/"):
+                    return target.lstrip("/")
+                return posixpath.normpath(posixpath.join("xl", target))
+        raise TemplateCompileError(f"No relationship for active sheet {rid.group(1)}")
+
+    @staticmethod
+    def _force_full_calc(workbook_xml: str) -> str:
+        if "<calcPr" not in workbook_xml:
+            # calcPr must follow these elements (CT_Workbook sequence order)
+            for tag in ("</definedNames>", "</externalReferences>", "</functionGroups>", "</sheets>"):
+                if tag in workbook_xml:
+                    return workbook_xml.replace(tag, tag + '<calcPr fullCalcOnLoad="1"/>', 1)
+            raise TemplateCompileError("Workbook has no <sheets> element")
+        if "fullCalcOnLoad" in workbook_xml:
+            return re.sub(r'fullCalcOnLoad="\w+"', 'fullCalcOnLoad="1"', workbook_xml)
+        return workbook_xml.replace("<calcPr", '<calcPr fullCalcOnLoad="1"', 1)
+
+    def _render_sheet(self, values: dict) -> bytes:
+        parts = []
+        pos = 0
+        for start, end, ref, style in self._slots:
+            parts.append(self._sheet_xml[pos:start])
+            if ref in values:
+                parts.append(_cell_xml(ref, style, values[ref]))
+            else:
+                parts.append(self._sheet_xml[start:end])
+            pos = end
+        parts.append(self._sheet_xml[pos:])
+        return "".join(parts).encode("utf-8")
+
+    def render(self, values: dict) -> bytes:
+        """
+        Build the filled-in workbook.
+
+        Args:
+            values: {cell address: value}; addresses must be among those compiled
+
+        Returns:
+            bytes: The .xlsx file
+        """
+        unknown = set(values) - {ref for _, _, ref, _ in self._slots}
+        if unknown:
+            raise KeyError(f"Cells not compiled into this template: {sorted(unknown)}")
+
+        replaced = dict(self._replaced)
+        replaced[self.sheet_part] = self._render_sheet(values)
+
+        out = io.BytesIO()
+        central = []
+        for info in self._infos:
+            if info.filename in self._dropped:
+                continue
+            name = info.filename.encode("utf-8")
+            flags = info.flag_bits & 0x800  # keep the UTF-8 name flag, never a data descriptor
+            if info.filename in replaced:
+                raw = replaced[info.filename]
+                crc, size = zlib.crc32(raw), len(raw)
+                compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+                data = compressor.compress(raw) + compressor.flush()
+                method = zipfile.ZIP_DEFLATED
+            else:
+                crc, size, method = info.CRC, info.file_size, info.compress_type
+                data = self._raw_data(info)
+
+            dos_time, dos_date = _dos_datetime(info.date_time)
+            offset = out.tell()
+            out.write(struct.pack("<4s5H3L2H", b"PK\x03\x04", 20, flags, method, dos_time, dos_date,
+                                  crc, len(data), size, len(name), 0))
+            out.write(name)
+            out.write(data)
+            central.append(struct.pack("<4s6H3L5H2L", b"PK\x01\x02", 20, 20, flags, method, dos_time,
+                                       dos_date, crc, len(data), size, len(name), 0, 0, 0, 0,
+                                       info.external_attr, offset) + name)
+
+        cd_offset = out.tell()
+        for record in central:
+            out.write(record)
+        out.write(struct.pack("<4s4H2LH", b"PK\x05\x06", 0, 0, len(central), len(central),
+                              out.tell() - cd_offset, cd_offset, 0))
+        return out.getvalue()
+
+    def _raw_data(self, info: zipfile.ZipInfo) -> bytes:
+        """Compressed bytes of one part, sliced straight out of the template."""
+        header = self._data[info.header_offset:info.header_offset + 30]
+        name_len, extra_len = struct.unpack("<2H", header[26:30])
+        start = info.header_offset + 30 + name_len + extra_len
+        return self._data[start:start + info.compress_size]
+
+    def save(self, values: dict, output: str | Path | BinaryIO) -> None:
+        """Render and write to a path or writable binary file."""
+        data = self.render(values)
+        if hasattr(output, "write"):
+            output.write(data)
+        else:
+            Path(output).write_bytes(data)
+
+
+_compiled: dict[tuple[str, tuple], CompiledTemplate] = {}
+_compiled_lock = threading.Lock()
+
+
+def get_compiled_template(template_bytes: bytes, cells) -> CompiledTemplate:
+    """CompiledTemplate for ``cells``, compiled once per distinct template and cell set."""
+    key = (hashlib.sha256(template_bytes).hexdigest(), tuple(cells))
+    with _compiled_lock:
+        compiled = _compiled.get(key)
+        if compiled is None:
+            if len(_compiled) >= 8:
+                _compiled.clear()
+            compiled = _compiled[key] = CompiledTemplate(template_bytes, cells)
+        return compiled
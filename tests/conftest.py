@@ -0,0 +1,177 @@
+"""
+Shared fixtures.
+
+Every cache and SQLite store goes to a throwaway directory (set before any
+module under test is imported), and ``fake_openai`` is a local HTTP server
+speaking just enough of the chat completions API for the real OpenAI client.
+``make_om`` builds small PDFs; ``extracted_pages`` records which pages
+pdfplumber extracts text from.
+"""
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+os.environ["SCORECARD_CACHE_DIR"] = tempfile.mkdtemp(prefix="scorecard-tests-")
+os.environ.setdefault("SEARCH_INDEX_ENABLED", "0")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pytest  # noqa: E402
+
+FAKE_FIELDS = {"Current Tenant": "Taco Bell", "Acreage": "0.83"}
+
+
+class FakeOpenAIServer:
+    """
+    Answers POST /v1/chat/completions from a queue of planned replies.
+
+    ``reply(status=200, content=None, headers=None, delay=0, chunk_delay=0)``
+    queues one answer; with the queue empty every request gets a 200 carrying
+    FAKE_FIELDS. Requests with ``stream`` set get the content back as
+    server-sent events, a few characters per chunk (``chunk_delay`` seconds
+    apart). ``requests`` holds the
+    JSON bodies received, in order.
+    """
+
+    def __init__(self):
+        self.replies = deque()
+        self.requests = []
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with server.lock:
+                    server.requests.append(body)
+                    status, content, headers, delay, chunk_delay = (server.replies.popleft() if server.replies
+                                                                    else (200, None, {}, 0, 0))
+                if delay:
+                    time.sleep(delay)
+                if status == 200 and body.get("stream"):
+                    self.stream(body, json.dumps(FAKE_FIELDS) if content is None else content, headers,
+                                chunk_delay)
+                    return
+                if status == 200:
+                    payload = {
+                        "id": "chatcmpl-test", "object": "chat.completion", "created": 0, "model": body["model"],
+                        "choices": [{"index": 0, "finish_reason": "stop",
+                                     "message": {"role": "assistant",
+                                                 "content": json.dumps(FAKE_FIELDS) if content is None else content}}],
+                        "usage": {"prompt_tokens": 100, "completion_tokens": 20, "total_tokens": 120},
+                    }
+                else:
+                    payload = {"error": {"message": f"fake {status}", "type": "fake", "code": None}}
+                data = json.dumps(payload).encode()
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.end_headers()
+                    self.wfile.write(data)
+                except OSError:
+                    pass  # the client gave up (timeout) before we answered
+
+            def stream(self, body: dict, content: str, headers: dict, chunk_delay: float):
+                def chunk(delta: dict, finish=None, usage=None) -> bytes:
+                    data = {"id": "chatcmpl-test", "object": "chat.completion.chunk", "created": 0,
+                            "model": body["model"],
+                            "choices": [{"index": 0, "delta": delta, "finish_reason": finish}] if delta else [],
+                            "usage": usage}
+                    return f"data: {json.dumps(data)}\n\n".encode()
+
+                events = [chunk({"role": "assistant", "content": ""})]
+                events += [chunk({"content": content[i:i + 7]}) for i in range(0, len(content), 7)]
+                events.append(chunk({"content": ""}, finish="stop"))
+                if body.get("stream_options", {}).get("include_usage"):
+                    events.append(chunk({}, usage={"prompt_tokens": 100, "completion_tokens": 20,
+                                                   "total_tokens": 120}))
+                events.append(b"data: [DONE]\n\n")
+                try:
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/event-stream")
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.end_headers()
+                    for event in events:
+                        self.wfile.write(event)
+                        self.wfile.flush()
+                        time.sleep(chunk_delay)
+                except OSError:
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/v1"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def reply(self, status: int = 200, content=None, headers=None, delay: float = 0,
+              chunk_delay: float = 0) -> None:
+        with self.lock:
+            self.replies.append((status, content, headers or {}, delay, chunk_delay))
+
+    def client(self):
+        from openai import OpenAI
+        return OpenAI(api_key="test", base_url=self.url, max_retries=0)
+
+    def async_client(self):
+        from openai import AsyncOpenAI
+        return AsyncOpenAI(api_key="test", base_url=self.url, max_retries=0)
+
+
+@pytest.fixture
+def fake_openai():
+    server = FakeOpenAIServer()
+    server.thread.start()
+    yield server
+    server.httpd.shutdown()
+    server.httpd.server_close()
+
+
+def make_om(pages: list[list[str]]) -> bytes:
+    """A PDF with one page per list of lines (same fonts and sizes throughout)."""
+    from reportlab.pdfgen import canvas
+    buf = io.BytesIO()
+    pdf = canvas.Canvas(buf)
+    for lines in pages:
+        pdf.setFont("Helvetica", 12)
+        for i, line in enumerate(lines):
+            pdf.drawString(72, 720 - 18 * i, line)
+        pdf.showPage()
+    pdf.save()
+    return buf.getvalue()
+
+
+@pytest.fixture
+def extracted_pages(monkeypatch):
+    """Page numbers pdfplumber extracted text from, in order."""
+    from pdfplumber.page import Page
+    seen = []
+    original = Page.extract_text
+
+    def extract_text(self, *args, **kwargs):
+        seen.append(self.page_number)
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(Page, "extract_text", extract_text)
+    return seen
+
+
+@pytest.fixture
+def fresh_limiter(monkeypatch):
+    """A generous process-wide rate limiter of its own (tests that need tight limits patch their own)."""
+    import rate_limit
+    limiter = rate_limit.RateLimiter(rpm=100_000, tpm=100_000_000)
+    monkeypatch.setattr(rate_limit, "_limiter", limiter)
+    return limiter
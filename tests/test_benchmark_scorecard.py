@@ -0,0 +1,14 @@
+import time
+
+import rate_limit
+from benchmark_scorecard import run_benchmarks
+
+
+def test_benchmark_stages_are_not_throttled_by_the_process_limiter(monkeypatch):
+    tight = rate_limit.RateLimiter(rpm=1, tpm=100)  # one GPT call a minute
+    monkeypatch.setattr(rate_limit, "_limiter", tight)
+    started = time.monotonic()
+    results = run_benchmarks([2], [0], repeats=3)
+    assert time.monotonic() - started < 30
+    assert results["cases"][0]["stages"]["interpret_payload_with_gpt"]["max"] < 1
+    assert rate_limit.get_rate_limiter() is tight  # put back afterwards
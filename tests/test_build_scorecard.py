@@ -0,0 +1,40 @@
+import io
+
+import pytest
+from openpyxl import Workbook
+
+from build_scorecard import build_scorecard, build_scorecard_bytes
+from portfolio_export import write_portfolio
+
+
+@pytest.fixture
+def template() -> bytes:
+    buf = io.BytesIO()
+    Workbook().save(buf)
+    return buf.getvalue()
+
+
+def test_build_scorecard_returns_fields_and_path(fake_openai, fresh_limiter, template, tmp_path):
+    result = build_scorecard("Tenant: Taco Bell", template, client=fake_openai.client(), out_dir=tmp_path,
+                             use_cache=False, index=False)
+    fields, path = result
+    assert fields["Current Tenant"] == "Taco Bell"
+    assert path.startswith(str(tmp_path))
+    # Results still feed straight into the portfolio writer
+    assert write_portfolio([result], tmp_path / "Portfolio.xlsx") == 1
+
+
+def test_trace_true_adds_the_spans(fake_openai, fresh_limiter, template, tmp_path):
+    fields, path, spans = build_scorecard("Tenant: Taco Bell", template, client=fake_openai.client(),
+                                          out_dir=tmp_path, use_cache=False, index=False, trace=True)
+    names = [s["name"] for s in spans]
+    assert "llm_call" in names and "workbook_save" in names
+
+
+def test_build_scorecard_bytes_spans_are_opt_in(fake_openai, fresh_limiter, template):
+    client = fake_openai.client()
+    assert len(build_scorecard_bytes("Tenant: Taco Bell", template, client=client, use_cache=False,
+                                     index=False)) == 3
+    *_, spans = build_scorecard_bytes("Tenant: Taco Bell", template, client=client, use_cache=False,
+                                      index=False, trace=True)
+    assert spans and {"name", "start", "duration", "depth", "attrs"} <= set(spans[0])
@@ -0,0 +1,54 @@
+import random
+
+import pandas as pd
+import pytest
+
+from build_scorecard import SCORECARD_LAYOUT, score_deal
+from bulk_scoring import score_frame
+
+NUMBERS = [None, "", 0, 1, 2.5, "0.83 AC", "1.25 acres", "2,300 SF", "12,500", "$120,000", "10% every 5 years",
+           "1.5% annually", "8.7", 15, 7500, "n/a", "about 4,000 locations", 0.5, 45, 3, "25 years"]
+FIELDS = {
+    "Acreage": NUMBERS,
+    "Box Size": NUMBERS,
+    "Number of National Locations": NUMBERS,
+    "Lease Term": NUMBERS,
+    "Rent Growth": NUMBERS,
+    "Absolute Rent": NUMBERS + [60000, 95000, 150000, 250000, "$1,000,000"],
+    "Restaurant/Auto/Medical?": [None, "", "Yes", "No", " yes ", "YES"],
+    "Single Tenant?": [None, "", "Yes", "No", "yes"],
+    "Drive-Thru (QSR) / Carry-out (CDR)": [None, "", "NA", "QSR", "CDR", "qsr drive-thru", "None"],
+    "Lease Structure": [None, "", "NNN", "NN", "Absolute NNN", "Master Lease", "Gross",
+                        "Meaningful LL obligations"],
+    "Current Tenant": [None, "", "Taco Bell", "O'Reilly Auto Parts", "Starbucks"],
+    "Address": [{}, {"Line 1": "1 Main St", "City": "Ames", "State": "IA", "Zip": "50010"},
+                {"City": "Cedar Rapids", "State": ""}],
+    "Year Built": [None, 2015, "1998"],
+}
+
+
+def random_deals(count: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    return [{field: rng.choice(values) for field, values in FIELDS.items()} for _ in range(count)]
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_score_frame_matches_score_deal_row_for_row(seed):
+    deals = random_deals(1000, seed)
+    frame = score_frame(pd.DataFrame(deals))
+    for i, deal in enumerate(deals):
+        expected = score_deal(deal)
+        row = frame.iloc[i]
+        for item in SCORECARD_LAYOUT:
+            score, comment = expected[item]
+            assert row[f"{item} Score"] == score, (item, deal)
+            assert row[f"{item} Comment"] == comment, (item, deal)
+        assert row["Total Score"] == pytest.approx(sum(score for score, _ in expected.values()))
+
+
+def test_missing_columns_score_like_missing_fields():
+    frame = score_frame(pd.DataFrame([{"Current Tenant": "Taco Bell"}]))
+    expected = score_deal({"Current Tenant": "Taco Bell"})
+    for item, (score, comment) in expected.items():
+        assert frame.iloc[0][f"{item} Score"] == score
+        assert frame.iloc[0][f"{item} Comment"] == comment
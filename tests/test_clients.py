@@ -0,0 +1,45 @@
+import asyncio
+import gc
+
+import clients
+from clients import get_async_openai_client, get_openai_client
+
+
+async def current_client():
+    return get_async_openai_client("sk-test")
+
+
+def test_async_clients_are_shared_within_a_loop_only():
+    async def twice():
+        return get_async_openai_client("sk-test"), get_async_openai_client("sk-test")
+
+    first, again = asyncio.run(twice())
+    assert first is again
+    assert asyncio.run(current_client()) is not first
+
+
+def test_a_new_loop_never_gets_a_client_of_a_closed_one():
+    seen, loop_ids = [], set()
+    for _ in range(20):
+        loop = asyncio.new_event_loop()
+        loop_ids.add(id(loop))
+        seen.append(loop.run_until_complete(current_client()))
+        loop.close()
+        del loop
+        gc.collect()
+    assert len(loop_ids) < len(seen)  # CPython handed later loops the id of a collected one...
+    assert len(set(map(id, seen))) == len(seen)  # ...but each loop still got its own client
+
+
+def test_registries_of_closed_loops_are_dropped():
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(current_client())
+    loop.close()
+    assert loop in clients._loop_clients  # still referenced here, so not collected
+    asyncio.run(current_client())
+    assert loop not in clients._loop_clients
+
+
+def test_sync_clients_are_shared_per_key():
+    assert get_openai_client("sk-a") is get_openai_client("sk-a")
+    assert get_openai_client("sk-a") is not get_openai_client("sk-b")
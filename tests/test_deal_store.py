@@ -0,0 +1,30 @@
+import sqlite3
+
+import deal_store
+from deal_store import count_deals, get_deal, list_deals, save_deal
+
+FIELDS = {"Current Tenant": "Taco Bell", "Acreage": "0.83"}
+
+
+def test_history_is_scoped_to_its_owner(tmp_path):
+    db = tmp_path / "deals.sqlite3"
+    mine = [save_deal(FIELDS, f"mine {i}.xlsx", owner="session-a", path=db) for i in range(3)]
+    theirs = save_deal(FIELDS, "theirs.xlsx", owner="session-b", path=db)
+    assert count_deals(owner="session-a", path=db) == 3
+    assert [d["id"] for d in list_deals(0, 10, owner="session-a", path=db)] == mine[::-1]
+    assert [d["id"] for d in list_deals(0, 10, owner="session-b", path=db)] == [theirs]
+    assert [d["id"] for d in list_deals(1, 1, owner="session-a", path=db)] == [mine[1]]
+    assert count_deals(path=db) == 4  # no owner: every deal
+
+
+def test_a_store_from_before_owners_gains_the_column(tmp_path):
+    db = tmp_path / "old.sqlite3"
+    with sqlite3.connect(db) as conn:
+        conn.executescript("CREATE TABLE deals (id INTEGER PRIMARY KEY, created_at REAL NOT NULL, tenant TEXT, "
+                           "filename TEXT NOT NULL, source TEXT, fields TEXT NOT NULL, scores TEXT NOT NULL, "
+                           "total_score REAL NOT NULL);"
+                           "INSERT INTO deals VALUES (1, 0, 'Sonic', 'old.xlsx', NULL, '{}', '{}', 3);")
+    deal_store._ready.discard(db)
+    deal_id = save_deal(FIELDS, "new.xlsx", owner="session-a", path=db)
+    assert get_deal(1, path=db)["owner"] is None
+    assert [d["id"] for d in list_deals(owner="session-a", path=db)] == [deal_id]
@@ -0,0 +1,99 @@
+import pytest
+
+from conftest import make_om
+from extractor import FIELD_EVIDENCE, scan_pages
+
+
+@pytest.mark.parametrize("text, found", [
+    ("Property Address: 4120 Edgewood Rd SW", True),
+    ("property address", True),
+    ("Cedar Rapids, IA 52404", True),
+    ("Cedar Rapids IA 52404", True),
+    ("suite at 12345 square feet", False),
+    ("Cedar Rapids, ia 52404", False),
+])
+def test_address_evidence_needs_a_label_or_an_uppercase_state_and_zip(text, found):
+    assert bool(FIELD_EVIDENCE["Address"].search(text)) is found
+
+
+def test_a_five_digit_number_is_not_address_evidence_for_the_scan():
+    _, missing = scan_pages(iter(["Tenant profile: at 12345 locations"]))
+    assert "Address" in missing
+    _, missing = scan_pages(iter(["Tenant profile: at 12345 locations", "1 Main St, Ames, IA 50010"]))
+    assert "Address" not in missing
+
+
+def om_pages(year_built_page: int) -> list[list[str]]:
+    pages = [["Marcus & Millichap", "Offering Memorandum"], ["Confidentiality"],
+             ["PROPERTY OVERVIEW", "Tenant: Taco Bell", "Lease Type: NNN", "Annual Rent: $120,000",
+              "1 Main St, Ames, IA 50010", "Lot Size: 0.83 Acres", "GLA: 2,300 SF"],
+             ["Market Overview"], ["Demographics"], ["Disclaimer"]]
+    pages[year_built_page - 1].append("Year Built: 1998")
+    return pages
+
+
+def test_unknown_layout_extracts_page_one_once(extracted_pages):
+    from extractor import get_best_payload
+    get_best_payload(make_om(om_pages(year_built_page=5) + [["Unseen layout"]]), use_cache=False)
+    assert extracted_pages.count(1) == 1
+
+
+def test_known_layout_is_only_checked_against_its_section_pages(extracted_pages):
+    from extractor import get_best_payload, read_known_sections
+    # First deck: Year Built turns up on page 5, outside page 1 and the PROPERTY OVERVIEW page
+    get_best_payload(make_om(om_pages(year_built_page=5)), use_cache=False)
+    # Next deck of the same layout puts it on page 4; pages 1 and 3 still check out
+    _, _, pages = read_known_sections(make_om(om_pages(year_built_page=4)))
+    assert pages is not None and sorted(pages) == [1, 3]
+    # A deck whose section page lost the rent has to be scanned in full
+    changed = om_pages(year_built_page=4)
+    changed[2].remove("Annual Rent: $120,000")
+    assert read_known_sections(make_om(changed))[2] is None
+
+
+@pytest.mark.parametrize("text, found", [
+    ("Current Tenant: Taco Bell", False),
+    ("Parent company: Yum! Brands", False),
+    ("Annual Rent: $120,000", True),
+    ("Rent: $98,000", True),
+    ("RENT ROLL", True),
+    ("NOI $120,000", True),
+])
+def test_rent_evidence_is_a_rent_phrase_not_a_substring(text, found):
+    assert bool(FIELD_EVIDENCE["Absolute Rent"].search(text)) is found
+
+
+def test_current_tenant_on_page_one_does_not_end_the_scan_before_the_rent():
+    from extractor import get_best_payload
+    pages = [["Current Tenant: Taco Bell", "Lease Type: NNN", "Lease Term: 15 years remaining",
+              "Rent Increases: 10% every 5 years", "Lot Size: 0.83 Acres", "Drive-Thru: Yes", "GLA: 2,300 SF",
+              "1 Main St, Ames, IA 50010", "Year Built: 1998", "7,200 locations"],
+             ["Market Overview"], ["Annual Rent: $120,000"], ["Disclaimer"]]
+    payload, read = get_best_payload(make_om(pages), use_cache=False, with_pages=True)
+    assert 3 in read
+    assert "120,000" in payload
+
+
+def test_parallel_read_sends_each_shard_a_path_not_the_pdf_bytes(monkeypatch):
+    import extractor
+    submitted, contexts = [], []
+
+    class RecordingPool(extractor.ProcessPoolExecutor):
+        def __init__(self, *args, mp_context=None, **kwargs):
+            contexts.append(mp_context.get_start_method())
+            super().__init__(*args, mp_context=mp_context, **kwargs)
+
+        def submit(self, fn, *args, **kwargs):
+            submitted.append(args)
+            return super().submit(fn, *args, **kwargs)
+
+    monkeypatch.setattr(extractor, "ProcessPoolExecutor", RecordingPool)
+    monkeypatch.setattr(extractor, "PARALLEL_MIN_PAGES", 2)
+    pdf = make_om([[f"Page {n} of the deck"] for n in range(1, 7)])
+    pages = extractor._read_pages(pdf, workers=2)
+    assert pages == extractor._read_pages(pdf, workers=1)
+    assert len(submitted) > 1
+    assert not any(isinstance(arg, bytes) for args in submitted for arg in args)
+    assert len({args[0] for args in submitted}) == 1  # one temp file shared by every shard
+    assert not submitted[0][0].exists()  # and removed afterwards
+    assert contexts and contexts[0] in ("forkserver", "spawn")
@@ -0,0 +1,89 @@
+import pytest
+
+from fast_extract import FAST_PATH_MIN_CONFIDENCE, INLINE, resolve_fields
+
+
+def test_inline_guesses_stay_below_the_fast_path_threshold():
+    assert INLINE < FAST_PATH_MIN_CONFIDENCE
+
+
+@pytest.mark.parametrize("text, field", [
+    ("The site sits near 30 restaurants and a regional mall.", "Number of National Locations"),
+    ("Across the street from an auto parts store.", "Drive-Thru (QSR) / Carry-out (CDR)"),
+    ("Unlike the multi-tenant strip next door, the building is leased to Taco Bell.", "Single Tenant?"),
+    ("Neighbours include a pharmacy, medical clinic and bank.", "Restaurant/Auto/Medical?"),
+    ("The property was built in 1998.", "Year Built"),
+    ("NOI: $120,000", "Absolute Rent"),
+])
+def test_running_text_guesses_are_left_to_gpt(text, field):
+    resolved, confidences = resolve_fields(text)
+    assert field not in resolved
+    assert 0 < confidences[field] < FAST_PATH_MIN_CONFIDENCE
+
+
+@pytest.mark.parametrize("text, field, value", [
+    ("Number of Locations: 7,200", "Number of National Locations", 7200),
+    ("Drive-Thru: Yes", "Drive-Thru (QSR) / Carry-out (CDR)", "QSR"),
+    ("Property Type: Quick-service restaurant", "Restaurant/Auto/Medical?", "Yes"),
+    ("Lease Type: Absolute NNN", "Lease Structure", "NNN"),
+])
+def test_labelled_values_clear_the_fast_path(text, field, value):
+    assert resolve_fields(text)[0][field] == value
+
+
+@pytest.mark.parametrize("text, rent", [
+    ("Base Rent: $32.50 PSF\nAnnual Rent: $120,000", 120000),
+    ("Base Rent: $32.50/SF\nRent: $98,000", 98000),
+    ("Rent: $120,000 ($32.50 per square foot)", 120000),
+    ("Current Rent: $40 per SF\nAnnual Base Rent: $150,000", 150000),
+    ("Base Rent: $10,000 / month", 120000),
+    ("Base Rent: $95,500", 95500),
+])
+def test_absolute_rent_prefers_annual_amounts(text, rent):
+    assert resolve_fields(text)[0]["Absolute Rent"] == rent
+
+
+def test_absolute_rent_rejects_per_square_foot_rates():
+    assert "Absolute Rent" not in resolve_fields("Base Rent: $32.50 PSF")[0]
+
+
+@pytest.mark.parametrize("text, field, value", [
+    ("Single Tenant: Yes", "Single Tenant?", "Yes"),
+    ("Tenancy: Multi-tenant", "Single Tenant?", "No"),
+    ("Restaurant/Auto/Medical: Yes", "Restaurant/Auto/Medical?", "Yes"),
+    ("Lease Term: 15 years remaining", "Lease Term", "15"),
+])
+def test_labelled_yes_no_and_remaining_term(text, field, value):
+    assert resolve_fields(text)[0][field] == value
+
+
+def test_original_lease_term_is_not_the_remaining_term():
+    assert "Lease Term" not in resolve_fields("Lease Term: 20 years")[0]
+
+
+LABELLED_EMAIL = """\
+Tenant: Taco Bell
+Address: 123 Main St, Cedar Rapids, IA 52404
+Lease Type: Absolute NNN
+Lease Term: 15 years remaining
+Annual Rent: $120,000
+Rent Increases: 10% every 5 years
+Lot Size: 0.83 Acres
+Building Size: 2,400 SF
+Year Built: 2019
+Single Tenant: Yes
+Restaurant/Auto/Medical: Yes
+Drive-Thru: Yes
+Number of Locations: 7,200
+"""
+
+
+def test_a_labelled_email_is_answered_without_gpt(fake_openai):
+    from build_scorecard import extract_fields
+    from tracing import tracing
+
+    with tracing() as trace:
+        fields = extract_fields(LABELLED_EMAIL, client=fake_openai.client(), use_cache=False)
+    assert fake_openai.requests == []
+    assert [s["attrs"]["llm_skipped"] for s in trace.to_list() if s["name"] == "fast_path"] == [True]
+    assert fields["Single Tenant?"] == "Yes" and fields["Current Tenant"] == "Taco Bell"
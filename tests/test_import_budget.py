@@ -0,0 +1,21 @@
+import os
+
+import pytest
+
+from import_budget import BUDGETS, check
+
+# Timings are noisy on shared CI runners; IMPORT_BUDGET_SCALE loosens the limits there
+SCALE = float(os.getenv("IMPORT_BUDGET_SCALE", "2"))
+
+
+@pytest.mark.parametrize("module", list(BUDGETS))
+def test_module_stays_within_its_import_budget(module):
+    limit_ms, allowed = BUDGETS[module]
+    total, heavy, _ = check(module, allowed, repeats=3)
+    assert not heavy, f"import {module} loads {', '.join(heavy)} at import time"
+    assert total <= limit_ms * SCALE, f"import {module} took {total:.1f}ms (budget {limit_ms * SCALE:g}ms)"
+
+
+def test_build_scorecard_leaves_the_heavy_clients_for_first_use():
+    _, _, loaded = check("build_scorecard", (), repeats=1)
+    assert not any(name.split(".")[0] in ("boto3", "botocore", "openai", "pdfplumber") for name in loaded)
@@ -0,0 +1,65 @@
+import time
+
+import pytest
+
+import build_scorecard
+import deal_store
+import job_queue
+from job_queue import WORKER_ID, connect, enqueue, get_jobs, heartbeat, requeue_stale, run_job
+
+
+@pytest.fixture(autouse=True)
+def own_databases(tmp_path, monkeypatch):
+    monkeypatch.setattr(job_queue, "JOB_QUEUE_PATH", tmp_path / "jobs.sqlite3")
+    monkeypatch.setattr(job_queue, "JOB_INPUT_DIR", tmp_path / "inputs")
+    monkeypatch.setattr(deal_store, "DEAL_STORE_PATH", tmp_path / "deals.sqlite3")
+
+
+def running_job(worker: str, heartbeat_at) -> int:
+    job_id = enqueue("Tenant: Taco Bell", "email")
+    with connect() as conn:
+        conn.execute("UPDATE jobs SET status = 'running', worker = ?, heartbeat_at = ? WHERE id = ?",
+                     (worker, heartbeat_at, job_id))
+    return job_id
+
+
+def statuses(*job_ids) -> list[str]:
+    return [job["status"] for job in get_jobs(list(job_ids))]
+
+
+def test_only_jobs_with_a_stale_heartbeat_are_requeued():
+    alive = running_job("other-host:123:abc", time.time())
+    dead = running_job("other-host:456:def", time.time() - 120)
+    legacy = running_job(None, None)  # claimed before heartbeats existed
+    assert requeue_stale(stale_seconds=60) == 2
+    assert statuses(alive, dead, legacy) == ["running", "queued", "queued"]
+    assert get_jobs([dead])[0]["worker"] is None
+
+
+def test_heartbeat_only_refreshes_this_process_jobs():
+    mine = running_job(WORKER_ID, time.time() - 120)
+    theirs = running_job("other-host:456:def", time.time() - 120)
+    heartbeat()
+    requeue_stale(stale_seconds=60)
+    assert statuses(mine, theirs) == ["running", "queued"]
+
+
+def test_run_job_scores_without_fetching_the_template_or_building_a_workbook(
+        fake_openai, fresh_limiter, monkeypatch):
+    def no_workbook(*args, **kwargs):
+        raise AssertionError("the worker must not touch the template or workbook")
+
+    monkeypatch.setattr(build_scorecard, "get_template_from_s3", no_workbook)
+    monkeypatch.setattr(build_scorecard, "write_to_template", no_workbook)
+    job_id = enqueue("Tenant: Taco Bell\nLot Size: 0.83 Acres", "email", use_cache=False, owner="session-a")
+    with connect() as conn:
+        conn.execute("UPDATE jobs SET status = 'running', worker = ?, heartbeat_at = ? WHERE id = ?",
+                     (WORKER_ID, time.time(), job_id))
+    run_job(get_jobs([job_id])[0], client=fake_openai.client())
+
+    job = get_jobs([job_id])[0]
+    assert job["status"] == "done", job["error"]
+    assert job["stage"] == "scoring" and job["progress"] == 1.0
+    assert job["fields"]["Current Tenant"] == "Taco Bell"
+    assert {s["name"] for s in job["spans"]} >= {"load_payload", "llm_call", "scoring"}
+    assert [d["id"] for d in deal_store.list_deals(owner="session-a")] == [job["deal_id"]]
@@ -0,0 +1,56 @@
+import json
+import time
+
+import pytest
+
+import build_scorecard
+from json_stream import JSONObjectStream
+
+ANSWER = ('{"Current Tenant": "A \\"quoted\\" \\\\ name } ,", "Address": {"Line 1": "1 Main St", "Zip": "50010"}, '
+          '"Tags": [1, [2, "]"], {"k": "}"}], "Acreage": 0.83, "Single Tenant?": true, "Year Built": null, '
+          '"Box Size": -2.4e3}')
+
+
+def feed_in(text: str, size: int) -> list:
+    parser, found = JSONObjectStream(), []
+    for i in range(0, len(text), size):
+        found += parser.feed(text[i:i + size])
+    assert parser.done
+    return found
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, len(ANSWER)])
+def test_members_match_json_loads_however_the_text_is_split(size):
+    assert feed_in(ANSWER, size) == list(json.loads(ANSWER).items())
+
+
+def test_each_member_is_reported_as_soon_as_its_value_completes():
+    parser = JSONObjectStream()
+    assert parser.feed('{"a": "x\\') == []         # the chunk ends inside an escape
+    assert parser.feed('"y') == []                 # ...so that quote does not close the string
+    assert parser.feed('", "b": {"c": [1') == [("a", 'x"y')]
+    assert parser.feed("]}") == [("b", {"c": [1]})]
+    assert parser.feed(', "n": 12') == []          # a number may still go on
+    assert parser.feed("}") == [("n", 12)]         # the closing brace ends the last scalar
+    assert parser.done
+
+
+def test_a_malformed_member_is_skipped_and_the_rest_still_parse():
+    assert feed_in('{"a": tru, "b": "ok", "c": [1,], "d": 2}', 1) == [("b", "ok"), ("d", 2)]
+
+
+def test_streamed_fields_are_reported_in_order_before_the_call_returns(fake_openai, fresh_limiter):
+    answer = {"Current Tenant": "Taco Bell", "Lease Structure": "NNN", "Box Size": "2,300 SF",
+              "Not A Field": "ignored", "Acreage": "0.83"}
+    fake_openai.reply(content=json.dumps(answer), chunk_delay=0.03)
+    seen = []
+    result = build_scorecard.interpret_payload_with_gpt(
+        "Tenant: Taco Bell", client=fake_openai.client(), use_cache=False,
+        on_field=lambda name, value: seen.append((name, value, time.monotonic())))
+    returned = time.monotonic()
+
+    assert fake_openai.requests[0]["stream"] is True
+    assert [name for name, _, _ in seen] == ["Current Tenant", "Lease Structure", "Box Size", "Acreage"]
+    assert all(result[name] == value for name, value, _ in seen)
+    # The first field arrived while most of the answer was still streaming in
+    assert returned - seen[0][2] > 0.15
@@ -0,0 +1,130 @@
+import asyncio
+import json
+import time
+
+import openai
+import pytest
+
+import build_scorecard
+import llm_policy
+from conftest import FAKE_FIELDS
+from llm_policy import LatencyStats, run_hedged, run_hedged_async
+
+
+@pytest.fixture(autouse=True)
+def quick_policy(monkeypatch, fresh_limiter):
+    """Short backoff and timeouts, fresh latency stats, no response cache."""
+    monkeypatch.setattr(llm_policy, "LLM_BACKOFF_BASE_SECONDS", 0.01)
+    monkeypatch.setattr(build_scorecard, "LLM_TIMEOUT_SECONDS", 5.0)
+    monkeypatch.setattr(build_scorecard, "LLM_DEADLINE_SECONDS", 10.0)
+    stats = LatencyStats()
+    monkeypatch.setattr(build_scorecard, "get_latency_stats", lambda: stats)
+    return stats
+
+
+def ask(server, **kwargs):
+    return build_scorecard.interpret_payload_with_gpt("Tenant: Taco Bell", client=server.client(),
+                                                      use_cache=False, **kwargs)
+
+
+def test_5xx_answers_are_retried(fake_openai):
+    fake_openai.reply(500)
+    fake_openai.reply(503)
+    assert ask(fake_openai)["Current Tenant"] == "Taco Bell"
+    assert len(fake_openai.requests) == 3
+
+
+def test_an_answer_that_is_not_a_json_object_is_retried(fake_openai):
+    fake_openai.reply(content="Sorry, I can't help with that.")
+    fake_openai.reply(content="[]")
+    assert ask(fake_openai)["Current Tenant"] == "Taco Bell"
+    assert len(fake_openai.requests) == 3
+
+
+def test_client_errors_are_not_retried(fake_openai):
+    fake_openai.reply(400)
+    with pytest.raises(openai.BadRequestError):
+        ask(fake_openai)
+    assert len(fake_openai.requests) == 1
+
+
+def test_retries_give_up_with_the_last_error(fake_openai, monkeypatch):
+    monkeypatch.setattr(build_scorecard, "LLM_MAX_RETRIES", 2)
+    for _ in range(5):
+        fake_openai.reply(502)
+    with pytest.raises(openai.InternalServerError):
+        ask(fake_openai)
+    assert len(fake_openai.requests) == 3
+
+
+def test_the_deadline_covers_every_attempt(fake_openai, monkeypatch):
+    monkeypatch.setattr(build_scorecard, "LLM_DEADLINE_SECONDS", 0.5)
+    for _ in range(5):
+        fake_openai.reply(delay=2)
+    started = time.monotonic()
+    with pytest.raises((openai.APITimeoutError, TimeoutError)):
+        ask(fake_openai)
+    assert time.monotonic() - started < 1.5
+    assert len(fake_openai.requests) == 1  # no time left for a retry
+
+
+def test_a_stream_stops_at_the_deadline(fake_openai, monkeypatch):
+    monkeypatch.setattr(build_scorecard, "LLM_DEADLINE_SECONDS", 0.0001)
+    with pytest.raises(TimeoutError, match="deadline"):
+        ask(fake_openai, on_field=lambda name, value: None)
+    assert len(fake_openai.requests) == 1
+
+
+def test_async_hedge_cancels_the_slow_attempt(fake_openai, monkeypatch, quick_policy):
+    monkeypatch.setattr(build_scorecard, "LLM_HEDGE", True)
+    monkeypatch.setattr(llm_policy, "LLM_HEDGE_DELAY_SECONDS", 0.2)
+    fake_openai.reply(delay=3)  # the first request hangs; the hedge gets the default fast answer
+    started = time.monotonic()
+    result = asyncio.run(build_scorecard.interpret_payload_with_gpt_async(
+        "Tenant: Taco Bell", client=fake_openai.async_client(), use_cache=False))
+    assert result["Current Tenant"] == "Taco Bell"
+    assert time.monotonic() - started < 1.5
+    assert len(fake_openai.requests) == 2
+    # The loser was cancelled, not left running until it finished
+    assert quick_policy.summary()["outcomes"] == {"ok": 1, "CancelledError": 1}
+
+
+def test_sync_hedge_answers_without_waiting_for_the_slow_attempt(fake_openai, monkeypatch):
+    monkeypatch.setattr(build_scorecard, "LLM_HEDGE", True)
+    monkeypatch.setattr(llm_policy, "LLM_HEDGE_DELAY_SECONDS", 0.2)
+    fake_openai.reply(delay=3)
+    started = time.monotonic()
+    assert ask(fake_openai)["Current Tenant"] == "Taco Bell"
+    assert time.monotonic() - started < 1.5
+    assert len(fake_openai.requests) == 2
+
+
+def test_run_hedged_async_cancels_the_loser():
+    cancelled = []
+
+    async def scenario():
+        calls = 0
+
+        async def attempt():
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                try:
+                    await asyncio.sleep(10)
+                except asyncio.CancelledError:
+                    cancelled.append(True)
+                    raise
+            return json.dumps(FAKE_FIELDS)
+
+        result = await run_hedged_async(attempt, delay=0.05)
+        await asyncio.sleep(0)  # let the cancellation land
+        return result
+
+    assert asyncio.run(scenario()) == (json.dumps(FAKE_FIELDS), True)
+    assert cancelled == [True]
+
+
+def test_run_hedged_skips_the_hedge_when_the_first_attempt_is_fast():
+    calls = []
+    assert run_hedged(lambda: calls.append(1) or "ok", delay=1) == ("ok", False)
+    assert calls == [1]
@@ -0,0 +1,75 @@
+import pytest
+
+from payload_ranker import head_payload, rank_payload, split_chunks
+from rate_limit import estimate_tokens
+
+FILLER = "\n".join(f"The neighbourhood offers scenic views and pleasant weather, item {i}." for i in range(60))
+FIELD_LINES = [
+    "Lease Type: Absolute NNN",
+    "Annual Rent: $120,000",
+    "Lot Size: 0.83 Acres",
+    "Year Built: 1998",
+    "Rent Increases: 10% every 5 years",
+]
+
+
+def om_text() -> str:
+    # Field lines scattered between pages of filler, one page per "\n\n" block
+    return "\n\n".join(f"{FILLER}\n\n{line}" for line in FIELD_LINES) + "\n\n" + FILLER
+
+
+def test_text_under_the_budget_is_returned_unchanged():
+    text = "Tenant: Taco Bell\nLease Type: NNN\n\nSome other page"
+    assert rank_payload(text, token_budget=1000) == text
+
+
+def test_text_with_nothing_to_rank_is_left_to_the_caller():
+    assert rank_payload("scenic views\npleasant weather", token_budget=1000) == ""
+
+
+@pytest.mark.parametrize("budget", [20, 30, 200])
+def test_field_chunks_are_kept_over_filler_within_the_budget(budget):
+    text = om_text()
+    assert estimate_tokens(text) > budget
+    payload = rank_payload(text, token_budget=budget)
+    assert estimate_tokens(payload) <= budget
+    lines = payload.splitlines()
+    assert lines and set(lines) <= set(FIELD_LINES)  # no filler, however much room is left
+
+
+def test_all_field_chunks_go_in_when_they_fit():
+    assert rank_payload(om_text(), token_budget=200) == "\n".join(FIELD_LINES)
+
+
+def test_every_field_gets_its_best_chunk_before_any_field_gets_a_second():
+    rent_pages = [f"Annual Rent: ${100 + i},000 base rent NOI" for i in range(20)]
+    text = "\n\n".join(rent_pages + ["Lot Size: 0.83 Acres"])
+    payload = rank_payload(text, token_budget=40)
+    assert "Lot Size: 0.83 Acres" in payload
+    assert sum(page in payload for page in rent_pages) < len(rent_pages)
+
+
+def test_kept_chunks_stay_in_document_order():
+    payload = rank_payload(om_text(), token_budget=60)
+    positions = [payload.index(line) for line in FIELD_LINES if line in payload]
+    assert positions == sorted(positions)
+
+
+def test_boilerplate_repeated_on_every_page_goes_in_once():
+    footer = "Tenant: Taco Bell franchisee, lessee and guarantor"
+    text = "\n\n".join(f"{footer}\n\nAnnual Rent: ${100 + i},000" for i in range(10))
+    payload = rank_payload(text, token_budget=80)
+    assert payload.count(footer) == 1
+
+
+def test_head_payload_keeps_the_leading_chunks_within_the_budget():
+    text = "\n\n".join(f"Page {i} " + "x" * 80 for i in range(10))
+    payload = head_payload(text, token_budget=50)
+    assert payload.startswith("Page 0") and "Page 1" in payload and "Page 2" not in payload
+    assert estimate_tokens(payload) <= 50
+    assert head_payload(text, token_budget=10_000) == "\n".join(split_chunks(text))
+
+
+def test_head_payload_cuts_a_single_oversized_chunk():
+    text = "y" * 1000
+    assert head_payload(text, token_budget=10) == "y" * 40
@@ -0,0 +1,88 @@
+import io
+
+import pytest
+from openpyxl import load_workbook
+
+from build_scorecard import SCORECARD_LAYOUT, score_deal
+from portfolio_export import LINK_HEADER, PORTFOLIO_FIELDS, write_portfolio
+
+DEALS = [
+    {"Current Tenant": "Taco Bell", "Address": {"Line 1": "1 Main St", "City": "Ames", "State": "IA", "Zip": "50010"},
+     "Acreage": "0.83", "Box Size": "2,300 SF", "Lease Term": "15", "Absolute Rent": "120000",
+     "Drive-Thru (QSR) / Carry-out (CDR)": "QSR", "Year Built": 1998},
+    {"Current Tenant": "Valvoline\x07", "Address": {"Line 1": "22 Oak Ave", "City": "Ames", "State": "IA"},
+     "Acreage": "1.9", "Number of National Locations": "1,800"},
+]
+
+
+def read_rows(output) -> list[list]:
+    wb = load_workbook(output)
+    return [list(row) for row in wb["Portfolio"].iter_rows(values_only=True)]
+
+
+def test_rows_hold_the_fields_scores_and_total(tmp_path):
+    assert write_portfolio(DEALS, tmp_path / "Portfolio.xlsx") == 2
+    header, *rows = read_rows(tmp_path / "Portfolio.xlsx")
+
+    expected_header = list(PORTFOLIO_FIELDS)
+    for item in SCORECARD_LAYOUT:
+        expected_header += [f"{item} Score", f"{item} Comment"]
+    assert header == expected_header + ["Total Score", LINK_HEADER]
+
+    for deal, row in zip(DEALS, rows):
+        values = dict(zip(header, row))
+        scores = score_deal(deal)
+        for item, (score, comment) in scores.items():
+            assert values[f"{item} Score"] == score
+            assert values[f"{item} Comment"] == comment.replace("\x07", "")
+        assert values["Total Score"] == sum(score for score, _ in scores.values())
+        assert values[LINK_HEADER] is None  # no scorecard path given
+    assert rows[0][:2] == ["Taco Bell", "1 Main St Ames, IA 50010"]
+    assert rows[1][:2] == ["Valvoline", "22 Oak Ave Ames, IA"]  # illegal characters stripped
+    assert rows[0][PORTFOLIO_FIELDS.index("Year Built")] == 1998
+
+
+def test_deals_can_come_from_a_generator(tmp_path):
+    pulled = []
+
+    def deals():
+        for deal in DEALS * 3:
+            pulled.append(deal)
+            yield deal
+
+    assert write_portfolio(deals(), tmp_path / "Portfolio.xlsx") == 6
+    assert len(pulled) == 6
+    assert len(read_rows(tmp_path / "Portfolio.xlsx")) == 7
+
+
+def test_scorecard_links_are_hyperlink_formulas_relative_to_the_portfolio(tmp_path):
+    (tmp_path / "deals").mkdir()
+    scorecard = tmp_path / "deals" / 'Taco "Bell".xlsx'
+    write_portfolio([(DEALS[0], scorecard), (DEALS[1], None)], tmp_path / "Portfolio.xlsx")
+    header, first, second = read_rows(tmp_path / "Portfolio.xlsx")
+    link = header.index(LINK_HEADER)
+    assert first[link] == '=HYPERLINK("deals/Taco ""Bell"".xlsx","Open")'
+    assert second[link] is None
+
+
+def test_links_are_absolute_when_writing_to_a_file_object(tmp_path):
+    scorecard = tmp_path / "Taco Bell.xlsx"
+    buf = io.BytesIO()
+    write_portfolio([(DEALS[0], scorecard)], buf)
+    header, row = read_rows(buf)
+    assert row[header.index(LINK_HEADER)] == f'=HYPERLINK("{scorecard.resolve().as_posix()}","Open")'
+
+
+def test_link_files_false_leaves_out_the_link_column(tmp_path):
+    write_portfolio([(DEALS[0], tmp_path / "x.xlsx")], tmp_path / "Portfolio.xlsx", link_files=False)
+    header, row = read_rows(tmp_path / "Portfolio.xlsx")
+    assert LINK_HEADER not in header and header[-1] == "Total Score"
+    assert len(row) == len(header)
+
+
+@pytest.mark.parametrize("extra", [(), ([{"name": "llm_call"}],)])
+def test_build_scorecard_tuples_with_or_without_trace_spans(tmp_path, extra):
+    scorecard = tmp_path / "Taco Bell.xlsx"
+    assert write_portfolio([(DEALS[0], str(scorecard), *extra)], tmp_path / "Portfolio.xlsx") == 1
+    header, row = read_rows(tmp_path / "Portfolio.xlsx")
+    assert row[header.index(LINK_HEADER)] == '=HYPERLINK("Taco Bell.xlsx","Open")'
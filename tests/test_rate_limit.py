@@ -0,0 +1,100 @@
+import time
+
+import pytest
+
+import build_scorecard
+import llm_policy
+import rate_limit
+from rate_limit import RateLimiter
+
+
+def timed(fn) -> float:
+    start = time.monotonic()
+    fn()
+    return time.monotonic() - start
+
+
+def test_rpm_throttles_once_the_bucket_is_empty():
+    limiter = RateLimiter(rpm=120, tpm=1_000_000)  # refills 2 requests/s
+    assert timed(lambda: [limiter.acquire(1) for _ in range(120)]) < 0.1
+    assert timed(lambda: limiter.acquire(1)) == pytest.approx(0.5, abs=0.1)
+
+
+def test_tpm_throttles_and_settle_returns_unused_tokens():
+    limiter = RateLimiter(rpm=1_000_000, tpm=600)  # refills 10 tokens/s
+    assert timed(lambda: limiter.acquire(600)) < 0.05
+    limiter.settle(600, 100)  # the request only used 100 of the 600 reserved
+    assert timed(lambda: limiter.acquire(400)) < 0.05
+    assert timed(lambda: limiter.acquire(105)) == pytest.approx(0.5, abs=0.1)
+
+
+def test_pause_holds_back_every_caller():
+    limiter = RateLimiter(rpm=1_000_000, tpm=1_000_000)
+    limiter.pause(0.3)
+    assert timed(lambda: limiter.acquire(1)) == pytest.approx(0.3, abs=0.1)
+
+
+def test_429_pauses_the_limiter_for_retry_after(fake_openai, fresh_limiter, monkeypatch):
+    monkeypatch.setattr(build_scorecard, "LLM_TIMEOUT_SECONDS", 5.0)
+    fake_openai.reply(429, headers={"retry-after": "0.4"})
+    elapsed = timed(lambda: build_scorecard.interpret_payload_with_gpt(
+        "Tenant: Taco Bell", client=fake_openai.client(), use_cache=False))
+    assert len(fake_openai.requests) == 2
+    # The retry waited for the Retry-After pause, not just the (shorter) jittered backoff
+    assert elapsed >= 0.4
+
+
+def test_requests_through_the_pipeline_are_throttled(fake_openai, monkeypatch):
+    monkeypatch.setattr(build_scorecard, "LLM_TIMEOUT_SECONDS", 5.0)
+    limiter = RateLimiter(rpm=120, tpm=100_000_000)
+    monkeypatch.setattr(rate_limit, "_limiter", limiter)
+    for _ in range(119):
+        limiter.acquire(1)  # one request left in the bucket
+    client = fake_openai.client()
+    call = lambda: build_scorecard.interpret_payload_with_gpt("x", client=client, use_cache=False)  # noqa: E731
+    call()
+    assert timed(call) >= 0.4  # the second one waits ~0.5s for a refill
+
+
+def settled(monkeypatch, limiter) -> list:
+    calls = []
+    original = limiter.settle
+    monkeypatch.setattr(limiter, "settle", lambda estimated, actual: (calls.append(actual),
+                                                                      original(estimated, actual)))
+    return calls
+
+
+def test_a_429_credits_the_estimate_back(fake_openai, fresh_limiter, monkeypatch):
+    monkeypatch.setattr(build_scorecard, "LLM_TIMEOUT_SECONDS", 5.0)
+    calls = settled(monkeypatch, fresh_limiter)
+    fake_openai.reply(429, headers={"retry-after": "0"})
+    build_scorecard.interpret_payload_with_gpt("Tenant: Taco Bell", client=fake_openai.client(), use_cache=False)
+    assert calls == [0, 120]  # nothing used by the 429, then the real usage of the answer
+
+
+def test_a_timed_out_request_keeps_its_estimate(fake_openai, fresh_limiter, monkeypatch):
+    monkeypatch.setattr(build_scorecard, "LLM_TIMEOUT_SECONDS", 0.2)
+    monkeypatch.setattr(llm_policy, "LLM_BACKOFF_BASE_SECONDS", 0.01)
+    calls = settled(monkeypatch, fresh_limiter)
+    fake_openai.reply(delay=1)
+    build_scorecard.interpret_payload_with_gpt("Tenant: Taco Bell", client=fake_openai.client(), use_cache=False)
+    assert calls == [120]  # the timed-out attempt was never credited back; the retry settled its usage
+
+
+def test_a_stream_cut_off_at_the_deadline_keeps_its_estimate(fake_openai, fresh_limiter, monkeypatch):
+    monkeypatch.setattr(build_scorecard, "LLM_DEADLINE_SECONDS", 0.3)
+    calls = settled(monkeypatch, fresh_limiter)
+    fake_openai.reply(chunk_delay=0.1)
+    with pytest.raises(TimeoutError):
+        build_scorecard.interpret_payload_with_gpt("Tenant: Taco Bell", client=fake_openai.client(),
+                                                   use_cache=False, on_field=lambda name, value: None)
+    assert 0 not in calls
+
+
+def test_a_request_that_never_starts_is_credited_back(fake_openai, fresh_limiter, monkeypatch):
+    monkeypatch.setattr(build_scorecard, "LLM_DEADLINE_SECONDS", 0.0)
+    calls = settled(monkeypatch, fresh_limiter)
+    with pytest.raises(TimeoutError):
+        build_scorecard.interpret_payload_with_gpt("Tenant: Taco Bell", client=fake_openai.client(),
+                                                   use_cache=False)
+    assert calls == [0] and fake_openai.requests == []
@@ -0,0 +1,228 @@
+"""
+The declarative score tables against the if/elif chains they replaced.
+
+The reference functions below are the original build_scorecard mappers,
+with each score/comment pair merged into one function, so the tables can
+be checked at every bound, just either side of it, and for NaN / infinities.
+"""
+import math
+
+import pytest
+
+from build_scorecard import rent_band, score_band
+from score_rules import RENT_BANDS, SCORE_BANDS
+
+
+def ref_acreage(acreage):
+    if acreage > 2.25:
+        score = 7
+    elif 1.75 <= acreage <= 2.25:
+        score = 6
+    elif 1.25 <= acreage < 1.75:
+        score = 5
+    elif 0.75 <= acreage < 1.25:
+        score = 4
+    elif 0.5 <= acreage < 0.75:
+        score = 2
+    else:
+        score = 0
+    if acreage > 2.25:
+        comment = f"Large parcel size of {acreage} acres"
+    elif 1.75 <= acreage <= 2.25:
+        comment = f"Good parcel size of {acreage} acres"
+    elif 1.25 <= acreage < 1.75:
+        comment = f"Adequate parcel size of {acreage} acres"
+    elif 0.75 <= acreage < 1.25:
+        comment = f"Moderate parcel size of {acreage} acres"
+    elif 0.5 <= acreage < 0.75:
+        comment = f"Small parcel size of {acreage} acres"
+    else:
+        comment = f"Very small parcel size of {acreage} acres"
+    return score, comment
+
+
+def ref_box_size(sqft):
+    score = 0 if sqft < 2000 or sqft > 9000 else 2
+    if 2000 <= sqft <= 9000:
+        comment = f"Optimal box size of {sqft:,.0f} square feet"
+    elif sqft < 2000:
+        comment = f"Box size of {sqft:,.0f} square feet is below optimal range"
+    else:
+        comment = f"Box size of {sqft:,.0f} square feet is above optimal range"
+    return score, comment
+
+
+def ref_locations(locations, tenant="Taco Bell"):
+    if locations > 600:
+        score = 2.5
+    elif 300 < locations <= 600:
+        score = 1.5
+    elif 100 < locations <= 300:
+        score = 1
+    else:
+        score = 0
+    if locations > 600:
+        comment = f"{tenant} has strong national presence with {locations:,.0f} locations"
+    elif 300 < locations <= 600:
+        comment = f"{tenant} has moderate national presence with {locations:,.0f} locations"
+    elif 100 < locations <= 300:
+        comment = f"{tenant} has limited national presence with {locations:,.0f} locations"
+    else:
+        comment = f"{tenant} has minimal national presence with {locations:,.0f} locations"
+    return score, comment
+
+
+def ref_lease_term(years):
+    if years > 15:
+        score = 5
+    elif 10 <= years <= 15:
+        score = 4
+    elif 7.5 <= years < 10:
+        score = 3
+    elif 5 <= years < 7.5:
+        score = 2
+    elif 3 <= years < 5:
+        score = 1
+    else:
+        score = 0
+    if years > 15:
+        comment = f"Very long remaining lease term of {years:,.1f} years"
+    elif 10 <= years <= 15:
+        comment = f"Long remaining lease term of {years:,.1f} years"
+    elif 7.5 <= years < 10:
+        comment = f"Moderate remaining lease term of {years:,.1f} years"
+    elif 5 <= years < 7.5:
+        comment = f"Short remaining lease term of {years:,.1f} years"
+    elif 3 <= years < 5:
+        comment = f"Very short remaining lease term of {years:,.1f} years"
+    else:
+        comment = f"Extremely short remaining lease term of {years:,.1f} years"
+    return score, comment
+
+
+def ref_rent_growth(growth):
+    if growth < 0.5 or growth > 2.25:
+        score = 0
+    elif 0.5 <= growth < 1.25:
+        score = 1
+    elif 1.25 <= growth <= 2.25:
+        score = 1.5
+    else:
+        score = 0
+    if growth < 0.5:
+        comment = f"Minimal annual rent growth of {growth:.1f}%"
+    elif 0.5 <= growth < 1.25:
+        comment = f"Moderate annual rent growth of {growth:.1f}%"
+    elif 1.25 <= growth <= 2.25:
+        comment = f"Strong annual rent growth of {growth:.1f}%"
+    else:
+        comment = f"Very high annual rent growth of {growth:.1f}%"
+    return score, comment
+
+
+def ref_rent(rent, building_type):
+    if building_type == "CDR":
+        if rent < 170000:
+            score = 8
+        elif 170000 <= rent < 210000:
+            score = 7
+        elif 210000 <= rent < 250000:
+            score = 6
+        elif 250000 <= rent < 285000:
+            score = 5
+        elif 285000 <= rent < 330000:
+            score = 3
+        else:
+            score = 0
+        if rent < 170000:
+            comment = f"Very attractive rent of ${rent:,.0f} for CDR"
+        elif 170000 <= rent < 210000:
+            comment = f"Attractive rent of ${rent:,.0f} for CDR"
+        elif 210000 <= rent < 250000:
+            comment = f"Moderate rent of ${rent:,.0f} for CDR"
+        elif 250000 <= rent < 285000:
+            comment = f"High rent of ${rent:,.0f} for CDR"
+        elif 285000 <= rent < 330000:
+            comment = f"Very high rent of ${rent:,.0f} for CDR"
+        else:
+            comment = f"Extremely high rent of ${rent:,.0f} for CDR"
+        return score, comment
+    if building_type == "QSR":
+        if rent < 90000:
+            score = 8
+        elif 90000 <= rent < 110000:
+            score = 7
+        elif 110000 <= rent < 135000:
+            score = 6
+        elif 135000 <= rent < 150000:
+            score = 5
+        elif 150000 <= rent < 170000:
+            score = 3
+        else:
+            score = 0
+        if rent < 90000:
+            comment = f"Very attractive rent of ${rent:,.0f} for QSR"
+        elif 90000 <= rent < 110000:
+            comment = f"Attractive rent of ${rent:,.0f} for QSR"
+        elif 110000 <= rent < 135000:
+            comment = f"Moderate rent of ${rent:,.0f} for QSR"
+        elif 135000 <= rent < 150000:
+            comment = f"High rent of ${rent:,.0f} for QSR"
+        elif 150000 <= rent < 170000:
+            comment = f"Very high rent of ${rent:,.0f} for QSR"
+        else:
+            comment = f"Extremely high rent of ${rent:,.0f} for QSR"
+        return score, comment
+    return 0, f"Rent: ${rent:,.0f}"
+
+
+def probe_values(bounds) -> list:
+    values = [0, 0.0, -1, -0.01, 1e12, math.nan, math.inf, -math.inf]
+    for bound in bounds:
+        values += [bound, float(bound), bound - 0.01, bound + 0.01,
+                   math.nextafter(bound, -math.inf), math.nextafter(bound, math.inf)]
+        if float(bound).is_integer():
+            values += [int(bound) - 1, int(bound) + 1]
+    return values
+
+
+def bounds_of(bands) -> list:
+    return [lower for lower, _, _ in bands[1:]] + [2.25, 15, 100, 300, 600, 9000]
+
+
+def same(actual, expected) -> bool:
+    return actual[0] == expected[0] and actual[1] == expected[1]
+
+
+@pytest.mark.parametrize("field, reference", [
+    ("Acreage", ref_acreage),
+    ("Box Size", ref_box_size),
+    ("Lease Term", ref_lease_term),
+    ("Rent Growth", ref_rent_growth),
+])
+def test_banded_fields_match_the_original_chains(field, reference):
+    for value in probe_values(bounds_of(SCORE_BANDS[field])):
+        assert same(score_band(field, value), reference(value)), value
+
+
+def test_national_locations_match_the_original_chain():
+    for value in probe_values(bounds_of(SCORE_BANDS["Number of National Locations"])):
+        assert same(score_band("Number of National Locations", value, tenant="Taco Bell"),
+                    ref_locations(value)), value
+
+
+@pytest.mark.parametrize("building_type", ["CDR", "QSR", "FCR"])
+def test_rent_ladders_match_the_original_chains(building_type):
+    bounds = [lower for bands in RENT_BANDS.values() for lower, _, _ in bands[1:]]
+    for value in probe_values(bounds):
+        assert same(rent_band(value, building_type), ref_rent(value, building_type)), value
+
+
+@pytest.mark.parametrize("field, raw", [("Box Size", "2,000 SF"), ("Acreage", "0.75 AC"), ("Lease Term", "15"),
+                                        ("Rent Growth", "2.25%"), ("Number of National Locations", "600")])
+def test_raw_strings_are_parsed_before_banding(field, raw):
+    from build_scorecard import parse_numeric_value
+    reference = {"Box Size": ref_box_size, "Acreage": ref_acreage, "Lease Term": ref_lease_term,
+                 "Rent Growth": ref_rent_growth, "Number of National Locations": ref_locations}[field]
+    context = {"tenant": "Taco Bell"} if field == "Number of National Locations" else {}
+    assert same(score_band(field, raw, **context), reference(parse_numeric_value(raw)))
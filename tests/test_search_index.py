@@ -0,0 +1,60 @@
+from pathlib import Path
+
+import pytest
+
+import batch_scorecard
+from conftest import make_om
+from extractor import get_best_payload
+from search_index import search
+
+PAGES = [["Offering Memorandum", "Taco Bell"], ["Lease Type: NNN", "Annual Rent: $120,000"],
+         ["Lot Size: 0.83 Acres", "GLA: 2,300 SF", "1 Main St, Ames, IA 50010"], ["Wombat Plaza outparcel"]]
+
+
+def test_pages_read_come_back_with_the_payload_even_from_the_cache(extracted_pages):
+    pdf = make_om(PAGES)
+    _, pages = get_best_payload(pdf, with_pages=True)
+    assert sorted(pages) == [1, 2, 3, 4] and "Wombat" in pages[4]
+    extracted_pages.clear()
+    _, cached = get_best_payload(pdf, with_pages=True)
+    assert cached == pages
+    assert extracted_pages == []
+
+
+@pytest.mark.parametrize("use_cache", [True, False])
+def test_batch_indexes_the_parsed_pages_without_reading_the_pdf_again(tmp_path, extracted_pages, use_cache):
+    path = tmp_path / f"wombat-{use_cache}.pdf"
+    path.write_bytes(make_om(PAGES))
+    _, pages, _ = batch_scorecard._parse_source(str(path), use_cache)
+    extracted_pages.clear()
+    batch_scorecard._index_source(str(path), {"Current Tenant": "Taco Bell"}, pages)
+    assert extracted_pages == []
+    hits = [hit for hit in search("wombat") if hit["source"] == Path(path).stem]
+    assert [hit["page"] for hit in hits] == [4]
+
+
+def test_eml_bodies_are_indexed_as_page_one(tmp_path):
+    path = tmp_path / "deal.eml"
+    path.write_text("Subject: New listing\nContent-Type: text/plain\n\nKangaroo Crossing, NNN, $98,000 rent\n")
+    _, pages, _ = batch_scorecard._parse_source(str(path), True)
+    assert list(pages) == [1]
+    batch_scorecard._index_source(str(path), {"Current Tenant": "Sonic"}, pages)
+    assert [hit["page"] for hit in search("kangaroo")] == [1]
+
+
+COVERED_ON_PAGE_ONE = ["Tenant: Taco Bell", "Lease Type: NNN", "Lease Term: 15 years remaining",
+                       "Annual Rent: $120,000", "Rent Increases: 10% every 5 years", "Lot Size: 0.83 Acres",
+                       "Drive-Thru: Yes", "GLA: 2,300 SF", "1 Main St, Ames, IA 50010", "Year Built: 1998",
+                       "7,200 locations"]
+
+
+def test_pages_the_early_scan_skipped_are_indexed_in_the_background(extracted_pages, monkeypatch):
+    import search_index
+    monkeypatch.setattr(search_index, "SEARCH_INDEX_ENABLED", True)
+    pdf = make_om([COVERED_ON_PAGE_ONE, ["Market Overview"], ["Platypus Point outparcel"]])
+    _, pages = get_best_payload(pdf, use_cache=False, with_pages=True)
+    assert list(pages) == [1]
+    extracted_pages.clear()
+    search_index.index_in_background(pdf, {"Current Tenant": "Taco Bell"}, "platypus", pages).result()
+    assert extracted_pages == [2, 3]  # only the pages scoring did not read
+    assert [hit["page"] for hit in search("platypus") if hit["source"] == "platypus"] == [3]
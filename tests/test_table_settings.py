@@ -0,0 +1,35 @@
+import multiprocessing
+import threading
+import uuid
+
+from table_settings import TABLE_SETTINGS_PRUNE_AFTER, _history, order_settings, record_outcome, settings_key
+
+LINES = {"vertical_strategy": "lines", "horizontal_strategy": "lines"}
+TEXT = {"vertical_strategy": "text", "horizontal_strategy": "text"}
+
+
+def record_many(fingerprint: str, times: int) -> None:
+    for _ in range(times):
+        record_outcome(fingerprint, {settings_key(LINES): 2, settings_key(TEXT): 1}, {settings_key(TEXT): 1})
+
+
+def test_concurrent_processes_and_threads_lose_no_updates():
+    fingerprint = f"test-{uuid.uuid4()}"
+    processes = [multiprocessing.Process(target=record_many, args=(fingerprint, 25)) for _ in range(4)]
+    threads = [threading.Thread(target=record_many, args=(fingerprint, 25)) for _ in range(4)]
+    for worker in processes + threads:
+        worker.start()
+    for worker in processes + threads:
+        worker.join()
+    assert all(p.exitcode == 0 for p in processes)
+    history = _history(fingerprint)
+    assert history["tried"] == {settings_key(LINES): 400, settings_key(TEXT): 200}
+    assert history["won"] == {settings_key(TEXT): 200}
+
+
+def test_settings_that_work_on_a_layout_come_first_and_dead_ones_are_dropped():
+    fingerprint = f"test-{uuid.uuid4()}"
+    assert order_settings(fingerprint, [LINES, TEXT]) == [LINES, TEXT]  # unseen layout: caller's order
+    for _ in range(TABLE_SETTINGS_PRUNE_AFTER):
+        record_outcome(fingerprint, {settings_key(LINES): 1, settings_key(TEXT): 1}, {settings_key(TEXT): 1})
+    assert order_settings(fingerprint, [LINES, TEXT]) == [TEXT]
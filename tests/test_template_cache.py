@@ -0,0 +1,68 @@
+import boto3
+import pytest
+from botocore.exceptions import ClientError
+from moto import mock_aws
+
+from template_cache import TemplateCache
+
+BUCKET, KEY = "templates-bucket", "templates/Scorecard - Blank v1 streamlit.xlsx"
+
+
+class RecordingS3:
+    """Wraps an S3 client, remembering what each get_object call returned."""
+
+    def __init__(self, client):
+        self.client = client
+        self.calls = []  # (request, "200" | error code)
+
+    def get_object(self, **request):
+        try:
+            resp = self.client.get_object(**request)
+        except ClientError as e:
+            self.calls.append((request, e.response["Error"]["Code"]))
+            raise
+        self.calls.append((request, "200"))
+        return resp
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    for name in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY"):
+        monkeypatch.setenv(name, "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    with mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        client.put_object(Bucket=BUCKET, Key=KEY, Body=b"template v1")
+        yield RecordingS3(client)
+
+
+def test_first_get_downloads_then_serves_from_memory(s3):
+    cache = TemplateCache(BUCKET, KEY, revalidate_seconds=300, client_factory=lambda: s3)
+    assert cache.get() == b"template v1"
+    assert cache.get() == b"template v1"
+    assert [status for _, status in s3.calls] == ["200"]
+    assert cache.etag
+
+
+def test_unchanged_template_revalidates_with_a_304(s3):
+    cache = TemplateCache(BUCKET, KEY, revalidate_seconds=0, client_factory=lambda: s3)
+    assert cache.get() == b"template v1"
+    etag = cache.etag
+    assert cache.get() == b"template v1"
+    request, status = s3.calls[-1]
+    assert request["IfNoneMatch"] == etag
+    assert status == "304"
+    assert cache.etag == etag
+
+
+def test_changed_template_is_downloaded_again(s3):
+    cache = TemplateCache(BUCKET, KEY, revalidate_seconds=300, client_factory=lambda: s3)
+    assert cache.get() == b"template v1"
+    old_etag = cache.etag
+    s3.client.put_object(Bucket=BUCKET, Key=KEY, Body=b"template v2")
+    assert cache.get() == b"template v1"  # still within the revalidation interval
+    cache.invalidate()
+    assert cache.get() == b"template v2"
+    assert s3.calls[-1][1] == "200"
+    assert cache.etag != old_etag
@@ -0,0 +1,144 @@
+import io
+import re
+from copy import copy
+import zipfile
+
+import pytest
+from openpyxl import Workbook, load_workbook
+from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+
+from build_scorecard import SCORECARD_CELLS, scorecard_cells, write_to_template
+from template_writer import get_compiled_template
+
+FIELDS = {
+    "Current Tenant": "A&W <Drive-In>",
+    "Address": {"Line 1": "1 Main St", "City": "Ames", "State": "IA", "Zip": "50010"},
+    "Lease Structure": "NNN",
+    "Lease Term": "15",
+    "Absolute Rent": "120000",
+    "Rent Growth": "2% annually",
+    "Acreage": "0.83",
+    "Restaurant/Auto/Medical?": "Yes",
+    "Single Tenant?": "Yes",
+    "Drive-Thru (QSR) / Carry-out (CDR)": "QSR",
+    "Box Size": "2,300 SF",
+    "Year Built": 1998,
+    "Number of National Locations": "7,200",
+}
+
+CALC_CHAIN = (b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+              b'<calcChain xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+              b'<c r="A1" i="1"/></calcChain>')
+
+
+def add_calc_chain(xlsx: bytes) -> bytes:
+    """Add xl/calcChain.xml (and its relationship and content type) the way Excel saves it."""
+    out = io.BytesIO()
+    with zipfile.ZipFile(io.BytesIO(xlsx)) as src, zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as dst:
+        for info in src.infolist():
+            data = src.read(info)
+            if info.filename == "xl/_rels/workbook.xml.rels":
+                data = data.replace(b"</Relationships>", (
+                    b'<Relationship Id="rIdCalc" Target="calcChain.xml" Type="http://schemas.openxmlformats.org'
+                    b'/officeDocument/2006/relationships/calcChain"/></Relationships>'))
+            elif info.filename == "[Content_Types].xml":
+                data = data.replace(b"</Types>", (
+                    b'<Override PartName="/xl/calcChain.xml" ContentType="application/'
+                    b'vnd.openxmlformats-officedocument.spreadsheetml.calcChain+xml"/></Types>'))
+            dst.writestr(info, data)
+        dst.writestr("xl/calcChain.xml", CALC_CHAIN)
+    return out.getvalue()
+
+
+def build_template() -> bytes:
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Scorecard"
+    wb.create_sheet("Notes")["A1"] = "untouched"
+    thin = Side(style="thin")
+    for i, ref in enumerate(SCORECARD_CELLS):
+        cell = ws[ref]
+        cell.font = Font(bold=i % 2 == 0, color="FF1F4E79")
+        cell.fill = PatternFill("solid", fgColor="FFDDEBF7")
+        cell.border = Border(left=thin, right=thin, top=thin, bottom=thin)
+        cell.alignment = Alignment(wrap_text=True, vertical="top")
+        if i % 3 == 0:
+            cell.value = "placeholder"
+    ws["A1"] = "=SUM(L8:L20)"
+    ws.merge_cells("N7:R7")
+    ws.merge_cells("B30:D31")
+    ws["B30"] = "Footer"
+    ws.column_dimensions["N"].width = 60
+    buf = io.BytesIO()
+    wb.save(buf)
+    return add_calc_chain(buf.getvalue())
+
+
+@pytest.fixture(scope="module")
+def template() -> bytes:
+    return build_template()
+
+
+def render(template: bytes, compiled: bool) -> bytes:
+    out = io.BytesIO()
+    write_to_template(FIELDS, io.BytesIO(template), out, compiled=compiled)
+    return out.getvalue()
+
+
+def style_of(cell) -> tuple:
+    # Copies: openpyxl's style proxies never compare equal, not even to themselves
+    return (copy(cell.font), copy(cell.fill), copy(cell.border), copy(cell.alignment), cell.number_format,
+            copy(cell.protection))
+
+
+def test_compiled_output_matches_openpyxl_cell_for_cell(template):
+    expected = load_workbook(io.BytesIO(render(template, compiled=False)))
+    actual = load_workbook(io.BytesIO(render(template, compiled=True)))
+    assert actual.sheetnames == expected.sheetnames
+    for name in expected.sheetnames:
+        want, got = expected[name], actual[name]
+        assert got.max_row == want.max_row and got.max_column == want.max_column
+        for want_row, got_row in zip(want.iter_rows(), got.iter_rows()):
+            for want_cell, got_cell in zip(want_row, got_row):
+                assert got_cell.value == want_cell.value, want_cell.coordinate
+                assert style_of(got_cell) == style_of(want_cell), want_cell.coordinate
+        assert sorted(map(str, got.merged_cells.ranges)) == sorted(map(str, want.merged_cells.ranges))
+        assert got.column_dimensions["N"].width == want.column_dimensions["N"].width
+    # Every scorecard value really was written
+    written = scorecard_cells(FIELDS)
+    assert {ref: actual.active[ref].value for ref in written} == written
+
+
+def test_compiled_output_drops_the_calc_chain_and_recalculates_on_load(template):
+    with zipfile.ZipFile(io.BytesIO(template)) as zf:
+        assert "xl/calcChain.xml" in zf.namelist()
+    with zipfile.ZipFile(io.BytesIO(render(template, compiled=True))) as zf:
+        assert zf.testzip() is None
+        assert "xl/calcChain.xml" not in zf.namelist()
+        assert b"calcChain" not in zf.read("xl/_rels/workbook.xml.rels")
+        assert b"calcChain" not in zf.read("[Content_Types].xml")
+        assert re.search(rb'<calcPr[^>]*fullCalcOnLoad="1"', zf.read("xl/workbook.xml"))
+
+
+def test_untouched_parts_are_copied_byte_for_byte(template):
+    compiled = get_compiled_template(template, SCORECARD_CELLS)
+    with zipfile.ZipFile(io.BytesIO(template)) as src, \
+            zipfile.ZipFile(io.BytesIO(render(template, compiled=True))) as out:
+        for name in src.namelist():
+            if name not in ("xl/calcChain.xml", compiled.sheet_part, "xl/workbook.xml",
+                            "xl/_rels/workbook.xml.rels", "[Content_Types].xml"):
+                assert out.read(name) == src.read(name), name
+
+
+def test_templates_can_be_any_readable_file(template, tmp_path):
+    path = tmp_path / "template.xlsx"
+    path.write_bytes(template)
+    expected = render(template, compiled=True)
+    for source in (path, str(path), template):
+        out = io.BytesIO()
+        write_to_template(FIELDS, source, out, compiled=True)
+        assert out.getvalue() == expected
+    with open(path, "rb") as fh:  # a file object that is not a BytesIO
+        out = io.BytesIO()
+        write_to_template(FIELDS, fh, out, compiled=True)
+        assert out.getvalue() == expected
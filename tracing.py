@@ -0,0 +1,128 @@
+"""
+Lightweight per-run stage tracing.
+
+A trace is a flat list of timed spans (template fetch, PDF open, each page's
+text, keyword window, GPT call, post-processing, workbook save...). Pipeline
+code wraps its stages in ``span()``; the spans are only recorded while a
+``tracing()`` block is active in the current context, so untraced callers pay
+next to nothing. The active trace lives in a ContextVar, which means it
+follows asyncio tasks and ``asyncio.to_thread`` but stays separate between
+concurrent Streamlit sessions.
+
+    with tracing() as trace:
+        fields, xlsx, name = build_scorecard_bytes(...)
+    trace.to_list()  # [{"name", "start", "duration", "depth", "attrs"}, ...]
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+
+class Trace:
+    """
+    Spans recorded for one run. Times are seconds relative to the trace start.
+
+    ``listener``, if given, is called with every span as it finishes (e.g. to
+    report progress while the run is still going).
+    """
+
+    def __init__(self, listener: Optional[Callable[[dict], None]] = None):
+        self.started = time.perf_counter()
+        self.listener = listener
+        self._spans: list[dict] = []
+        self._lock = threading.Lock()
+
+    def add(self, name: str, started: float, duration: float, depth: int = 0, **attrs) -> dict:
+        """Record a finished span; ``started`` is a time.perf_counter() value."""
+        record = {"name": name, "start": started - self.started, "duration": duration,
+                  "depth": depth, "attrs": attrs}
+        with self._lock:
+            self._spans.append(record)
+        if self.listener is not None:
+            self.listener(record)
+        return record
+
+    def to_list(self) -> list[dict]:
+        """JSON-ready spans ordered by start time (times rounded to 0.1 ms)."""
+        with self._lock:
+            spans = sorted(self._spans, key=lambda s: (s["start"], s["depth"]))
+        return [{**s, "start": round(s["start"], 4), "duration": round(s["duration"], 4)} for s in spans]
+
+    @property
+    def total(self) -> float:
+        """Seconds from the trace start to the end of its last span."""
+        with self._lock:
+            return max((s["start"] + s["duration"] for s in self._spans), default=0.0)
+
+
+_trace: ContextVar[Optional[Trace]] = ContextVar("scorecard_trace", default=None)
+_open_spans: ContextVar[tuple] = ContextVar("scorecard_open_spans", default=())
+
+
+def current_trace() -> Optional[Trace]:
+    return _trace.get()
+
+
+@contextmanager
+def tracing(listener: Optional[Callable[[dict], None]] = None):
+    """
+    Record spans for the enclosed block and yield the Trace.
+
+    If a trace is already active (e.g. the app started one before fetching the
+    template), it is reused so every stage ends up in the same waterfall.
+    ``listener`` only applies when a new trace is started.
+    """
+    trace = _trace.get()
+    if trace is not None:
+        yield trace
+        return
+    token = _trace.set(Trace(listener))
+    try:
+        yield _trace.get()
+    finally:
+        _trace.reset(token)
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """
+    Time the enclosed block as one span (no-op outside ``tracing()``).
+
+    Yields the span's attribute dict; ``annotate()`` adds to the innermost one.
+    """
+    trace = _trace.get()
+    if trace is None:
+        yield attrs
+        return
+    stack = _open_spans.get()
+    token = _open_spans.set(stack + (attrs,))
+    started = time.perf_counter()
+    try:
+        yield attrs
+    except BaseException as e:
+        attrs["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _open_spans.reset(token)
+        trace.add(name, started, time.perf_counter() - started, depth=len(stack), **attrs)
+
+
+def annotate(**attrs) -> None:
+    """Attach attributes (e.g. token counts) to the innermost open span."""
+    stack = _open_spans.get()
+    if stack:
+        stack[-1].update(attrs)
+
+
+def record_span(name: str, started: float, duration: float, **attrs) -> None:
+    """
+    Record a span timed elsewhere, e.g. a page extracted in a worker process.
+
+    ``started`` is that process's time.perf_counter() reading, which shares the
+    system-wide monotonic clock with this process.
+    """
+    trace = _trace.get()
+    if trace is not None:
+        trace.add(name, started, duration, depth=len(_open_spans.get()), **attrs)